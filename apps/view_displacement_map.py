@@ -22,6 +22,7 @@ os.putenv("NO_AT_BRIDGE", "1")
 class DisplacementMapArgParser(Tap):
     image_path: str
     glob: bool = False
+    fps: float = 10  # playback rate of --glob
 
     def configure(self):
         self.add_argument(
@@ -38,7 +39,9 @@ def run():
     )
     visualiser.register_plugin(VisualisableAutoStatusBar())
     if args.glob:
-        displacement_plugin = VisualisableDisplacementMapLoopWithGlob(args.image_path)
+        displacement_plugin = VisualisableDisplacementMapLoopWithGlob(
+            args.image_path, fps=args.fps
+        )
         visualiser.register_plugin(displacement_plugin)
 
     else:
@@ -80,7 +83,8 @@ def run():
 
     visualiser.initialise()
 
-    visualiser.run(regular_update_interval=1)
+    # the playback is paced by the plugin's own update rate
+    visualiser.run(regular_update_interval=None if args.glob else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,820 @@
+"""
+Benchmark of the data path of the built-in plugins and visuals.
+
+Each case is fed with synthetic data of 1e3 to 1e7 elements, and runs within a
+headless (no gl) visualiser, so it does not need any display. Results are stored
+as json, which can be compared against a previous run to track regressions.
+
+    python benchmarks/bench_data_path.py --output data_path.json
+    python benchmarks/bench_data_path.py --cases points_set_points gridmesh_set_data \\
+        --max-size 100000 --compare data_path.json
+"""
+
+import dataclasses
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from tap import Tap
+
+# such that the benchmarks run from a checkout, without installing the package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+
+class DataPathBenchmarkArgParser(Tap):
+    cases: Optional[List[str]] = None  # only run the given cases (default: all)
+    sizes: List[int] = DEFAULT_SIZES  # number of elements to feed to each case
+    max_size: Optional[float] = None  # skip sizes that are larger than this
+    repeat: int = 5  # max number of timed runs per case and size
+    time_limit: float = 10  # stop repeating once a case and size took this long
+    output: Optional[str] = None  # store the results as json
+    compare: Optional[str] = None  # a previous json result to compare against
+    list: bool = False  # list all available cases and exit
+
+
+###########################################################
+# synthetic data
+
+
+def random_points(n: int, dim: int = 3, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((n, dim)) * 100
+
+
+def grid_surface(n: int, nan_ratio: float = 0.05, seed: int = 0):
+    """A (roughly) n vertices surface, with some holes of nan."""
+    side = max(2, int(n**0.5))
+    xs, ys = np.meshgrid(
+        np.linspace(0, 100, side), np.linspace(0, 100, side), indexing="xy"
+    )
+    zs = np.sin(xs / 10) * np.cos(ys / 10) * 10
+    holes = np.random.default_rng(seed).random(zs.shape) < nan_ratio
+    zs[holes] = np.nan
+    return xs, ys, zs
+
+
+def bathymetry_points(n: int, seed: int = 0) -> np.ndarray:
+    """Scattered (x, y, depth) soundings, with some land above zero."""
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n, 2)) * 10000
+    depth = -200 + 250 * np.sin(xy[:, 0] / 2000) * np.cos(xy[:, 1] / 3000)
+    return np.column_stack([xy, depth])
+
+
+def ocean_currents(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return dict(
+        x=rng.random(n) * 10000,
+        y=rng.random(n) * 10000,
+        z=-rng.random(n) * 200,
+        u=rng.standard_normal(n) * 1e-2,
+        v=rng.standard_normal(n) * 1e-2,
+    )
+
+
+def planner_graph(n: int, num_costs: int = 3, seed: int = 0) -> Dict[str, np.ndarray]:
+    """A graph of n vertices, each connected to a few random others."""
+    rng = np.random.default_rng(seed)
+    num_edges = 2 * n
+    edges = np.column_stack(
+        [rng.integers(0, n, num_edges), rng.integers(0, n, num_edges)]
+    )
+    solution_idx = rng.integers(0, n, min(n, 100))
+    vertices = random_points(n, seed=seed)
+    return dict(
+        vertices_coordinate=vertices,
+        solution_coordinate=vertices[solution_idx],
+        edges=edges,
+        vertices_costs=rng.random((n, num_costs)),
+    )
+
+
+###########################################################
+# cases
+
+
+class BenchmarkContext:
+    """
+    A headless visualiser with the plugins that are being benchmarked. Plugins
+    are registered at the class level of the visualiser, hence all of them are
+    created once and shared by all cases.
+    """
+
+    def __init__(self, workdir: str):
+        from easy_visualiser.plugins import Visualisable2DLinePlot, VisualisablePoints
+        from easy_visualiser.plugins.ext import (
+            VisualisableBathy,
+            VisualisableOceanCurrent,
+            VisualisablePlannerGraph,
+        )
+        from easy_visualiser.plugins.functional_zscaler import AxisScalerPlugin
+        from easy_visualiser.utils import ToggleableBool
+        from easy_visualiser.visualiser import Visualiser
+
+        self.workdir = workdir
+        # visuals that are not part of the scene
+        self.standalone_visuals = []
+        self.visualiser = Visualiser(
+            title="data path benchmark",
+            auto_add_default_plugins=False,
+            headless="no_gl",
+        )
+        self.bathy_path = self.path("bathymetry.npy")
+        self.currents_path = self.path("currents.npy")
+        self.graph_path = self.path("graph.npz")
+
+        self.points = VisualisablePoints()
+        self.lineplot = Visualisable2DLinePlot(name="lineplot")
+        self.bathy = VisualisableBathy(
+            bathy_toggle=ToggleableBool(True),
+            bathy_colorscale_toggle=ToggleableBool(False),
+            depth_datapath=self.bathy_path,
+            # the cached path is benchmarked on its own
+            use_mesh_cache=False,
+        )
+        self.currents = VisualisableOceanCurrent(
+            ocean_current_toggle=ToggleableBool(True),
+            ocean_current_datapath=self.currents_path,
+            # the default (plasma) needs matplotlib
+            colormap="viridis",
+        )
+        self.graph = VisualisablePlannerGraph(
+            graph_data_path=self.graph_path,
+            graph_toggle=ToggleableBool(True),
+            graph_solution_toggle=ToggleableBool(True),
+            graph_solution_extra_toggle=ToggleableBool(False),
+            colormap="viridis",
+        )
+        for plugin in [
+            AxisScalerPlugin(1, name="zscaler"),
+            self.points,
+            self.lineplot,
+            self.bathy,
+            self.currents,
+            self.graph,
+        ]:
+            self.visualiser.register_plugin(plugin)
+        self.visualiser.initialise()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir, name)
+
+    def flush(self):
+        """Drop the gl commands that had been queued up by the benchmarked calls."""
+        from easy_visualiser.headless import discard_pending_gl_commands
+
+        self.visualiser.app.process_events()
+        for visual in self.standalone_visuals:
+            discard_pending_gl_commands(visual)
+
+
+@dataclasses.dataclass
+class BenchmarkCase:
+    name: str
+    # given the context and the size, prepare the data and returns the timed call
+    setup: Callable[[BenchmarkContext, int], Callable[[], Any]]
+    # cases that keep a python object per element would not fit in memory
+    max_size: Optional[int] = None
+
+
+CASES: Dict[str, BenchmarkCase] = dict()
+
+
+def case(name: str, max_size: Optional[int] = None):
+    def decorator(setup):
+        CASES[name] = BenchmarkCase(name, setup, max_size)
+        return setup
+
+    return decorator
+
+
+@case("points_set_points")
+def bench_points_set_points(ctx: BenchmarkContext, n: int):
+    data = itertools.cycle([random_points(n, seed=0), random_points(n, seed=1)])
+    # the first call (with a new shape) goes through the full set_data
+    ctx.points.set_points(next(data))
+
+    def run():
+        ctx.points.set_points(next(data))
+
+    return run
+
+
+def _points_stream_case(ctx: BenchmarkContext, n: int, set_points):
+    # a point cloud that keeps on growing by a small chunk each frame
+    data = random_points(n)
+    chunk = max(1, n // 500)
+    start = n // 2
+    ctx.points.points_visual.set_data(pos=data[:1])
+    set_points(data[:start])
+    sizes = itertools.cycle(range(start + chunk, n + 1, chunk))
+
+    def run():
+        set_points(data[: next(sizes)])
+
+    return run
+
+
+@case("points_stream_growth")
+def bench_points_stream_growth(ctx: BenchmarkContext, n: int):
+    return _points_stream_case(ctx, n, ctx.points.set_points)
+
+
+@case("points_stream_growth_set_data")
+def bench_points_stream_growth_set_data(ctx: BenchmarkContext, n: int):
+    # as it was before the capacity got reserved, i.e. a full set_data each frame
+    return _points_stream_case(
+        ctx, n, lambda pos: ctx.points.points_visual.set_data(pos=pos)
+    )
+
+
+@case("marker_update_data")
+def bench_marker_update_data(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.modded_components import MarkerWithModifiablePos
+
+    marker = MarkerWithModifiablePos(parent=ctx.visualiser.visual_parent)
+    marker.set_data(pos=random_points(n, seed=0))
+    new_pos = random_points(n, seed=1)
+
+    def run():
+        marker.update_data(pos=new_pos)
+        marker.upload_dirty_rows()
+
+    return run
+
+
+@case("marker_update_rows")
+def bench_marker_update_rows(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.modded_components import MarkerWithModifiablePos
+
+    # a few points move each frame, e.g. tracked objects within a large cloud
+    marker = MarkerWithModifiablePos(parent=ctx.visualiser.visual_parent)
+    marker.set_data(pos=random_points(n, seed=0))
+    rng = np.random.default_rng(0)
+    num_moved = min(n, 100)
+
+    def run():
+        rows = rng.choice(n, num_moved, replace=False)
+        marker.update_rows(rows, pos=rng.random((num_moved, 3)) * 100)
+        marker.upload_dirty_rows()
+
+    return run
+
+
+@case("lineplot_plot")
+def bench_lineplot_plot(ctx: BenchmarkContext, n: int):
+    data = random_points(n, dim=2)
+
+    def run():
+        ctx.lineplot.plot(data)
+
+    return run
+
+
+def time_series(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack([np.arange(n, dtype=float), rng.normal(size=n).cumsum()])
+
+
+@case("lineplot_plot_series")
+def bench_lineplot_plot_series(ctx: BenchmarkContext, n: int):
+    data = time_series(n)
+
+    def run():
+        ctx.lineplot.plot(data)
+
+    return run
+
+
+@case("lineplot_zoom")
+def bench_lineplot_zoom(ctx: BenchmarkContext, n: int):
+    ctx.lineplot.plot(time_series(n))
+    camera = ctx.lineplot.pw.view.camera
+    ranges = [(0, n), (n / 4, n / 2), (n / 2 - n / 100, n / 2 + n / 100)]
+    state = dict(i=0)
+
+    def run():
+        # each change of the x range re-decimates the series
+        state["i"] += 1
+        camera.set_range(x=ranges[state["i"] % len(ranges)], margin=0)
+
+    return run
+
+
+@case("lineplot_append")
+def bench_lineplot_append(ctx: BenchmarkContext, n: int):
+    data = time_series(n)
+    chunks = np.array_split(data, 100)
+
+    def run():
+        ctx.lineplot.plot(chunks[0])
+        for chunk in chunks[1:]:
+            ctx.lineplot.append(chunk)
+
+    return run
+
+
+@case("gridmesh_set_data")
+def bench_gridmesh_set_data(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.visuals.gridmesh import FixedGridMesh
+
+    xs, ys, zs = grid_surface(n)
+    mesh = FixedGridMesh(xs=xs, ys=ys, zs=zs, parent=ctx.visualiser.visual_parent)
+
+    def run():
+        mesh.set_data(xs=xs, ys=ys, zs=zs)
+
+    return run
+
+
+def masked_grid_surface(n: int, seed: int = 0):
+    """A grid surface, with half of it masked out (e.g. land in a bathymetry)."""
+    xs, ys, zs = grid_surface(n, seed=seed)
+    zs[:, : zs.shape[1] // 2] = np.nan
+    return xs, ys, zs
+
+
+@case("gridmesh_set_data_masked")
+def bench_gridmesh_set_data_masked(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.visuals.gridmesh import FixedGridMesh
+
+    xs, ys, zs = masked_grid_surface(n)
+    mesh = FixedGridMesh(xs=xs, ys=ys, zs=zs, parent=ctx.visualiser.visual_parent)
+
+    def run():
+        mesh.set_data(xs=xs, ys=ys, zs=zs)
+
+    return run
+
+
+@case("gridmesh_set_data_compact")
+def bench_gridmesh_set_data_compact(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.visuals.gridmesh import FixedGridMesh
+
+    xs, ys, zs = masked_grid_surface(n)
+    mesh = FixedGridMesh(
+        xs=xs,
+        ys=ys,
+        zs=zs,
+        compact_vertices=True,
+        parent=ctx.visualiser.visual_parent,
+    )
+
+    def run():
+        mesh.set_data(xs=xs, ys=ys, zs=zs)
+
+    return run
+
+
+@case("gridmesh_set_zs")
+def bench_gridmesh_set_zs(ctx: BenchmarkContext, n: int):
+    # e.g. the z scaling of a mesh, which keeps its topology (2000x2000 at n=4e6)
+    from easy_visualiser.visuals.gridmesh import FixedGridMesh
+
+    xs, ys, zs = grid_surface(n)
+    mesh = FixedGridMesh(xs=xs, ys=ys, zs=zs, parent=ctx.visualiser.visual_parent)
+    scales = itertools.cycle([0.5, 2.0])
+
+    def run():
+        mesh.set_data(zs=zs * next(scales))
+
+    return run
+
+
+def _aggregator_case(
+    n: int, rows_per_item: int, dirty_ratio: float = 0.01, backend=None
+):
+    from easy_visualiser.utils.aggregator import Aggregator
+
+    num_items = max(1, n // rows_per_item)
+    aggregator = Aggregator(dtype=np.float64, backend=backend)
+    rng = np.random.default_rng(0)
+    shape = (3,) if rows_per_item == 1 else (rows_per_item, 3)
+    for i in range(num_items):
+        aggregator[i] = rng.random(shape)
+    aggregator.assemble()
+    num_dirty = max(1, int(num_items * dirty_ratio))
+
+    def run():
+        # a typical frame: a few items got updated, then assemble all of them
+        for i in rng.integers(0, num_items, num_dirty):
+            aggregator[int(i)] = rng.random(shape)
+        aggregator.assemble()
+
+    return run
+
+
+@case("aggregator_assemble_unity", max_size=10**6)
+def bench_aggregator_assemble_unity(ctx: BenchmarkContext, n: int):
+    return _aggregator_case(n, rows_per_item=1)
+
+
+@case("aggregator_assemble_composite", max_size=10**6)
+def bench_aggregator_assemble_composite(ctx: BenchmarkContext, n: int):
+    return _aggregator_case(n, rows_per_item=10)
+
+
+@case("aggregator_assemble_unity_array", max_size=10**6)
+def bench_aggregator_assemble_unity_array(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.aggregator import AggregatorBackendArray
+
+    return _aggregator_case(n, rows_per_item=1, backend=AggregatorBackendArray)
+
+
+@case("aggregator_assemble_composite_array", max_size=10**6)
+def bench_aggregator_assemble_composite_array(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.aggregator import AggregatorBackendArray
+
+    return _aggregator_case(n, rows_per_item=10, backend=AggregatorBackendArray)
+
+
+@case("bathy_grid_build")
+def bench_bathy_grid_build(ctx: BenchmarkContext, n: int):
+    np.save(ctx.bathy_path, bathymetry_points(n))
+    ctx.bathy.mesh_cache = None
+
+    def run():
+        ctx.bathy.apply(ctx.bathy.prepare())
+
+    return run
+
+
+@case("bathy_grid_build_cached")
+def bench_bathy_grid_build_cached(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.artifact_cache import ArtifactCache
+
+    np.save(ctx.bathy_path, bathymetry_points(n))
+    ctx.bathy.mesh_cache = ArtifactCache(ctx.path("artifacts"))
+    # populate the cache, such that all the timed runs are hits
+    ctx.bathy.prepare()
+
+    def run():
+        ctx.bathy.apply(ctx.bathy.prepare())
+
+    return run
+
+
+@case("ocean_current_get_data")
+def bench_ocean_current_get_data(ctx: BenchmarkContext, n: int):
+    np.save(ctx.currents_path, ocean_currents(n), allow_pickle=True)
+    currents = ctx.currents
+    # show all of the currents, rather than a random subset of them
+    currents._VisualisableOceanCurrent__choices_size = n
+    currents.clear_cached_viewing_current_data()
+    # as if the guard had just seen the file
+    currents._last_modify_time = os.path.getmtime(ctx.currents_path)
+
+    def run():
+        currents._VisualisableOceanCurrent__get_data()
+
+    return run
+
+
+@case("planner_graph_get_latest_pdata")
+def bench_planner_graph_get_latest_pdata(ctx: BenchmarkContext, n: int):
+    np.savez(ctx.graph_path, **planner_graph(n))
+
+    def run():
+        ctx.graph.get_latest_pdata()
+
+    return run
+
+
+def keepout_zones(n: int, points_per_zone: int = 64, seed: int = 0):
+    """Zones (polygons) with n points in total, and their depths."""
+    rng = np.random.default_rng(seed)
+    num_zones = max(1, n // points_per_zone)
+    angles = np.linspace(0, 2 * np.pi, points_per_zone, endpoint=False)
+    circle = np.column_stack([np.cos(angles), np.sin(angles)])
+    centres = rng.random((num_zones, 2)) * 10000
+    radii = rng.random(num_zones) * 200 + 50
+    zones_points = [c + r * circle for c, r in zip(centres, radii)]
+    return zones_points, rng.random(num_zones) * 300
+
+
+def per_wall_keepout_zone_walls(zones_points, depths, bathy_interp):
+    """The previous implementation, which queried the bathymetry per wall end."""
+    vertices = []
+    faces = []
+    for points, depth in zip(zones_points, depths):
+        for i in range(len(points)):
+            xy_start, xy_goal = points[i], points[(i + 1) % len(points)]
+            depth1 = max(bathy_interp(*xy_start), -depth)
+            depth2 = max(bathy_interp(*xy_goal), -depth)
+            start = len(vertices)
+            vertices.extend(
+                [
+                    (*xy_start, 0),
+                    (*xy_start, depth1),
+                    (*xy_goal, 0),
+                    (*xy_goal, depth2),
+                ]
+            )
+            faces.extend(
+                [(start, start + 1, start + 2), (start + 1, start + 2, start + 3)]
+            )
+    return np.array(vertices, dtype=float), np.array(faces)
+
+
+def _koz_case(n: int, build):
+    from scipy.interpolate import NearestNDInterpolator
+
+    bathymetry = bathymetry_points(10**4)
+    bathy_interp = NearestNDInterpolator(bathymetry[:, :2], bathymetry[:, 2])
+    zones_points, depths = keepout_zones(n)
+
+    def run():
+        build(zones_points, depths, bathy_interp)
+
+    return run
+
+
+@case("koz_build_walls")
+def bench_koz_build_walls(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.plugins.ext.visualisable_koz import build_keepout_zone_walls
+
+    return _koz_case(n, build_keepout_zone_walls)
+
+
+@case("koz_build_walls_per_wall", max_size=10**5)
+def bench_koz_build_walls_per_wall(ctx: BenchmarkContext, n: int):
+    return _koz_case(n, per_wall_keepout_zone_walls)
+
+
+def sonar_swath(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n, 2)) * 1000
+    return np.column_stack([xy, np.sin(xy[:, 0] / 50) * 20 - 100])
+
+
+@case("lod_points_build")
+def bench_lod_points_build(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.point_lod import PointLOD
+
+    pos = sonar_swath(n)
+
+    def run():
+        PointLOD(pos)
+
+    return run
+
+
+@case("lod_points_select")
+def bench_lod_points_select(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.point_lod import PointLOD
+
+    lod = PointLOD(sonar_swath(n))
+    eyes = [np.array([500, 500, 500]), np.array([0, 0, -50]), np.array([900, 100, 0])]
+    state = dict(i=0)
+
+    def run():
+        state["i"] += 1
+        lod.select(1_000_000, eye=eyes[state["i"] % len(eyes)], focal=800)
+
+    return run
+
+
+@case("pick_index_build")
+def bench_pick_index_build(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.picking import PointIndex
+
+    pos = sonar_swath(n)
+
+    def run():
+        PointIndex(pos)
+
+    return run
+
+
+@case("pick_nearest_to_ray")
+def bench_pick_nearest_to_ray(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.picking import PointIndex
+
+    pos = sonar_swath(n)
+    index = PointIndex(pos)
+    eye = np.array([500, -800, 600])
+    targets = pos[np.random.default_rng(0).integers(n, size=64)]
+    state = dict(i=0)
+
+    def run():
+        # a cone of about 5 pixels, in an 800 pixels wide perspective view
+        state["i"] += 1
+        index.nearest_to_ray(eye, targets[state["i"] % len(targets)] - eye, 0, 0.006)
+
+    return run
+
+
+def _heightmap_file(ctx: BenchmarkContext, n: int) -> str:
+    path = ctx.path(f"heightmap_{n}.npy")
+    if not os.path.exists(path):
+        _, _, zs = grid_surface(n, nan_ratio=0)
+        np.save(path, ((zs + 10) * 3000).astype(np.uint16))
+    return path
+
+
+@case("heightmap_ingest")
+def bench_heightmap_ingest(ctx: BenchmarkContext, n: int):
+    # memory-mapped, and only the (at most 1e5) displayed samples get read
+    from easy_visualiser.utils.heightmap import Heightmap
+
+    path = _heightmap_file(ctx, n)
+
+    def run():
+        heightmap = Heightmap.open(path)
+        every = heightmap.stride_for(100_000)
+        heightmap.strided(every)
+        heightmap.coordinates(every)
+
+    return run
+
+
+@case("heightmap_ingest_in_full")
+def bench_heightmap_ingest_in_full(ctx: BenchmarkContext, n: int):
+    # as it was before, i.e. the whole grid in memory, plus its indices
+    path = _heightmap_file(ctx, n)
+
+    def run():
+        zs = np.load(path)
+        grid = np.indices(zs.shape)
+        every = max(1, int(np.ceil(np.sqrt(zs.size / 100_000))))
+        zs[::every, ::every], grid[0][::every, ::every], grid[1][::every, ::every]
+
+    return run
+
+
+@case("terrain_pyramid_build")
+def bench_terrain_pyramid_build(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.utils.terrain import GridPyramid
+
+    _, _, zs = masked_grid_surface(n)
+
+    def run():
+        GridPyramid(zs)
+
+    return run
+
+
+@case("terrain_select")
+def bench_terrain_select(ctx: BenchmarkContext, n: int):
+    # the tiles (and their neighbours' levels) for a moving camera, plus the
+    # tiles that it had not built yet
+    from easy_visualiser.utils.terrain import GridPyramid, TerrainQuadtree
+
+    _, _, zs = masked_grid_surface(n)
+    quadtree = TerrainQuadtree(GridPyramid(zs))
+    side = zs.shape[0]
+    eyes = itertools.cycle(
+        [np.array([x * side, side / 2, side / 10]) for x in np.linspace(0, 1, 16)]
+    )
+    built = set()
+
+    def run():
+        nodes = quadtree.select(eye=next(eyes), focal=800)
+        selected = set(nodes)
+        for node in nodes:
+            key = node, quadtree.coarser_sides(node, selected)
+            if key not in built:
+                quadtree.tile(*key)
+                built.add(key)
+
+    return run
+
+
+@case("ruler_set_data", max_size=10**6)
+def bench_ruler_set_data(ctx: BenchmarkContext, n: int):
+    from easy_visualiser.visuals.ruler import RulerScaleVisual
+
+    # one tick per unit length
+    ruler = RulerScaleVisual(tick_gap=1)
+    ctx.standalone_visuals.append(ruler)
+    start_end_pos = np.array([[0, 0, 0], [n, 0, 0]], dtype=float)
+
+    def run():
+        ruler.set_data(start_end_pos=start_end_pos)
+
+    return run
+
+
+###########################################################
+# runner
+
+
+def time_case(
+    run: Callable[[], Any],
+    repeat: int,
+    time_limit: float,
+    after_each: Callable[[], Any],
+) -> Dict[str, float]:
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        after_each()
+        if time.perf_counter() - started >= time_limit:
+            break
+    timings = np.array(timings)
+    return dict(
+        runs=len(timings),
+        mean=float(timings.mean()),
+        min=float(timings.min()),
+        max=float(timings.max()),
+        std=float(timings.std()),
+    )
+
+
+def get_metadata() -> Dict:
+    import vispy
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return dict(
+        timestamp=datetime.datetime.now().isoformat(),
+        git_revision=revision,
+        python=platform.python_version(),
+        numpy=np.__version__,
+        vispy=vispy.__version__,
+        machine=platform.platform(),
+    )
+
+
+def compare_results(results: List[Dict], previous_path: str, threshold: float = 1.2):
+    with open(previous_path, "r") as f:
+        previous = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\ncompared to {previous_path} (min time, >{threshold:.1f}x is flagged):")
+    for result in results:
+        before = previous.get((result["case"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["min"] / before["min"]
+        flag = "  <-- regression" if ratio > threshold else ""
+        print(
+            f"{result['case']:>32} {result['size']:>9}: "
+            f"{before['min'] * 1000:10.3f}ms -> {result['min'] * 1000:10.3f}ms "
+            f"({ratio:.2f}x){flag}"
+        )
+
+
+def run():
+    args = DataPathBenchmarkArgParser(underscores_to_dashes=True).parse_args()
+    if args.list:
+        print("\n".join(CASES))
+        return
+
+    case_names = list(CASES) if args.cases is None else args.cases
+    unknown = set(case_names) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {unknown}, available ones are {list(CASES)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = BenchmarkContext(workdir)
+        for name in case_names:
+            bench_case = CASES[name]
+            for size in args.sizes:
+                if args.max_size is not None and size > args.max_size:
+                    continue
+                if bench_case.max_size is not None and size > bench_case.max_size:
+                    print(f"{name:>32} {size:>9}: skipped (too large for this case)")
+                    continue
+                timed = time_case(
+                    bench_case.setup(ctx, size),
+                    args.repeat,
+                    args.time_limit,
+                    after_each=ctx.flush,
+                )
+                results.append(dict(case=name, size=size, **timed))
+                print(
+                    f"{name:>32} {size:>9}: mean {timed['mean'] * 1000:10.3f}ms "
+                    f"min {timed['min'] * 1000:10.3f}ms ({timed['runs']} runs)"
+                )
+
+    if args.compare is not None:
+        compare_results(results, args.compare)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(dict(meta=get_metadata(), results=results), f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Benchmark of the cold start (import) time of the package.
+
+Each module is imported in a fresh interpreter with `python -X importtime`, and
+the best of a few runs is kept (the first run also warms up the disk cache).
+
+    python benchmarks/bench_import_time.py --output import_time.json
+    python benchmarks/bench_import_time.py --budget-ms 500  # fails when exceeded
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from tap import Tap
+
+DEFAULT_MODULES = [
+    "easy_visualiser",
+    "easy_visualiser.plugins",
+    "easy_visualiser.plugins.ext",
+]
+
+
+class ImportTimeBenchmarkArgParser(Tap):
+    modules: List[str] = DEFAULT_MODULES  # modules to import
+    repeat: int = 5  # number of fresh interpreters per module
+    top: int = 10  # number of the slowest imported modules to show
+    budget_ms: Optional[float] = None  # exit with failure if any import is slower
+    output: Optional[str] = None  # store the results as json
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse the output of `-X importtime` into a list of (module name, self us,
+    cumulative us).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # the header
+            continue
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def time_import(module: str) -> List[Tuple[str, int, int]]:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [repo_root, env.get("PYTHONPATH")])
+    )
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    return parse_importtime(out.stderr)
+
+
+def benchmark_module(module: str, repeat: int, top: int) -> Dict:
+    best = None
+    best_total = None
+    for _ in range(repeat):
+        entries = time_import(module)
+        total = sum(self_us for _, self_us, _ in entries)
+        if best_total is None or total < best_total:
+            best, best_total = entries, total
+    slowest = sorted(best, key=lambda entry: -entry[2])
+    return dict(
+        module=module,
+        total_ms=best_total / 1000,
+        num_modules=len(best),
+        slowest=[
+            dict(name=name, self_ms=self_us / 1000, cumulative_ms=cumulative_us / 1000)
+            for name, self_us, cumulative_us in slowest[:top]
+        ],
+    )
+
+
+def run():
+    args = ImportTimeBenchmarkArgParser(underscores_to_dashes=True).parse_args()
+
+    results = []
+    for module in args.modules:
+        result = benchmark_module(module, args.repeat, args.top)
+        results.append(result)
+        print(
+            f"{module}: {result['total_ms']:.1f}ms "
+            f"({result['num_modules']} modules imported)"
+        )
+        for entry in result["slowest"]:
+            print(f"    {entry['cumulative_ms']:8.1f}ms  {entry['name']}")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget_ms is not None:
+        over_budget = [r for r in results if r["total_ms"] > args.budget_ms]
+        for result in over_budget:
+            print(
+                f"{result['module']} took {result['total_ms']:.1f}ms, "
+                f"which is over the budget of {args.budget_ms:.1f}ms"
+            )
+        if over_budget:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
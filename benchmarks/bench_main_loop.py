@@ -0,0 +1,138 @@
+"""
+Benchmark of the visualiser main loop.
+
+For both the busy spinning loop (before) and the event driven loop (after), measure
+    - the cpu usage while the window is idle, and
+    - the latency from data arriving on another thread to the canvas redraw.
+
+Each mode runs in its own process, as the visualiser keeps class-level state.
+
+    python benchmarks/bench_main_loop.py --duration 5 --output main_loop.json
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from tap import Tap
+
+# such that the benchmarks run from a checkout, without installing the package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+MODES = ("busy_spin", "event_driven")
+
+
+class MainLoopBenchmarkArgParser(Tap):
+    mode: Optional[str] = None  # only run the given mode within this process
+    duration: float = 5.0  # seconds of idle window to measure cpu usage
+    samples: int = 50  # number of data arrivals to measure latency
+    output: Optional[str] = None  # store the results as json
+
+
+def summarise_latency(latencies: List[float]) -> Dict[str, float]:
+    latencies = np.array(latencies) * 1000
+    return dict(
+        mean=float(latencies.mean()),
+        p50=float(np.percentile(latencies, 50)),
+        p95=float(np.percentile(latencies, 95)),
+        max=float(latencies.max()),
+    )
+
+
+def run_mode(mode: str, duration: float, samples: int) -> Dict:
+    from easy_visualiser.plugin_capability import IntervalUpdatableMixin
+    from easy_visualiser.plugins import VisualisablePoints
+    from easy_visualiser.visualiser import Visualiser
+
+    visualiser = Visualiser(title=f"benchmark {mode}", auto_add_default_plugins=False)
+    inbox = queue.Queue()
+    sent_at: Dict[int, float] = dict()
+    waiting_for_draw: List[int] = []
+    latencies: List[float] = []
+    results = dict(mode=mode)
+
+    class DataConsumer(IntervalUpdatableMixin, VisualisablePoints):
+        def on_update(self):
+            while not inbox.empty():
+                idx, pos = inbox.get_nowait()
+                self.set_points(pos)
+                waiting_for_draw.append(idx)
+
+    visualiser.register_plugin(DataConsumer())
+
+    @visualiser.canvas.events.draw.connect
+    def on_draw(ev):
+        now = time.perf_counter()
+        for idx in waiting_for_draw:
+            latencies.append(now - sent_at[idx])
+        waiting_for_draw.clear()
+
+    def producer():
+        # let the window settle before measuring
+        time.sleep(1)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        time.sleep(duration)
+        results["idle_cpu_percent"] = (
+            100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        )
+
+        for i in range(samples):
+            sent_at[i] = time.perf_counter()
+            inbox.put((i, np.random.rand(1000, 3)))
+            visualiser.request_update()
+            time.sleep(0.05)
+        time.sleep(0.5)
+        visualiser.async_loop.call_soon_threadsafe(visualiser.canvas.close)
+
+    visualiser.initialise()
+    threading.Thread(target=producer, daemon=True).start()
+    visualiser.run(event_driven=mode == "event_driven")
+
+    results["latency_ms"] = summarise_latency(latencies)
+    return results
+
+
+def run():
+    args = MainLoopBenchmarkArgParser(underscores_to_dashes=True).parse_args()
+    if args.mode is not None:
+        print(json.dumps(run_mode(args.mode, args.duration, args.samples)))
+        return
+
+    all_results = []
+    for mode in MODES:
+        out = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                f"--mode={mode}",
+                f"--duration={args.duration}",
+                f"--samples={args.samples}",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        all_results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for result in all_results:
+        latency = result["latency_ms"]
+        print(
+            f"{result['mode']:>14}: idle cpu {result['idle_cpu_percent']:6.1f}% | "
+            f"data-to-redraw latency mean {latency['mean']:.2f}ms "
+            f"p95 {latency['p95']:.2f}ms max {latency['max']:.2f}ms"
+        )
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(all_results, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
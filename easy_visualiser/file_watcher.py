@@ -0,0 +1,310 @@
+import ctypes
+import ctypes.util
+import dataclasses
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# we watch the parent directory instead of the file itself, such that saving by
+# writing to a temporary file then renaming it over the target is detected.
+DIRECTORY_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# (exists, mtime_ns, size, inode)
+FileSignature = Tuple[bool, int, int, int]
+
+
+def file_signature(path: str) -> FileSignature:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False, 0, 0, 0
+    return True, stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+@dataclasses.dataclass
+class WatchedFile:
+    """
+    The last known state of a watched file. This is only refreshed (with a
+    single stat) after the file had settled down from a change, so reading it
+    does not cost any syscall.
+    """
+
+    path: str
+    exists: bool = False
+    mtime: Optional[float] = None
+    # bumps on every (debounced) change of the file
+    version: int = 0
+    callbacks: List[Callable[["WatchedFile"], None]] = dataclasses.field(
+        default_factory=list
+    )
+    _signature: FileSignature = (False, 0, 0, 0)
+    _polled_signature: FileSignature = (False, 0, 0, 0)
+    # when set, the file had been touched and we are waiting for it to settle
+    _settle_deadline: Optional[float] = None
+
+    def _refresh(self) -> bool:
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self.exists = signature[0]
+        self.mtime = signature[1] / 1e9 if self.exists else None
+        self.version += 1
+        return True
+
+
+class _Inotify:
+    """Minimal inotify binding through libc, without any extra dependency."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Returns all pending events, as a list of (watch descriptor, mask, name)."""
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    A shared service that watches files for modifications, on a background
+    thread. Uses inotify on linux, and falls back to polling the files'
+    modification time elsewhere (or for files whose directory cannot be watched).
+
+    Changes are debounced, i.e. a file is only reported as changed once it had
+    not been touched for `debounce` seconds, so that partial writes of a large
+    file do not get picked up half-way.
+    """
+
+    __instance: "FileWatcher" = None
+
+    def __init__(
+        self,
+        debounce: float = 0.1,
+        poll_interval: float = 0.5,
+        use_inotify: bool = sys.platform.startswith("linux"),
+    ):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._files: Dict[str, WatchedFile] = dict()
+        # watch descriptor -> directory, and directory -> names of watched files
+        self._directories: Dict[int, str] = dict()
+        self._directory_files: Dict[str, Set[str]] = defaultdict(set)
+        self._polled_files: Set[str] = set()
+
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logger.warning("inotify is unavailable, polling files instead: {}", e)
+
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @classmethod
+    def get_instance(cls) -> "FileWatcher":
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @property
+    def using_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def watch(
+        self, path: str, callback: Optional[Callable[[WatchedFile], None]] = None
+    ) -> WatchedFile:
+        """
+        Watch the given file, calling the callback (from the watcher's thread)
+        whenever it changes. Watching the same path again shares its state.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            watched = self._files.get(path)
+            if watched is None:
+                watched = WatchedFile(path)
+                watched._refresh()
+                watched._polled_signature = watched._signature
+                self._files[path] = watched
+                self.__subscribe(path)
+            if callback is not None:
+                watched.callbacks.append(callback)
+        self.__ensure_running()
+        return watched
+
+    def __subscribe(self, path: str):
+        directory, name = os.path.split(path)
+        if self._inotify is not None:
+            try:
+                wd = self._inotify.add_watch(directory, DIRECTORY_WATCH_MASK)
+            except OSError as e:
+                logger.debug("unable to inotify {}, polling it instead: {}", path, e)
+            else:
+                self._directories[wd] = directory
+                self._directory_files[directory].add(name)
+                return
+        self._polled_files.add(path)
+
+    def __ensure_running(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.__run, name="easy_visualiser-file-watcher", daemon=True
+            )
+            self._thread.start()
+        else:
+            # let the thread pick up any newly polled file
+            os.write(self._wakeup_w, b"\0")
+
+    def stop(self):
+        self._stopping = True
+        if self._thread is not None:
+            os.write(self._wakeup_w, b"\0")
+            self._thread.join()
+            self._thread = None
+
+    ###########################################################
+    # watcher thread
+    def __run(self):
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stopping:
+            timeout = self.__next_timeout(next_poll)
+            readers = [self._wakeup_r]
+            if self._inotify is not None:
+                readers.append(self._inotify.fd)
+            ready, _, _ = select.select(readers, [], [], timeout)
+
+            now = time.monotonic()
+            if self._wakeup_r in ready:
+                os.read(self._wakeup_r, 1024)
+            if self._inotify is not None and self._inotify.fd in ready:
+                self.__process_inotify_events(now)
+            if self._polled_files and now >= next_poll:
+                self.__poll_files(now)
+                next_poll = now + self.poll_interval
+            self.__report_settled(now)
+
+    def __next_timeout(self, next_poll: float) -> Optional[float]:
+        deadlines = [
+            f._settle_deadline
+            for f in list(self._files.values())
+            if f._settle_deadline is not None
+        ]
+        if self._polled_files:
+            deadlines.append(next_poll)
+        if not deadlines:
+            return None
+        return max(min(deadlines) - time.monotonic(), 0)
+
+    def __touch(self, watched: WatchedFile, now: float):
+        # each touch restarts the debounce
+        watched._settle_deadline = now + self.debounce
+
+    def __process_inotify_events(self, now: float):
+        for wd, mask, name in self._inotify.read_events():
+            with self._lock:
+                if mask & IN_Q_OVERFLOW:
+                    # we might have missed anything
+                    for watched in self._files.values():
+                        self.__touch(watched, now)
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    # the directory itself is gone. Fall back to polling its files.
+                    self._directories.pop(wd)
+                    for file_name in self._directory_files.pop(directory, ()):
+                        path = os.path.join(directory, file_name)
+                        self._polled_files.add(path)
+                        self.__touch(self._files[path], now)
+                    continue
+                if name not in self._directory_files.get(directory, ()):
+                    continue
+                self.__touch(self._files[os.path.join(directory, name)], now)
+
+    def __poll_files(self, now: float):
+        with self._lock:
+            for path in self._polled_files:
+                watched = self._files[path]
+                signature = file_signature(path)
+                if signature != watched._polled_signature:
+                    watched._polled_signature = signature
+                    self.__touch(watched, now)
+
+    def __report_settled(self, now: float):
+        changed = []
+        with self._lock:
+            for watched in self._files.values():
+                if watched._settle_deadline is None or now < watched._settle_deadline:
+                    continue
+                watched._settle_deadline = None
+                if watched._refresh():
+                    changed.append(watched)
+        for watched in changed:
+            for callback in list(watched.callbacks):
+                try:
+                    callback(watched)
+                except Exception as e:
+                    logger.exception("file watcher callback failed: {}", e)
@@ -0,0 +1,140 @@
+import collections
+import functools
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from .workers import PrepareWorkerPool
+
+# (version of the content, index of the frame)
+FrameKey = Tuple[int, int]
+# the result of a frame that failed to load
+FAILED = object()
+
+
+class FramePrefetcher:
+    """
+    Loads the frames of a (looping) sequence ahead of the one being shown, on the
+    visualiser's worker pool, and keeps the loaded ones in a bounded cache (in
+    least recently used order), such that showing a frame is only a lookup.
+
+    Frames that fail to load are logged, and not attempted again (until
+    invalidated), such that the caller can skip them.
+    """
+
+    def __init__(
+        self,
+        workers: "PrepareWorkerPool",
+        load: Callable[[int], Any],
+        num_frames: int,
+        lookahead: int = 6,
+        cache_size: Optional[int] = None,
+        on_ready: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        :param load: loads the frame of the given index. Runs on a worker, hence
+            must not touch any visual.
+        :param lookahead: the number of frames to load ahead of the shown one.
+        :param cache_size: the number of loaded frames to keep around, such that
+            stepping back (or looping over a short sequence) does not reload them.
+        :param on_ready: called (on the main thread) with the index of each frame
+            once it is loaded (or had failed to).
+        """
+        self.workers = workers
+        self.load = load
+        self.num_frames = num_frames
+        self.lookahead = lookahead
+        self.cache_size = 2 * lookahead if cache_size is None else cache_size
+        self.on_ready = on_ready
+        # bumped whenever the content of the frames changes
+        self._version = 0
+        self._loaded: "collections.OrderedDict[FrameKey, Any]" = (
+            collections.OrderedDict()
+        )
+        self._loading: Dict[FrameKey, None] = dict()
+        self._failed: Set[FrameKey] = set()
+        self._wanted: List[FrameKey] = []
+
+    def __key(self, index: int) -> FrameKey:
+        return self._version, index % self.num_frames
+
+    def get(self, index: int) -> Optional[Any]:
+        """The loaded frame, or None if it is not loaded (yet)."""
+        key = self.__key(index)
+        if key not in self._loaded:
+            return None
+        self._loaded.move_to_end(key)
+        return self._loaded[key]
+
+    def is_ready(self, index: int) -> bool:
+        return self.__key(index) in self._loaded
+
+    def has_failed(self, index: int) -> bool:
+        return self.__key(index) in self._failed
+
+    def prefetch(self, index: int, step: int = 1):
+        """
+        Loads the frame of the given index, and the `lookahead` ones after it (in
+        the direction of `step`), nearest first. Frames that are no longer wanted
+        stop loading.
+        """
+        self._wanted = [
+            self.__key(index + step * i)
+            for i in range(min(self.lookahead, self.num_frames - 1) + 1)
+        ]
+        wanted = set(self._wanted)
+        for key in [key for key in self._loading if key not in wanted]:
+            self.workers.cancel((self, key))
+            del self._loading[key]
+        for key in self._wanted:
+            if key in self._loaded or key in self._loading or key in self._failed:
+                continue
+            self._loading[key] = None
+            self.workers.submit(
+                (self, key),
+                functools.partial(self.__load, key[1]),
+                functools.partial(self.__on_loaded, key),
+            )
+
+    def invalidate(self):
+        """Drops all loaded frames, e.g. as how they are loaded had changed."""
+        self._version += 1
+        self._loaded.clear()
+        for key in self._loading:
+            self.workers.cancel((self, key))
+        self._loading.clear()
+        self._failed.clear()
+        self._wanted = []
+
+    def __load(self, index: int) -> Any:
+        # (the pool would only log the error, without ever applying anything)
+        try:
+            return self.load(index)
+        except Exception as e:
+            logger.opt(exception=e).error("Failed to load frame {}", index)
+            return FAILED
+
+    def __on_loaded(self, key: FrameKey, frame: Any):
+        self._loading.pop(key, None)
+        if key[0] != self._version:
+            return
+        if frame is FAILED:
+            self._failed.add(key)
+        else:
+            self.__cache(key, frame)
+        if self.on_ready is not None:
+            self.on_ready(key[1])
+
+    def __cache(self, key: FrameKey, frame: Any):
+        self._loaded[key] = frame
+        wanted = set(self._wanted)
+        for old_key in list(self._loaded):
+            if len(self._loaded) <= self.cache_size:
+                break
+            if old_key not in wanted:
+                del self._loaded[old_key]
+
+    @property
+    def num_loaded(self) -> int:
+        return len(self._loaded)
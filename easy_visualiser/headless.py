@@ -0,0 +1,207 @@
+import enum
+import time
+import weakref
+from types import SimpleNamespace
+from typing import List, Sequence, Tuple
+
+import vispy
+from vispy import app, gloo
+from vispy.app import _default_app
+from vispy.app.canvas import KeyEvent, MouseEvent
+from vispy.scene.subscene import SubScene
+from vispy.scene.widgets import Widget
+from vispy.util.event import EmitterGroup, Event
+
+OFFSCREEN_BACKENDS: Sequence[str] = ("egl", "osmesa")
+
+
+class HeadlessMode(enum.Enum):
+    # render with an offscreen gl backend, without any window
+    OFFSCREEN = "offscreen"
+    # never touch gl at all. Only useful for benchmarking the data path
+    NO_GL = "no_gl"
+
+
+def create_offscreen_application(
+    backends: Sequence[str] = OFFSCREEN_BACKENDS,
+) -> app.Application:
+    """
+    Use the first available offscreen backend as the default vispy application,
+    so that anything (e.g. timers) using the default application works as well.
+    """
+    errors = []
+    for backend in backends:
+        try:
+            vispy.use(app=backend, gl="osmesa" if backend == "osmesa" else None)
+            return app.use_app()
+        except Exception as e:
+            errors.append(f"{backend}: {e}")
+    raise RuntimeError(
+        "Unable to use any offscreen backend for headless rendering.\n"
+        + "\n".join(errors)
+    )
+
+
+def discard_pending_gl_commands(node):
+    """
+    Visuals queue their gl commands (including copies of their data) until they
+    get drawn. Without gl, we would never draw, so drop them instead of letting
+    the queues grow forever.
+    """
+    stack = [node]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        for value in list(vars(node).values()):
+            glir = getattr(value, "glir", None)
+            if isinstance(glir, gloo.glir.GlirQueue):
+                glir.clear()
+        stack.extend(getattr(node, "_subvisuals", []))
+        stack.extend(getattr(node, "children", []))
+
+
+class _NullTimerBackend:
+    """
+    Timer backend of the NullApplication. Timers are ticked whenever the
+    application processes its events.
+    """
+
+    def __init__(self, vispy_timer: app.Timer):
+        self._vispy_timer = vispy_timer
+        self._interval = None
+        self._next_fire = None
+
+    def _vispy_start(self, interval: float):
+        self._interval = interval
+        self._next_fire = time.perf_counter() + interval
+
+    def _vispy_stop(self):
+        self._next_fire = None
+
+    def _vispy_get_native_timer(self):
+        return self
+
+    def tick(self, now: float):
+        if self._next_fire is None or now < self._next_fire:
+            return
+        # do not try to catch up on missed ticks in bursts
+        self._next_fire = max(self._next_fire + self._interval, now)
+        self._vispy_timer._timeout()
+
+
+class _NullApplicationBackend:
+    def __init__(self):
+        self.timers: "weakref.WeakSet[_NullTimerBackend]" = weakref.WeakSet()
+
+    def _vispy_get_backend_name(self) -> str:
+        return "null"
+
+    def _vispy_get_native_app(self):
+        return self
+
+    def _vispy_process_events(self):
+        now = time.perf_counter()
+        for timer in list(self.timers):
+            timer.tick(now)
+
+    def _vispy_sleep(self, duration_sec: float):
+        time.sleep(duration_sec)
+
+    def _vispy_reuse(self):
+        pass
+
+    def _vispy_run(self):
+        raise RuntimeError("The null application has no event loop to run.")
+
+    def _vispy_quit(self):
+        pass
+
+
+class NullApplication(app.Application):
+    """
+    Stand-in for vispy's application, when there is no gl backend. Supports
+    vispy timers, so plugins that animate with `app.Timer` still work.
+    """
+
+    def __init__(self):
+        # not calling super, as that would select an actual backend
+        self._backend = _NullApplicationBackend()
+        backend = self._backend
+
+        class TimerBackend(_NullTimerBackend):
+            def __init__(self, vispy_timer: app.Timer):
+                super().__init__(vispy_timer)
+                backend.timers.add(self)
+
+        self._backend_module = SimpleNamespace(TimerBackend=TimerBackend)
+        self.canvases: List["NullCanvas"] = []
+
+    def process_events(self):
+        self._backend._vispy_process_events()
+        for canvas in self.canvases:
+            discard_pending_gl_commands(canvas.scene)
+
+    def use_as_default(self):
+        """
+        Makes this the default vispy application, which is what timers created
+        without an explicit application (i.e. `app.Timer()`) would use.
+        """
+        if _default_app.default_app is None:
+            _default_app.default_app = self
+
+
+class NullCanvas:
+    """
+    Stand-in for the SceneCanvas that holds the same scene graph and events, but
+    never creates any gl context or draws anything.
+    """
+
+    def __init__(
+        self,
+        application: NullApplication,
+        title: str = "untitled",
+        size: Tuple[int, int] = (800, 600),
+    ):
+        self.title = title
+        self.size = size
+        self.events = EmitterGroup(
+            source=self,
+            close=Event,
+            draw=Event,
+            resize=Event,
+            key_press=KeyEvent,
+            key_release=KeyEvent,
+            mouse_press=MouseEvent,
+            mouse_release=MouseEvent,
+            mouse_move=MouseEvent,
+            mouse_wheel=MouseEvent,
+        )
+        self.scene = SubScene()
+        self.central_widget = Widget(parent=self.scene)
+        self.central_widget.size = size
+        application.canvases.append(self)
+        self.app = application
+
+    def connect(self, fun):
+        """Connect a function to an event, named as ``on_<event name>``."""
+        name = fun.__name__
+        if not name.startswith("on_"):
+            raise ValueError(
+                "When connecting a function based on its name, "
+                "the name should start with 'on_'"
+            )
+        self.events[name[3:]].connect(fun)
+        return fun
+
+    def update(self, node=None):
+        pass
+
+    def render(self, *args, **kwargs):
+        raise RuntimeError("Unable to render without gl. Use the offscreen mode.")
+
+    def close(self):
+        self.events.close()
+        self.app.canvases.remove(self)
@@ -22,6 +22,14 @@ class DataSource(ABC):
         """
         self.visualiser = visualiser
 
+    def notify_new_data(self):
+        """
+        Let the visualiser knows that new data had been delivered, so that the
+        event driven loop wakes up to process it. Safe to be called from any thread.
+        """
+        if self.visualiser is not None:
+            self.visualiser.request_update()
+
 
 class DataSourceSingleton(DataSource):
     __instance: "DataSourceSingleton"
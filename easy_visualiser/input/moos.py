@@ -4,13 +4,15 @@ from typing import Callable, Dict
 import pymoos as moos
 
 from easy_visualiser.plugins import VisualisablePluginInitialisationError
+from easy_visualiser.profiler import profile
 
-from . import Singleton
+from . import DataSourceSingleton
 
 
-class MoosComm(Singleton, moos.comms):
+class MoosComm(DataSourceSingleton, moos.comms):
     def __init__(self):
-        super().__init__()
+        DataSourceSingleton.__init__(self)
+        moos.comms.__init__(self)
         self.connect_to_moos("localhost", 9000)
         self.__registered_variables: Dict[str, Callable] = dict()
 
@@ -32,14 +34,20 @@ class MoosComm(Singleton, moos.comms):
         self.__registered_variables[variable_name] = callback
         self.register(variable_name, interval)
 
+    def construct_plugin(self):
+        # (already connected on construction)
+        pass
+
     def __on_connect(self):
         return True
 
     def __on_new_mail(self):
         try:
             for msg in self.fetch():
-                self.__registered_variables[msg.key()](msg)
+                with profile("datasource", msg.key()):
+                    self.__registered_variables[msg.key()](msg)
         except Exception:
             traceback.print_exc()
             return False
+        self.notify_new_data()
         return True
@@ -3,6 +3,8 @@ from typing import Callable, List
 
 from msgx.asyncio import MsgXAsyncReceiver
 
+from easy_visualiser.profiler import callable_name, profile_callable
+
 from . import DataSourceSingleton
 
 
@@ -23,6 +25,9 @@ class MsgX(DataSourceSingleton):
             msg = await self.p_msg_recv.just_get_msg()
             for callback in self.callbacks:
                 _loop.call_soon(callback, msg)
+            self.notify_new_data()
 
     def add_callback(self, callback: Callable):
-        self.callbacks.append(callback)
+        self.callbacks.append(
+            profile_callable("datasource", callable_name(callback), callback)
+        )
@@ -1,6 +1,8 @@
 import sys
 from typing import Callable, List
 
+from easy_visualiser.profiler import callable_name, profile_callable
+
 from . import DataSourceSingleton
 
 sys.path.insert(0, "/home/tin/git-repos/PlotMsg-cpp/built_python_pkg/")
@@ -28,6 +30,9 @@ class PlotMsg(DataSourceSingleton):
         msg = self.p_msg_recv.get_msg()
         for callback in self.callbacks:
             callback(msg)
+        self.notify_new_data()
 
     def add_callback(self, callable: Callable):
-        self.callbacks.append(callable)
+        self.callbacks.append(
+            profile_callable("datasource", callable_name(callable), callable)
+        )
@@ -127,6 +127,7 @@ class RemoteControlProxyDatasource(DataSourceSingleton):
             elif call_type is PyroRemoteCallType.attribute_access:
                 out = getattr(self.visualiser, msg)
 
+            self.notify_new_data()
             await self.queue_io.output_queue.coro_put(out)
             # break
 
@@ -4,6 +4,8 @@ from typing import Callable
 import rosgraph
 import rospy
 
+from easy_visualiser.profiler import profile
+
 from . import DataSourceSingleton
 
 ros_master_url = os.environ["ROS_MASTER_URI"]
@@ -56,7 +58,13 @@ class RosComm(DataSourceSingleton):
     def __subscribe(self, datapack):
         # this is the actual subscribe function, without storing things in it
         topic, msg_type, callback = datapack
-        self.subscribers.append(rospy.Subscriber(topic, msg_type, callback))
+
+        def _callback(msg):
+            with profile("datasource", topic):
+                callback(msg)
+            self.notify_new_data()
+
+        self.subscribers.append(rospy.Subscriber(topic, msg_type, _callback))
 
     def subscribe(self, topic: str, msg_type, callback: Callable):
         datapack = (topic, msg_type, callback)
@@ -6,6 +6,7 @@ import numpy as np
 from rclpy.executors import SingleThreadedExecutor
 from rclpy.node import Node
 
+from easy_visualiser.profiler import profile
 from easy_visualiser.utils import throttle
 
 from . import DataSourceSingleton
@@ -58,8 +59,18 @@ class Ros2Comm(DataSourceSingleton):
 
     def __subscribe(self, datapack):
         # this is the actual subscribe function, without storing things in it
-        args, kwargs = datapack
-        self.subscribers.append(self.ros_interface.create_subscription(*args, **kwargs))
+        (msg_type, topic, callback, qos_profile), kwargs = datapack
+
+        def _callback(msg):
+            with profile("datasource", topic):
+                callback(msg)
+            self.notify_new_data()
+
+        self.subscribers.append(
+            self.ros_interface.create_subscription(
+                msg_type, topic, _callback, qos_profile, **kwargs
+            )
+        )
 
     def subscribe(
         self,
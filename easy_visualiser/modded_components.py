@@ -76,13 +76,35 @@ class LockedPanZoomCamera(PanZoomCamera):
         return
 
 
+def grown_capacity(size: int, growth: float = 1.5) -> int:
+    """
+    The capacity to reserve for `size` elements, with some head room such that a
+    growing container only gets reallocated a logarithmic number of times.
+    """
+    return max(int(size * growth), 16)
+
+
 class MarkerWithModifiablePos(visuals.Markers):
     """
     This visual marker can speed-up / avoid overhead from set_data via only
     updating the necessary components.
+
+    It can also reserve a capacity larger than the number of points, such that
+    the number of (visible) points can change without reallocating the vertex
+    buffer. The padding slots are hidden (zero size and fully transparent).
+
+    Updates only mark the rows they changed as dirty. Right before drawing, the
+    dirty rows are coalesced into ranges, and only those get uploaded.
     """
 
     _had_set_data = False
+    # number of visible points, i.e. the rest of the rows are hidden padding
+    _num_visible = 0
+    _template_row = None
+    # (starts, stops) of the rows that need to be uploaded before the next draw
+    _dirty_rows = None
+    # dirty rows that are at most this far apart get uploaded as one range
+    dirty_rows_merge_gap = 64
 
     @overload
     def __init__(
@@ -113,12 +135,19 @@ class MarkerWithModifiablePos(visuals.Markers):
         face_color="white",
         symbol=None,
         scaling=None,
+        capacity=None,
     ):
         ...
 
-    def set_data(self, *args, **kwargs):
+    def set_data(self, *args, capacity: int = None, **kwargs):
         super().set_data(*args, **kwargs)
         self._had_set_data = True
+        self._num_visible = 0 if self._data is None else len(self._data)
+        if self._num_visible > 0:
+            # new points (when growing within the capacity) are styled like this
+            self._template_row = self._data[0].copy()
+        if capacity is not None and capacity > self._num_visible > 0:
+            self.__reserve(capacity)
 
     @property
     def had_set_data(self) -> bool:
@@ -127,7 +156,131 @@ class MarkerWithModifiablePos(visuals.Markers):
     def num_points(self):
         if self._data is None:
             return 0
-        return self._data["a_position"].shape[0]
+        return self._num_visible
+
+    def positions(self) -> np.ndarray:
+        """The positions of the visible points (as a view)."""
+        if self._data is None:
+            return np.empty((0, 3), dtype=np.float32)
+        return self._data["a_position"][: self._num_visible]
+
+    def capacity(self) -> int:
+        if self._data is None:
+            return 0
+        return self._data.shape[0]
+
+    def __reserve(self, capacity: int):
+        """Reallocate the vertex buffer, with hidden padding up to the capacity."""
+        data = np.zeros(capacity, dtype=self._data.dtype)
+        data[: self._num_visible] = self._data[: self._num_visible]
+        self.__hide(data[self._num_visible :])
+        # re-uploads, and re-binds the attributes to the new buffer
+        self._upload_data({name: data[name] for name in data.dtype.names})
+
+    @staticmethod
+    def __hide(rows: np.ndarray):
+        rows["a_size"] = 0
+        rows["a_edgewidth"] = 0
+        rows["a_fg_color"] = 0
+        rows["a_bg_color"] = 0
+
+    def __set_num_visible(self, num: int) -> slice:
+        """Shows or hides the rows at the tail, and returns the rows it changed."""
+        if num > self.capacity():
+            raise ValueError(
+                f"Cannot show {num} points with a capacity of {self.capacity()}"
+            )
+        old = self._num_visible
+        if num > old:
+            self._data[old:num] = self._template_row
+        elif num < old:
+            self.__hide(self._data[num:old])
+        self._num_visible = num
+        return slice(min(old, num), max(old, num))
+
+    def _compute_bounds(self, axis, view):
+        if self._data is None or self._num_visible == 0:
+            return None
+        pos = self._data["a_position"][: self._num_visible, axis]
+        return pos.min(), pos.max()
+
+    def _upload_data(self, data_dict):
+        super()._upload_data(data_dict)
+        # everything had just been uploaded
+        self._dirty_rows = None
+
+    def _prepare_draw(self, view):
+        self.upload_dirty_rows()
+        return super()._prepare_draw(view)
+
+    def __mark_dirty(self, starts: np.ndarray, stops: np.ndarray):
+        if self._dirty_rows is not None:
+            starts = np.concatenate([self._dirty_rows[0], starts])
+            stops = np.concatenate([self._dirty_rows[1], stops])
+        self._dirty_rows = self.__coalesce(starts, stops)
+        self.update()
+
+    def __coalesce(self, starts: np.ndarray, stops: np.ndarray):
+        """Merges the overlapping (or nearby) row ranges."""
+        order = np.argsort(starts, kind="stable")
+        starts, stops = starts[order], np.maximum.accumulate(stops[order])
+        new_range = starts[1:] > stops[:-1] + self.dirty_rows_merge_gap
+        return (
+            starts[np.r_[True, new_range]],
+            stops[np.r_[new_range, True]],
+        )
+
+    def upload_dirty_rows(self) -> int:
+        """Uploads the rows that had changed. Returns the number of uploaded rows."""
+        if self._dirty_rows is None or self._data is None:
+            return 0
+        uploaded = 0
+        for start, stop in zip(*self._dirty_rows):
+            self._vbo.set_subdata(self._data[start:stop], offset=int(start))
+            uploaded += stop - start
+        self._dirty_rows = None
+        return int(uploaded)
+
+    def update_rows(
+        self,
+        rows,
+        *,
+        pos: np.ndarray = None,
+        colors: np.ndarray = None,
+        size: float = None,
+    ):
+        """
+        Updates the given components of some of the points, where `rows` is a
+        slice or an array of indices. Only the changed rows get uploaded.
+        """
+        self.__update_guard()
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self._num_visible)
+            # never touch the hidden padding
+            rows = slice(start, stop) if step == 1 else np.arange(start, stop, step)
+        if isinstance(rows, slice):
+            starts, stops = np.array([start]), np.array([max(start, stop)])
+        else:
+            rows = np.asarray(rows, dtype=np.intp)
+            if rows.size == 0:
+                return
+            if rows.min() < 0 or rows.max() >= self._num_visible:
+                raise IndexError(
+                    f"Rows out of range for {self._num_visible} visible points"
+                )
+            # contiguous runs of the (sorted) indices
+            runs = np.unique(rows)
+            breaks = np.flatnonzero(np.diff(runs) > 1)
+            starts = runs[np.r_[0, breaks + 1]]
+            stops = runs[np.r_[breaks, len(runs) - 1]] + 1
+        if pos is not None:
+            self._data["a_position"][rows, : pos.shape[1]] = pos
+            self._bounds_changed()
+        if colors is not None:
+            self._data["a_bg_color"][rows] = colors
+        if size is not None:
+            self._data["a_size"][rows] = size
+        self.__mark_dirty(starts, stops)
 
     def update_data(
         self,
@@ -136,22 +289,140 @@ class MarkerWithModifiablePos(visuals.Markers):
         colors: np.ndarray = None,
         size: float = None,
     ):
+        """
+        Updates the given components of the visible points. The number of points
+        of `pos` can differ from the current one, as long as it is within the
+        reserved capacity.
+        """
         self.__update_guard()
+        num = self._num_visible
+        changed = slice(0, 0)
         if pos is not None:
-            self._data["a_position"][:, : pos.shape[1]] = pos
+            changed = self.__set_num_visible(pos.shape[0])
+            num = self._num_visible
+            self._data["a_position"][:num, : pos.shape[1]] = pos
+            self._bounds_changed()
         if colors is not None:
-            self._data["a_bg_color"][:] = colors
+            self._data["a_bg_color"][:num] = colors
         if size is not None:
-            self._data["a_size"] = size
-        self.__update()
+            self._data["a_size"][:num] = size
+        self.__mark_dirty(np.array([0]), np.array([max(num, changed.stop)]))
+
+    def append_data(self, pos: np.ndarray):
+        """
+        Appends points (within the reserved capacity), which only uploads the new
+        rows.
+        """
+        self.__update_guard()
+        start = self._num_visible
+        self.__set_num_visible(start + pos.shape[0])
+        self._data["a_position"][start : self._num_visible, : pos.shape[1]] = pos
+        self._bounds_changed()
+        self.__mark_dirty(np.array([start]), np.array([self._num_visible]))
 
     def __update_guard(self):
         """Must have an initial set_data before first usage"""
         if not self.had_set_data:
             raise RuntimeError("marker data had not been set yet!")
 
-    def __update(self):
-        """Trigger update on opengl"""
-        self._vbo.set_data(self._data)
-        # self.shared_program.bind(self.points._vbo)
+
+class StreamingLine(visuals.Line):
+    """
+    A line strip that only gets appended to. It keeps the latest `capacity`
+    vertices in a ring buffer (both on the cpu and on the gpu), such that
+    appending only uploads the new vertices and the few segments around them.
+    Hence, its cost does not grow with the length of the history.
+
+    Segment `i` joins the vertex in slot `i` to the next slot. Unused segments, and
+    the one that would join the newest vertex to the oldest, are collapsed.
+    """
+
+    _capacity = 0
+    # slot of the next vertex
+    _head = 0
+    _count = 0
+    _ring = None
+    _segments = None
+
+    def __init__(self, capacity: int, **kwargs):
+        if capacity < 2:
+            raise ValueError(f"Capacity must be at least 2, but got {capacity}")
+        self._capacity = capacity
+        self._ring = np.zeros((capacity, 3), dtype=np.float32)
+        self._segments = np.repeat(np.arange(capacity, dtype=np.uint32)[:, None], 2, 1)
+        super().__init__(pos=self._ring, connect=self._segments, method="gl", **kwargs)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def num_vertices(self) -> int:
+        return self._count
+
+    def positions(self) -> np.ndarray:
+        """The vertices, from the oldest to the newest (as a copy)."""
+        return np.roll(self._ring, -self._head, axis=0)[self._capacity - self._count :]
+
+    def clear(self):
+        self._head = self._count = 0
+        self._segments[:, 1] = self._segments[:, 0]
+        # the next draw re-uploads everything
+        self.set_data(pos=self._ring, connect=self._segments)
+
+    def append(self, pos: np.ndarray):
+        pos = np.asarray(pos, dtype=np.float32)
+        pos = pos.reshape(-1, pos.shape[-1])[-self._capacity :]
+        num = pos.shape[0]
+        if num == 0:
+            return
+        capacity = self._capacity
+        slots = (self._head + np.arange(num)) % capacity
+        self._ring[slots, : pos.shape[1]] = pos
+        self._ring[slots, pos.shape[1] :] = 0
+
+        # join each new vertex to the one before it, and the newest to nothing
+        previous = (slots - 1) % capacity
+        if self._count == 0:
+            previous = previous[1:]
+        self._segments[previous, 1] = (previous + 1) % capacity
+        self._segments[slots[-1], 1] = slots[-1]
+
+        first_changed_segment = self._head - 1 if self._count > 0 else self._head
+        self.__upload(self._head, num, first_changed_segment)
+        self._head = (self._head + num) % capacity
+        self._count = min(self._count + num, capacity)
+        self._bounds = None
         self.update()
+
+    def __ranges(self, start: int, num: int):
+        """The (at most two) contiguous ranges of `num` slots from `start`."""
+        start %= self._capacity
+        stop = start + num
+        if stop <= self._capacity:
+            return [(start, stop)]
+        return [(start, self._capacity), (0, stop - self._capacity)]
+
+    def __upload(self, first_slot: int, num: int, first_segment: int):
+        gl_visual = self._line_visual
+        if gl_visual is None:
+            return
+        # until the first draw, everything is pending to be uploaded anyway
+        if not self._changed["pos"]:
+            for start, stop in self.__ranges(first_slot, num):
+                gl_visual._pos_vbo.set_subdata(self._ring[start:stop], offset=start)
+        if not self._changed["connect"]:
+            num_segments = first_slot + num - first_segment
+            for start, stop in self.__ranges(first_segment, num_segments):
+                # the offset of an index buffer is in number of indices
+                gl_visual._connect_ibo.set_subdata(
+                    self._segments[start:stop], offset=2 * start
+                )
+
+    def _compute_bounds(self, axis, view):
+        if self._count == 0:
+            return None
+        if self._bounds is None:
+            # slots are filled from the start, until it wraps around
+            used = self._ring[: self._count]
+            self._bounds = list(zip(used.min(0), used.max(0)))
+        return self._bounds[axis]
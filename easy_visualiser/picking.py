@@ -0,0 +1,140 @@
+import dataclasses
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+import numpy as np
+from vispy import app
+
+from .plugin_capability import PickableMixin, PluginState
+
+if TYPE_CHECKING:
+    from .visualiser import Visualiser
+
+
+@dataclasses.dataclass
+class PickResult:
+    plugin: PickableMixin
+    # index of the point within the plugin's `pickable_points`
+    index: int
+    # in the coordinates of the plugin's visual
+    position: np.ndarray
+    # depth (in normalised device coordinates) on the canvas, smaller is closer
+    depth: float
+
+
+def _unproject(transform, canvas_positions: np.ndarray, depths: np.ndarray):
+    """Maps canvas positions, at the given (normalised) depths, to the visual."""
+    pos = np.column_stack(
+        [canvas_positions, depths, np.ones(len(canvas_positions))]
+    ).astype(np.float64)
+    pos = transform.map(pos)
+    return pos[:, :3] / pos[:, 3:]
+
+
+class PickingService:
+    """
+    Picks the point under the mouse, out of all the (turned on) pickable
+    plugins. Each plugin keeps a spatial index over its points, so a pick only
+    looks at the points near the ray through the mouse.
+
+    Hover callbacks are driven by the canvas' mouse moves, which get
+    rate-limited to `max_rate` picks per second (the latest position is picked
+    once the rate allows it).
+    """
+
+    def __init__(
+        self, visualiser: "Visualiser", radius: float = 5, max_rate: float = 30
+    ):
+        self.visualiser = visualiser
+        # in pixels
+        self.radius = radius
+        self.max_rate = max_rate
+        self._hover_callbacks: List[Callable[[Optional[PickResult]], None]] = []
+        self._hovered: Optional[Tuple[PickableMixin, int]] = None
+        self._pending_pos = None
+        self._next_pick_time = 0.0
+        self._timer: Optional[app.Timer] = None
+
+    def pick(
+        self, canvas_pos: Tuple[float, float], radius: Optional[float] = None
+    ) -> Optional[PickResult]:
+        """The closest point within `radius` pixels of the canvas position."""
+        if radius is None:
+            radius = self.radius
+        best = None
+        for plugin in self.visualiser.plugins:
+            if not isinstance(plugin, PickableMixin):
+                continue
+            if plugin.state is not PluginState.ON:
+                continue
+            result = self.__pick_plugin(plugin, canvas_pos, radius)
+            if result is not None and (best is None or result.depth < best.depth):
+                best = result
+        return best
+
+    def __pick_plugin(
+        self, plugin: PickableMixin, canvas_pos, radius: float
+    ) -> Optional[PickResult]:
+        visual = plugin.pickable_visual
+        if visual is None or not visual.visible:
+            return None
+        index = plugin.pick_index
+        if index is None:
+            return None
+        transform = visual.get_transform("canvas", "visual")
+        # the ray through the position, and the cone of the pixels around it
+        x, y = canvas_pos[0], canvas_pos[1]
+        near, far, offset_near, offset_far = _unproject(
+            transform,
+            np.array([[x, y], [x, y], [x + radius, y], [x + radius, y]]),
+            np.array([0, 1, 0, 1]),
+        )
+        length = np.linalg.norm(far - near)
+        near_radius = np.linalg.norm(offset_near - near)
+        far_radius = np.linalg.norm(offset_far - far)
+        found = index.nearest_to_ray(
+            near, far - near, near_radius, (far_radius - near_radius) / length
+        )
+        if found is None:
+            return None
+        position = index.points[found[0]]
+        depth = transform.imap(np.r_[position, 1])
+        return PickResult(
+            plugin=plugin,
+            index=found[0],
+            position=np.array(position),
+            depth=float(depth[2] / depth[3]),
+        )
+
+    def add_hover_callback(self, callback: Callable[[Optional[PickResult]], None]):
+        """
+        Call `callback` whenever the point under the mouse changes, with the new
+        pick (or None once nothing is under the mouse any more).
+        """
+        if not self._hover_callbacks:
+            self.visualiser.canvas.events.mouse_move.connect(self._on_mouse_move)
+        self._hover_callbacks.append(callback)
+
+    def _on_mouse_move(self, event):
+        self._pending_pos = event.pos
+        now = time.monotonic()
+        if now >= self._next_pick_time:
+            self._process_pending()
+        elif self._timer is None or not self._timer.running:
+            # picks the latest position once the rate allows it
+            if self._timer is None:
+                self._timer = app.Timer(connect=self._process_pending, iterations=1)
+            self._timer.start(interval=self._next_pick_time - now, iterations=1)
+
+    def _process_pending(self, event=None):
+        if self._pending_pos is None:
+            return
+        canvas_pos, self._pending_pos = self._pending_pos, None
+        self._next_pick_time = time.monotonic() + 1 / self.max_rate
+        result = self.pick(canvas_pos)
+        hovered = None if result is None else (result.plugin, result.index)
+        if hovered == self._hovered:
+            return
+        self._hovered = hovered
+        for callback in self._hover_callbacks:
+            callback(result)
@@ -3,10 +3,21 @@ import enum
 import os
 import sys
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy as np
-from vispy.scene import Widget
+from vispy.scene import Node, Widget
+
+from .profiler import profile
 
 if sys.version_info >= (3, 8):
     from typing import Literal  # pylint: disable=no-name-in-module
@@ -17,8 +28,11 @@ else:
 if TYPE_CHECKING:
     from easy_visualiser.plugins import VisualisablePlugin
 
+    from .file_watcher import WatchedFile
     from .key_mapping import Key, Mapping
     from .modal_control import ModalControl
+    from .utils.picking import PointIndex
+    from .visualiser import Visualiser
 
 
 class PluginState(enum.Enum):
@@ -179,9 +193,33 @@ class GuardableMixin:
 
 class FileModificationGuardableMixin(GuardableMixin):
     _last_modify_time: Optional[float] = None
+    _last_seen_version: Optional[int] = None
+    _watched_file: Optional["WatchedFile"] = None
     args: argparse.Namespace
+    # no need to check the file's modification time on every frame
+    update_rate: Optional[float] = 5
+
+    def on_initialisation(self, visualiser: "Visualiser"):
+        super().on_initialisation(visualiser)
+        # the shared file watcher keeps track of our target file (and wakes the
+        # event driven loop whenever it changes)
+        self._watched_file = visualiser.watch_file(self.target_file)
 
     def on_update_guard(self) -> bool:
+        watched = self._watched_file
+        if watched is not None:
+            # no syscall needed, the watcher had already seen any change
+            if not watched.exists:
+                return False
+            if (
+                self._last_modify_time is not None
+                and self._last_seen_version == watched.version
+            ):
+                return False
+            self._last_seen_version = watched.version
+            self._last_modify_time = watched.mtime
+            return super().on_update_guard()
+
         if os.path.exists(self.target_file):
             _mtime = os.path.getmtime(self.target_file)
             if self._last_modify_time is None or (self._last_modify_time < _mtime):
@@ -211,11 +249,97 @@ class CallableAndFileModificationGuardableMixin(FileModificationGuardableMixin,
 
 
 class IntervalUpdatableMixin:
+    # target number of updates per second. None to update on every frame.
+    update_rate: Optional[float] = None
+
     @abstractmethod
     def on_update(self) -> None:
         pass
 
 
+class BackgroundPreparableMixin:
+    """
+    Splits an update into `prepare`, which does the heavy data preparation on the
+    visualiser's worker pool (and hence must not touch any visual), and `apply`,
+    which receives the prepared result on the gl (main) thread.
+
+    Only the result of the latest request gets applied; older ones are cancelled
+    or discarded.
+    """
+
+    visualiser: "Visualiser"
+    name: str
+
+    def request_prepare(self, version: Hashable = None):
+        """
+        Prepare in the background, then apply. If `version` is given and the same
+        version is already being prepared, this is a no-op.
+        """
+        return self.visualiser.workers.submit(
+            self, self.__prepare, self.__apply, version=version
+        )
+
+    def cancel_prepare(self):
+        self.visualiser.workers.cancel(self)
+
+    @property
+    def preparing(self) -> bool:
+        return self.visualiser.workers.is_preparing(self)
+
+    def __prepare(self) -> Any:
+        with profile("prepare", self.name):
+            return self.prepare()
+
+    def __apply(self, prepared: Any):
+        with profile("apply", self.name):
+            self.apply(prepared)
+
+    @abstractmethod
+    def prepare(self) -> Any:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def apply(self, prepared: Any) -> None:
+        raise NotImplementedError()
+
+
+class PickableMixin:
+    """
+    Plugins whose points (e.g. markers, line vertices or mesh vertices) can be
+    picked with the mouse, through the visualiser's picking service. The spatial
+    index over the points is only built on the first pick after the data had
+    changed, so plugins just need to call `invalidate_pick_index` on new data.
+    """
+
+    name: str
+    _pick_index: Optional["PointIndex"] = None
+
+    @property
+    @abstractmethod
+    def pickable_visual(self) -> Optional["Node"]:
+        """The visual that the points are in the coordinates of."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def pickable_points(self) -> Optional[np.ndarray]:
+        raise NotImplementedError()
+
+    def invalidate_pick_index(self):
+        self._pick_index = None
+
+    @property
+    def pick_index(self) -> Optional["PointIndex"]:
+        if self._pick_index is None:
+            points = self.pickable_points()
+            if points is None or len(points) == 0:
+                return None
+            from .utils.picking import PointIndex
+
+            with profile("build_pick_index", self.name):
+                self._pick_index = PointIndex(points)
+        return self._pick_index
+
+
 class WidgetOption(TypedDict, total=False):
     widget: Widget
     row: int
@@ -1,16 +1,50 @@
+from typing import TYPE_CHECKING
+
+from easy_visualiser.utils.lazy_import import LazyRegistry
+
 from .abstract_visualisable_plugin import (
     VisualisablePlugin,
     VisualisablePluginInitialisationError,
 )
-from .functional_zscaler import AxisScalerPlugin
-from .visualisable_2D_lineplot import Visualisable2DLinePlot
-from .visualisable_axis import VisualisablePrincipleAxis
-from .visualisable_gridlines import VisualisableGridLines
-from .visualisable_image import VisualisableImage
-from .visualisable_message_board import (
-    VisualisableAutoStatusBar,
-    VisualisableMessageBoard,
-    VisualisableStatusBar,
-)
-from .visualisable_points import VisualisablePoints
-from .visualisable_volumeplot import VisualisableVolumePlot
+
+# plugins are only imported when they are first accessed
+_plugins = {
+    "AxisScalerPlugin": "functional_zscaler",
+    "Visualisable2DLinePlot": "visualisable_2D_lineplot",
+    "VisualisablePrincipleAxis": "visualisable_axis",
+    "VisualisableGridLines": "visualisable_gridlines",
+    "VisualisableImage": "visualisable_image",
+    "VisualisableLODPoints": "visualisable_lod_points",
+    "VisualisableAutoStatusBar": "visualisable_message_board",
+    "VisualisableMessageBoard": "visualisable_message_board",
+    "VisualisableStatusBar": "visualisable_message_board",
+    "VisualisablePoints": "visualisable_points",
+    "VisualisableProfilerOverlay": "visualisable_profiler_overlay",
+    "VisualisableVolumePlot": "visualisable_volumeplot",
+    "ext": "ext",
+}
+
+if TYPE_CHECKING:
+    from . import ext
+    from .functional_zscaler import AxisScalerPlugin
+    from .visualisable_2D_lineplot import Visualisable2DLinePlot
+    from .visualisable_axis import VisualisablePrincipleAxis
+    from .visualisable_gridlines import VisualisableGridLines
+    from .visualisable_image import VisualisableImage
+    from .visualisable_lod_points import VisualisableLODPoints
+    from .visualisable_message_board import (
+        VisualisableAutoStatusBar,
+        VisualisableMessageBoard,
+        VisualisableStatusBar,
+    )
+    from .visualisable_points import VisualisablePoints
+    from .visualisable_profiler_overlay import VisualisableProfilerOverlay
+    from .visualisable_volumeplot import VisualisableVolumePlot
+
+__all__ = ["VisualisablePlugin", "VisualisablePluginInitialisationError"] + [
+    name for name in _plugins if name != "ext"
+]
+
+_registry = LazyRegistry(__name__, globals(), _plugins)
+__getattr__ = _registry.getattr
+__dir__ = _registry.dir
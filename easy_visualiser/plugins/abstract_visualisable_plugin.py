@@ -9,6 +9,7 @@ from easy_visualiser.plugin_capability import (
     IntervalUpdatableMixin,
     PluginState,
 )
+from easy_visualiser.profiler import profile
 from easy_visualiser.utils import no_except
 
 if TYPE_CHECKING:
@@ -72,10 +73,12 @@ class VisualisablePlugin(ABC):
         if not isinstance(self, IntervalUpdatableMixin):
             return
         if not force and isinstance(self, GuardableMixin):
-            if not self.on_update_guard():
-                return
+            with profile("on_update_guard", self.name):
+                if not self.on_update_guard():
+                    return
 
-        self.on_update()
+        with profile("on_update", self.name):
+            self.on_update()
 
     def construct_plugin(self) -> bool:
         self.state = PluginState.ON
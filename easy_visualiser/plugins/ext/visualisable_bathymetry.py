@@ -1,19 +1,26 @@
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 from scipy.interpolate import NearestNDInterpolator, griddata
 from scipy.spatial import cKDTree
 from vispy.color import get_colormap
+from vispy.scene import Node
 
 from easy_visualiser.modal_control import ModalControl
 from easy_visualiser.plugin_capability import (
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     IntervalUpdatableMixin,
+    PickableMixin,
+    PluginState,
     ToggleableMixin,
 )
 from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.terrain import TiledTerrain
 from easy_visualiser.utils import ToggleableBool
+from easy_visualiser.utils.artifact_cache import ArtifactCache
 from easy_visualiser.utils.dummy import DUMMY_AXIS_VAL
+from easy_visualiser.utils.terrain import GridPyramid
 from easy_visualiser.visuals.gridmesh import FixedGridMesh
 
 
@@ -56,9 +63,11 @@ def estimate_grid_resolution(kd_tree, bathy_points: np.ndarray) -> float:
 
 
 class VisualisableBathy(
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     ToggleableMixin,
     IntervalUpdatableMixin,
+    PickableMixin,
     VisualisablePlugin,
 ):
     bathy_mesh = None
@@ -73,8 +82,22 @@ class VisualisableBathy(
         bathy_colorscale_toggle: ToggleableBool,
         depth_datapath: str,
         only_display_actual_bathy: bool = True,
+        use_mesh_cache: bool = True,
+        tiled: bool = False,
+        tile_size: int = 64,
     ):
+        """
+        :param use_mesh_cache: cache the gridded mesh on disk (keyed by the
+            content of the soundings), such that the same survey never gets
+            re-gridded, even across restarts.
+        :param tiled: draw the grid as tiles whose detail follows the camera,
+            rather than as one mesh.
+        """
         super().__init__()
+        self.tiled = tiled
+        self.tile_size = tile_size
+        self.terrain: Optional[TiledTerrain] = None
+        self.mesh_cache = ArtifactCache.get_instance() if use_mesh_cache else None
         self.bathy_toggle = bathy_toggle
         self.bathy_colorscale_toggle = bathy_colorscale_toggle
         self.depth_datapath = depth_datapath
@@ -114,31 +137,33 @@ class VisualisableBathy(
 
     def construct_plugin(self) -> None:
         super().construct_plugin()
+        if self.tiled:
+            self.terrain = TiledTerrain(
+                self.visualiser,
+                self.visualiser.visual_parent,
+                tile_size=self.tile_size,
+                shading="smooth",
+                on_change=self.invalidate_pick_index,
+            )
+            return
         self.bathy_mesh = FixedGridMesh(
             # **data,
             xs=DUMMY_AXIS_VAL,
             ys=DUMMY_AXIS_VAL,
             zs=DUMMY_AXIS_VAL,
             shading="smooth",
+            # the far-field (if masked out) can be most of the grid
+            compact_vertices=True,
             # shading='flat',
             # shading=None,
             # color='blue',
             parent=self.visualiser.visual_parent,
         )
 
-    def __get_data(self) -> Dict:
-        bathymetry = np.load(self.target_file)
-
-        ###########################################
-        # cache interp
-        self.bathy_interp = NearestNDInterpolator(
-            list(zip(bathymetry[:, 0], bathymetry[:, 1])),
-            self.other_plugins.zscaler.scaler(bathymetry[:, 2]),
-        )
-        ###########################################
-
-        grid_size = max(100, int(bathymetry[:, 0].shape[0] ** 0.5) - 30)
-
+    def __build_grid(
+        self, bathymetry: np.ndarray, grid_size: int
+    ) -> Dict[str, np.ndarray]:
+        """Grids the raw soundings. This is the expensive part that gets cached."""
         xx, yy, zz = create_grid_mesh(
             bathymetry[:, 0], bathymetry[:, 1], bathymetry[:, 2], (grid_size, grid_size)
         )
@@ -164,16 +189,40 @@ class VisualisableBathy(
 
             xx[mask] = np.nan
             yy[mask] = np.nan
+        return dict(xs=xx, ys=yy, zs=zz)
+
+    def prepare(self) -> Dict:
+        """Loads the bathymetry and builds its grid mesh, on a worker thread."""
+        bathymetry = np.load(self.target_file)
+
+        grid_size = max(100, int(bathymetry[:, 0].shape[0] ** 0.5) - 30)
+
+        # the grid only depends on the soundings and how they are gridded, hence
+        # toggling the colour scale or changing the z scale never re-grids
+        grid = None
+        if self.mesh_cache is not None:
+            cache_key = self.mesh_cache.key(
+                bathymetry,
+                grid_size=grid_size,
+                only_display_actual_bathy=self._only_display_actual_bathy,
+                method="nearest",
+            )
+            grid = self.mesh_cache.get(cache_key)
+        if grid is None:
+            grid = self.__build_grid(bathymetry, grid_size)
+            if self.mesh_cache is not None:
+                self.mesh_cache.put(cache_key, grid)
+        xx, yy, zz = grid["xs"], grid["ys"], grid["zs"]
 
         zz = self.other_plugins.zscaler.scaler(zz)
 
         is_land_mask = zz >= 0
 
-        self.last_min_max_pos = np.empty((2, 3), dtype=np.float)
-        self.last_min_max_pos[0, :] = bathymetry.min(0)  # cache
-        self.last_min_max_pos[0, 2] = zz.min()
-        self.last_min_max_pos[1, :] = bathymetry.max(0)  # cache
-        self.last_min_max_pos[1, 2] = zz.max()
+        last_min_max_pos = np.empty((2, 3), dtype=float)
+        last_min_max_pos[0, :] = bathymetry.min(0)  # cache
+        last_min_max_pos[0, 2] = zz.min()
+        last_min_max_pos[1, :] = bathymetry.max(0)  # cache
+        last_min_max_pos[1, 2] = zz.max()
 
         data = dict(
             xs=xx,
@@ -186,21 +235,83 @@ class VisualisableBathy(
 
             data["colors"] = colours.reshape(grid_size, grid_size, 4)
         else:
-            data["colors"] = np.empty((grid_size, grid_size, 4), dtype=np.float)
+            data["colors"] = np.empty((grid_size, grid_size, 4), dtype=float)
             data["colors"][~is_land_mask] = self.seabed_colour
             data["colors"][is_land_mask] = self.land_colour
 
-        return data
+        prepared = dict(
+            mesh_data=data,
+            bathymetry=bathymetry,
+            last_min_max_pos=last_min_max_pos,
+        )
+        if self.tiled:
+            prepared["pyramid"] = GridPyramid(**data)
+        return prepared
+
+    def __build_interp(self, bathymetry: np.ndarray) -> NearestNDInterpolator:
+        return NearestNDInterpolator(
+            list(zip(bathymetry[:, 0], bathymetry[:, 1])),
+            self.other_plugins.zscaler.scaler(bathymetry[:, 2]),
+        )
+
+    def __set_interp(self, bathy_interp: NearestNDInterpolator):
+        self.bathy_interp = bathy_interp
+        if "koz" in self.other_plugins:
+            # the keep out zones might had been drawn down to their full depth, so
+            # rebuild them (once) to clip them to the seabed
+            self.other_plugins.koz._last_modify_time = None
+        self.visualiser.request_update()
+
+    def apply(self, prepared: Dict):
+        if self.state is not PluginState.ON:
+            # got turned off while preparing
+            return
+        self.last_min_max_pos = prepared["last_min_max_pos"]
+        if self.terrain is not None:
+            self.terrain.set_pyramid(prepared["pyramid"])
+            self.terrain.node.visible = True
+        else:
+            self.bathy_mesh.set_data(**prepared["mesh_data"])
+        self.invalidate_pick_index()
+        # the interpolator is only used by other plugins (e.g. the keep out zones),
+        # so build it afterwards, such that the mesh shows up as soon as possible
+        bathymetry = prepared["bathymetry"]
+        self.visualiser.workers.submit(
+            (self, "interp"),
+            lambda: self.__build_interp(bathymetry),
+            self.__set_interp,
+        )
+        if not self.had_set_range:
+            if self.terrain is not None:
+                # (the tiles are not built yet)
+                self.set_range(**dict(zip("xyz", self.last_min_max_pos.T)))
+            else:
+                self.set_range()
+
+    @property
+    def pickable_visual(self) -> Union[FixedGridMesh, Node]:
+        if self.terrain is not None:
+            return self.terrain.node
+        return self.bathy_mesh
+
+    def pickable_points(self) -> np.ndarray:
+        if self.terrain is not None:
+            return self.terrain.points()
+        return self.bathy_mesh.mesh_data.get_vertices()
 
     def turn_on_plugin(self):
         if not super().turn_on_plugin():
             return False
-        self.bathy_mesh.set_data(**self.__get_data())
+        self.request_prepare()
         return True
 
     def turn_off_plugin(self):
         if not super().turn_off_plugin():
             return False
+        self.cancel_prepare()
+        if self.terrain is not None:
+            self.terrain.node.visible = False
+            return True
         if not self.bathy_colorscale_toggle:
             self.bathy_mesh._GridMeshVisual__meshdata._vertex_colors = None
             self.bathy_mesh._GridMeshVisual__meshdata._vertex_colors_indexed_by_faces = (
@@ -214,6 +325,7 @@ class VisualisableBathy(
         return True
 
     def on_update(self):
+        # the mesh gets updated (and ranged) once the data is prepared
         self.turn_on_plugin()
 
         # if not self.bathy_colorscale_toggle:
@@ -221,5 +333,3 @@ class VisualisableBathy(
         #     self.bathy_mesh._GridMeshVisual__meshdata._vertex_colors_indexed_by_faces = (
         #         None
         #     )
-        if not self.had_set_range:
-            self.set_range()
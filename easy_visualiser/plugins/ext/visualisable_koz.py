@@ -1,5 +1,5 @@
 import zipfile
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 from scipy.interpolate import griddata
@@ -77,120 +77,66 @@ class VisualisableKOZ(
         self.keepout_zone_mesh.set_gl_state("translucent")
 
     def on_update(self):
-        vertices = []
-        faces = []
-
         try:
-            keepout_zones = self.__get_keepout_zones(
-                self.other_plugins.bathymetry.bathy_interp
-            )
-
+            zones_points, depths = self.__get_keepout_zones()
         except zipfile.BadZipFile as e:
             print(e)
-            keepout_zones = []
-
-        for keepout_zone in keepout_zones:
-            # start new index for faces according to current vertices list length
-            _faces = np.array(list(keepout_zone.faces)) + len(vertices)
-
-            vertices.extend(list(keepout_zone.vertices))
-            faces.extend(_faces)
-        if len(keepout_zones) > 0:
-            vertices = np.array(vertices)
-            _faces = np.array(_faces)
-            self.other_plugins.zscaler.scaler(vertices)
-
-            self.keepout_zone_mesh.set_data(
-                vertices=vertices,
-                faces=np.array(faces),
-            )
-
-    def __get_keepout_zones(self, bathy_interp):
-        pdata = np.load(self.target_file)
+            return
 
-        return [
-            KeepoutZone(
-                depth=self.other_plugins.zscaler.scaler(
-                    pdata["keepout_zones_depths"][i]
-                ),
-                points=pdata[f"keepout_zones_{i}"],
-                bathy_interp=bathy_interp,
+        if len(zones_points) > 0:
+            vertices, faces = build_keepout_zone_walls(
+                zones_points, depths, self.other_plugins.bathymetry.bathy_interp
             )
-            for i in range(len(pdata["keepout_zones_depths"]))
-        ]
-
-
-class Wall:
-    def __init__(self, xy_start, xy_goal, depth, bathy_interp):
-        self.xy_start = xy_start
-        self.xy_goal = xy_goal
-        self.depth = depth
-        self.start_idx = 0
-        self.bathy_interp = bathy_interp
-
-    def get_vertices(self):
-        depth1 = -self.depth
-        depth2 = -self.depth
-
-        if self.bathy_interp is not None:
-            # cut it off at the bathymetry
-            depth1 = max(self.bathy_interp(*self.xy_start), -self.depth)
-            depth2 = max(self.bathy_interp(*self.xy_goal), -self.depth)
-
-        return (
-            (*self.xy_start, 0),
-            (*self.xy_start, depth1),
-            (*self.xy_goal, 0),
-            (*self.xy_goal, depth2),
-        )
-
-    def at(self, idx):
-        return self.start_idx + idx
-
-    def get_faces(self):
-        return (self.at(0), self.at(1), self.at(2)), (
-            self.at(1),
-            self.at(2),
-            self.at(3),
-        )
-
+            self.keepout_zone_mesh.set_data(vertices=vertices, faces=faces)
 
-class KeepoutZone:
-    def __init__(self, depth, points, bathy_interp) -> None:
-        self.walls = []
-        self.depth = depth
-
-        _start_idx = 0
-        for i in range(len(points)):
-            w = Wall(
-                points[i],
-                points[(i + 1) % len(points)],
-                depth=self.depth,
-                bathy_interp=bathy_interp,
-            )
-            w.start_idx = _start_idx
-            _start_idx += len(w.get_vertices())
-            self.walls.append(w)
-
-    @property
-    def vertices(self):
-        for w in self.walls:
-            yield from w.get_vertices()
-
-    @property
-    def faces(self):
-        for w in self.walls:
-            yield from w.get_faces()
-
-    @property
-    def depth(self):
-        return self.__depth
-
-    @depth.setter
-    def depth(self, value):
-        self.__depth = value
-        for w in self.walls:
-            w.depth = value
+    def __get_keepout_zones(self) -> Tuple[List[np.ndarray], np.ndarray]:
+        pdata = np.load(self.target_file)
 
-    def __repr__(self) -> str:
-        return f"{np.array([w.xy_start for w in self.walls])}"
+        depths = self.other_plugins.zscaler.scaler(pdata["keepout_zones_depths"])
+        return [pdata[f"keepout_zones_{i}"] for i in range(len(depths))], depths
+
+
+def build_keepout_zone_walls(
+    zones_points: List[np.ndarray],
+    depths: np.ndarray,
+    bathy_interp: Optional[Callable] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the walls of all the keep-out zones at once, and returns the
+    (vertices, faces) of the combined mesh.
+
+    Each edge of a zone's polygon becomes a wall, going from the surface down to
+    the zone's depth (or to the seabed, if that is shallower). A wall is made out
+    of 4 vertices (start top, start bottom, goal top, goal bottom) and 2 faces.
+    """
+    zones = [
+        (np.asarray(points, dtype=float).reshape(-1, 2), depth)
+        for points, depth in zip(zones_points, np.asarray(depths, dtype=float))
+        if len(points) > 0
+    ]
+    if len(zones) == 0:
+        return np.empty((0, 3)), np.empty((0, 3), dtype=np.uint32)
+
+    points = np.concatenate([points for points, _ in zones])
+    counts = np.array([len(points) for points, _ in zones])
+    offsets = np.cumsum(counts) - counts
+
+    bottom = np.repeat([-depth for _, depth in zones], counts)
+    if bathy_interp is not None:
+        # cut it off at the bathymetry (all zones' points in one query)
+        bottom = np.maximum(bathy_interp(points[:, 0], points[:, 1]), bottom)
+
+    # each point starts a wall that goes to the next point of its polygon
+    start = np.arange(len(points))
+    goal = start + 1
+    goal[offsets + counts - 1] = offsets
+
+    vertices = np.zeros((len(points), 4, 3))
+    vertices[:, 0, :2] = vertices[:, 1, :2] = points
+    vertices[:, 2, :2] = vertices[:, 3, :2] = points[goal]
+    vertices[:, 1, 2] = bottom
+    vertices[:, 3, 2] = bottom[goal]
+
+    first_vertex = 4 * start[:, None].astype(np.uint32)
+    faces = np.hstack([first_vertex + [0, 1, 2], first_vertex + [1, 2, 3]])
+    return vertices.reshape(-1, 3), faces.reshape(-1, 3).astype(np.uint32)
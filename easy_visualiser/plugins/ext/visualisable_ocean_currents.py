@@ -1,5 +1,4 @@
 import dataclasses
-import os
 from typing import Dict
 
 import numpy as np
@@ -10,6 +9,7 @@ from vispy.scene.visuals import Arrow
 from easy_visualiser.key_mapping import Key
 from easy_visualiser.modal_control import ModalControl
 from easy_visualiser.plugin_capability import (
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     IntervalUpdatableMixin,
     PluginState,
@@ -30,6 +30,7 @@ class CurrentData:
 
 
 class VisualisableOceanCurrent(
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     ToggleableMixin,
     IntervalUpdatableMixin,
@@ -87,6 +88,7 @@ class VisualisableOceanCurrent(
         self.__choices_size = default_choice_size
         self.__last_current_size = None
         self.__currents_data = None
+        self.__loaded_modify_time = None
 
     @property
     def viewing_index(self) -> slice:
@@ -173,10 +175,10 @@ class VisualisableOceanCurrent(
             if self.ocean_current_scale >= self.ocean_current_max_scale:
                 self.ocean_current_scale = 0
 
-        # only load data on demand
-        _mtime = os.path.getmtime(self.target_file)
-        if self.__currents_data is None or self._last_modify_time < _mtime:
+        # only load data on demand (which is normally prepared in the background)
+        if self.__currents_data is None:
             self.__currents_data = self.__get_subset_current_data()
+            self.__loaded_modify_time = self._last_modify_time
         currents_data = self.__currents_data
 
         pos = np.empty([currents_data["x"].shape[0] * 2, 3])
@@ -221,15 +223,41 @@ class VisualisableOceanCurrent(
         )
         return data
 
-    def turn_on_plugin(self):
-        if not super().turn_on_plugin():
-            return False
+    def prepare(self) -> Dict:
+        """Loads (a random subset of) the currents, on a worker thread."""
+        modify_time = self._last_modify_time
+        return dict(
+            currents_data=self.__get_subset_current_data(), modify_time=modify_time
+        )
+
+    def apply(self, prepared: Dict):
+        if self.state is not PluginState.ON:
+            # got turned off while preparing
+            return
+        self.__currents_data = prepared["currents_data"]
+        self.__loaded_modify_time = prepared["modify_time"]
+        self.__draw()
+
+    def __draw(self):
         _data = self.__get_data()
         arrow_color = _data.pop("arrow_color")
         self.currents.set_data(**_data)
         self.currents.arrow_color = arrow_color
         self.currents.visible = True
         self.animate_timer.start()
+
+    def turn_on_plugin(self):
+        if not super().turn_on_plugin():
+            return False
+        if (
+            self.__currents_data is None
+            or self.__loaded_modify_time != self._last_modify_time
+        ):
+            # (re)load in the background, while still animating the current ones
+            self.request_prepare(version=(self._last_modify_time, self.__choices_size))
+            if self.__currents_data is None:
+                return True
+        self.__draw()
         return True
 
     def turn_off_plugin(self):
@@ -241,6 +269,7 @@ class VisualisableOceanCurrent(
         #     arrows=DUMMY_ARROW,
         # )
         # self.currents.arrow_color = DUMMY_COLOUR
+        self.cancel_prepare()
         self.currents.visible = False
         self.animate_timer.stop()
         return True
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 from vispy import scene
@@ -7,8 +7,10 @@ from vispy.color import get_colormap
 from easy_visualiser.maths import mean_confidence_interval
 from easy_visualiser.modal_control import ModalControl
 from easy_visualiser.plugin_capability import (
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     IntervalUpdatableMixin,
+    PluginState,
     ToggleableMixin,
     WidgetsMixin,
 )
@@ -41,6 +43,7 @@ class SolutionLine:
 
 
 class VisualisablePlannerGraph(
+    BackgroundPreparableMixin,
     CallableAndFileModificationGuardableMixin,
     WidgetsMixin,
     ToggleableMixin,
@@ -153,7 +156,7 @@ class VisualisablePlannerGraph(
         self._last_modify_time = None
         self.update()
 
-    def __construct_graph(self, pos, edges, costs) -> None:
+    def __colour_graph(self, costs) -> Tuple[np.ndarray, Tuple[float, float]]:
         #################################################
         #################################################
 
@@ -185,9 +188,7 @@ class VisualisablePlannerGraph(
         #################################################
 
         colors = self.colormap.map(costs)  # [:-2]
-
-        self.lines.set_data(pos=pos, connect=edges, color=colors)
-        self.cbar_widget.clim = (_min, _max)
+        return colors, (_min, _max)
 
     def __construct_solution(self, solution_path) -> None:
         if not self.graph_solution_toggle:
@@ -199,18 +200,45 @@ class VisualisablePlannerGraph(
         else:
             self.fake_sol_lines.set_path([])
 
+    def prepare(self) -> Dict:
+        """Loads the graph and colours it by its costs, on a worker thread."""
+        pos, edges, solution_path, costs = self.get_latest_pdata()
+        prepared = dict(
+            pos=pos,
+            edges=edges,
+            solution_path=solution_path,
+            cost_index=self.cost_index,
+            colors=None,
+        )
+        if self.graph_toggle:
+            prepared["colors"], prepared["clim"] = self.__colour_graph(costs)
+        return prepared
+
+    def apply(self, prepared: Dict):
+        if self.state is not PluginState.ON:
+            # got turned off while preparing
+            return
+        cost_index = prepared["cost_index"]
+        self.cbar_widget.label = f"Cost {'all' if cost_index is None else cost_index}"
+        if prepared["colors"] is not None:
+            self.lines.set_data(
+                pos=prepared["pos"], connect=prepared["edges"], color=prepared["colors"]
+            )
+            self.cbar_widget.clim = prepared["clim"]
+        self.__construct_solution(prepared["solution_path"])
+        if not self.had_set_range:
+            self.set_range()
+
     def turn_on_plugin(self):
         if not super().turn_on_plugin():
             return False
-        pos, edges, solution_path, costs = self.get_latest_pdata()
-        if self.graph_toggle:
-            self.__construct_graph(pos, edges, costs)
-        self.__construct_solution(solution_path)
+        self.request_prepare()
         return True
 
     def turn_off_plugin(self):
         if not super().turn_off_plugin():
             return False
+        self.cancel_prepare()
         self.lines.set_data(pos=DUMMY_LINE, connect=DUMMY_CONNECT, color=DUMMY_COLOUR)
         self.cbar_widget.clim = (np.nan, np.nan)
 
@@ -218,9 +246,8 @@ class VisualisablePlannerGraph(
         return True
 
     def on_update(self):
+        # the graph gets updated (and ranged) once the data is prepared
         self.turn_on_plugin()
-        if not self.had_set_range:
-            self.set_range()
 
     def get_latest_pdata(self):
         pdata = np.load(self.target_file)
@@ -250,10 +277,6 @@ class VisualisablePlannerGraph(
         else:
             _target_costs = pdata["vertices_costs"][:, self.cost_index].copy()
 
-        self.cbar_widget.label = (
-            f"Cost {'all' if self.cost_index is None else self.cost_index}"
-        )
-
         # if start_markers is None:
         #     start_coor = []
         #     for idx in pdata["start_vertices_id"]:
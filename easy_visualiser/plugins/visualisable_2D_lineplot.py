@@ -14,7 +14,10 @@ from easy_visualiser.plugin_capability import (
     WidgetsMixin,
 )
 from easy_visualiser.plugins import VisualisablePlugin
-from easy_visualiser.utils import infer_bounds
+from easy_visualiser.profiler import profiled
+from easy_visualiser.utils import infer_bounds, union_bounds
+from easy_visualiser.utils.aggregator import grow_to_fit
+from easy_visualiser.utils.decimation import DecimationPyramid, series_to_xy
 
 
 class Visualisable2DLinePlot(WidgetsMixin, TriggerableMixin, VisualisablePlugin):
@@ -27,7 +30,19 @@ class Visualisable2DLinePlot(WidgetsMixin, TriggerableMixin, VisualisablePlugin)
         name: str = None,
         custom_camera=None,
         lineplot_kwargs=None,
+        decimation: Optional[str] = "minmax",
+        decimation_threshold: int = 5_000,
+        auto_range_hysteresis: float = 0.1,
     ):
+        """
+        :param decimation: how series longer than `decimation_threshold` samples are
+            downsampled to the visible range, i.e. "minmax" (the min and max sample of
+            each pixel column), "lttb" (largest triangle three buckets), or None to
+            always draw every sample.
+        :param auto_range_hysteresis: auto ranging pads the data's range by this
+            fraction on each side, and leaves the camera alone for as long as the data
+            still fits (and fills most of) the view. 0 re-ranges on every plot.
+        """
         super().__init__(name=name)
         if lineplot_kwargs is None:
             lineplot_kwargs = dict(width=2, marker_size=5, title=self.name)
@@ -46,34 +61,222 @@ class Visualisable2DLinePlot(WidgetsMixin, TriggerableMixin, VisualisablePlugin)
         self.widget_option = widget_option
         self.plots: List[scene.LinePlot] = []
         self.custom_camera = custom_camera
+        self.decimation = decimation
+        self.decimation_threshold = decimation_threshold
+        # plot idx -> the full resolution data, and the kwargs to plot it with
+        self._decimated: Dict[int, Tuple[DecimationPyramid, Dict]] = dict()
+        self._watching_view = False
+        self._last_decimated_x_range = None
+        self.auto_range_hysteresis = auto_range_hysteresis
+        # plot idx -> the bounds of its data, kept up to date on plot / append
+        self._plot_bounds: Dict[int, Dict] = dict()
+        # plot idx -> the buffer of its samples, and how many are in use. Only kept
+        # for plots that had been appended to.
+        self._appended: Dict[int, Tuple[np.ndarray, int]] = dict()
 
     def auto_bounds(self):
-        if len(self.plots) < 1:
+        if len(self._plot_bounds) < 1:
             return
-        D = 2
-        bounds = [[float("inf"), float("-inf")] for _ in range(D)]
-        for p in self.plots:
-            for i in range(D):
-                b = p._markers._compute_bounds(i, None)
-                bounds[i][0] = min(bounds[i][0], b[0])
-                bounds[i][1] = max(bounds[i][1], b[1])
-        self.enforce_bounds(bounds=dict(x=bounds[0], y=bounds[i]))
+        bounds = union_bounds(*self._plot_bounds.values())
+        self.enforce_bounds(bounds=dict(x=bounds["x"], y=bounds["y"]))
 
     def get_plot(self, idx) -> scene.LinePlot:
         while idx >= len(self.plots):
             self.plots.append(self.pw.plot(([0], [0]), **self.lineplot_kwargs))
         return self.plots[idx]
 
+    @profiled("set_data")
     def plot(
         self,
         data: Union[np.ndarray, Tuple[List, List]],
         idx: int = 0,
         auto_range: bool = True,
-        **kwargs
+        **kwargs,
     ):
-        self.get_plot(idx=idx).set_data(data=data, **kwargs)
+        # (also sets up the plot widget's view, on the first plot)
+        self.get_plot(idx=idx)
+        self._appended.pop(idx, None)
+        # (not re-decimated if the camera moves, as it is about to be replaced)
+        self._decimated.pop(idx, None)
+        self._plot_bounds[idx] = infer_bounds(data)
         if auto_range:
-            self.enforce_bounds(infer_bounds(data))
+            self.__auto_range(self._plot_bounds[idx])
+        self.__set_data(data, idx, kwargs)
+
+    def append(
+        self,
+        data: Union[np.ndarray, Tuple[List, List]],
+        idx: int = 0,
+        auto_range: bool = True,
+        **kwargs,
+    ):
+        """
+        Appends samples (given like in `plot`) to the end of the plot's line, e.g. to
+        stream in new measurements. Only the new samples are scanned for bounds.
+        """
+        self.get_plot(idx=idx)
+        if idx in self._appended:
+            buffer, count = self._appended[idx]
+        else:
+            buffer = self.__samples_of(idx)
+            count = len(buffer)
+        new = self.__as_samples(data, first_index=count)
+        if count == 0:
+            buffer = np.empty((len(new), new.shape[1]))
+        elif buffer.shape[1] != new.shape[1]:
+            raise ValueError(
+                f"Unable to append {new.shape[1]}D samples to a {buffer.shape[1]}D line"
+            )
+        buffer = grow_to_fit(buffer, count + len(new))
+        buffer[count : count + len(new)] = new
+        count += len(new)
+        self._appended[idx] = buffer, count
+
+        bounds = infer_bounds(new)
+        if idx in self._plot_bounds:
+            bounds = union_bounds(self._plot_bounds[idx], bounds)
+        self._plot_bounds[idx] = bounds
+        extended = self.__extend_decimated(idx, buffer[:count], len(new), kwargs)
+        decimated_x_range = self._last_decimated_x_range
+        if auto_range:
+            self.__auto_range(bounds)
+        if extended:
+            if (
+                # otherwise, had been re-drawn as the camera moved
+                self._last_decimated_x_range == decimated_x_range
+                and self.__tail_is_visible(idx, len(new))
+            ):
+                self.__draw_decimated(idx)
+        else:
+            self.__set_data(buffer[:count], idx, kwargs)
+
+    def __extend_decimated(
+        self, idx: int, data: np.ndarray, num_new: int, kwargs: Dict
+    ) -> bool:
+        """
+        Extends the decimation pyramid of the plot with the new samples (at the end
+        of `data`). Returns False if the plot is not decimated, or the new samples
+        do not keep x sorted.
+        """
+        if idx not in self._decimated or data.ndim != 2 or data.shape[1] != 2:
+            self._decimated.pop(idx, None)
+            return False
+        pyramid, previous_kwargs = self._decimated[idx]
+        new_x = data[-num_new - 1 :, 0]
+        if np.any(np.diff(new_x) < 0):
+            self._decimated.pop(idx, None)
+            return False
+        pyramid.extend(data[:, 0], data[:, 1])
+        self._decimated[idx] = pyramid, kwargs or previous_kwargs
+        return True
+
+    def __tail_is_visible(self, idx: int, num_new: int) -> bool:
+        # the line reaches the new samples from the last one before them
+        pyramid, _ = self._decimated[idx]
+        left, right = self.__visible_x_range()
+        return pyramid.x[-num_new - 1] <= right and pyramid.x[-1] >= left
+
+    def __samples_of(self, idx: int) -> np.ndarray:
+        # the samples currently plotted at idx, as an (N, D) array
+        if idx in self._decimated:
+            pyramid, _ = self._decimated[idx]
+            return np.column_stack([pyramid.x, pyramid.y])
+        if idx not in self._plot_bounds:
+            # only has the placeholder of `get_plot`
+            return np.empty((0, 2))
+        return np.array(self.get_plot(idx=idx)._line.pos)
+
+    @staticmethod
+    def __as_samples(data, first_index: int) -> np.ndarray:
+        if isinstance(data, (tuple, list)):
+            return np.column_stack(data)
+        data = np.asarray(data)
+        if data.ndim == 1:
+            # values, against their index
+            return np.column_stack(
+                [np.arange(first_index, first_index + len(data)), data]
+            )
+        return data
+
+    def __set_data(self, data, idx: int, kwargs: Dict):
+        series = None
+        if self.decimation is not None:
+            series = series_to_xy(data)
+        if series is not None and len(series[0]) > self.decimation_threshold:
+            self._decimated[idx] = DecimationPyramid(*series), kwargs
+            self.__watch_view()
+            self.__draw_decimated(idx)
+        else:
+            self._decimated.pop(idx, None)
+            self.get_plot(idx=idx).set_data(data=data, **kwargs)
+
+    def __auto_range(self, bounds: Dict):
+        # re-ranges the camera onto the bounds, unless they still fit the view well
+        if self.__view_fits(bounds):
+            return
+        padding = self.auto_range_hysteresis
+        self.enforce_bounds(
+            {
+                dim: [
+                    low - padding * self.__padded_extent(low, high),
+                    high + padding * self.__padded_extent(low, high),
+                ]
+                for dim, (low, high) in bounds.items()
+            }
+        )
+
+    @staticmethod
+    def __padded_extent(low: float, high: float) -> float:
+        # a flat (e.g. constant) channel still gets a view of some height
+        return (high - low) or max(abs(low), 1)
+
+    def __view_fits(self, bounds: Dict) -> bool:
+        if self.auto_range_hysteresis <= 0:
+            return False
+        rect = self.pw.view.camera.rect
+        # data that is padded then shrinks by this much no longer fills the view
+        max_ratio = (1 + 2 * self.auto_range_hysteresis) ** 2
+        for (low, high), (view_low, view_high) in zip(
+            (bounds["x"], bounds["y"]),
+            ((rect.left, rect.right), (rect.bottom, rect.top)),
+        ):
+            if low < view_low or high > view_high:
+                return False
+            # (flat data fits any view around it)
+            if 0 < (high - low) * max_ratio < view_high - view_low:
+                return False
+        return True
+
+    def __visible_x_range(self) -> Tuple[float, float]:
+        rect = self.pw.view.camera.rect
+        return rect.left, rect.right
+
+    def __draw_decimated(self, idx: int):
+        pyramid, kwargs = self._decimated[idx]
+        # at least a few hundred buckets, as the view might not have a size yet
+        num_buckets = max(int(self.pw.view.size[0]), 256)
+        picked = pyramid.decimate(
+            self.__visible_x_range(), num_buckets, self.decimation
+        )
+        self.get_plot(idx=idx).set_data(
+            data=np.column_stack([pyramid.x[picked], pyramid.y[picked]]), **kwargs
+        )
+
+    def __watch_view(self):
+        # re-decimate whenever the camera moves (i.e. the scene transform changes)
+        if not self._watching_view:
+            # (not name-mangled, as vispy looks callbacks up by their name)
+            self.pw.view.scene.transform.changed.connect(self._on_view_changed)
+            self._watching_view = True
+
+    def _on_view_changed(self, event=None):
+        x_range = self.__visible_x_range()
+        if x_range == self._last_decimated_x_range:
+            # e.g. only panned vertically
+            return
+        self._last_decimated_x_range = x_range
+        for idx in self._decimated:
+            self.__draw_decimated(idx)
 
     def enforce_bounds(self, bounds: Dict = None):
         # bounds is like {'x': [min, max], 'y': [min, max]}
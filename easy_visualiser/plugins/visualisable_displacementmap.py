@@ -1,29 +1,29 @@
 import numpy as np
-from PIL import Image
 from vispy.color import get_colormap
 
 from easy_visualiser.key_mapping import Key, Mapping, MappingOnlyDisplayText
 from easy_visualiser.plugin_capability import ToggleableMixin
 from easy_visualiser.plugins import VisualisablePoints
 from easy_visualiser.utils import ScalableFloat, map_array_to_0_1
+from easy_visualiser.utils.heightmap import Heightmap
 
 
 class VisualisableDisplacementMap(ToggleableMixin, VisualisablePoints):
-    def __init__(self, image_path: str):
+    def __init__(self, image_path: str, max_points: int = 1_000_000):
+        """
+        :param image_path: a heightmap, as an image, or a (memory-mapped) npy,
+            raw or tiff file.
+        :param max_points: the heightmap gets strided, such that (about) at most
+            this many points are displayed. Only those are ever read.
+        """
         self._z_scale = ScalableFloat(0.3, upper_bound=10)
-        if image_path is not None:
-            with Image.open(image_path) as im:
-                self.z_data = np.array(im.convert("L"))
-                self.z_data_ = self.z_data
-        self.grid = np.indices(self.z_data.shape)
-        self.z_data = self.z_data.ravel()
-        point_data = np.vstack(
-            [
-                self.grid[0].ravel(),
-                self.grid[1].ravel(),
-                self.z_data * float(self._z_scale),
-            ],
-        ).T
+        self.heightmap = Heightmap.open(image_path)
+        self.every = self.heightmap.stride_for(max_points)
+        self.z_data = self.heightmap.strided(self.every).ravel()
+        xs, ys = self.heightmap.coordinates(self.every)
+        point_data = np.column_stack(
+            [xs.ravel(), ys.ravel(), self.z_data * float(self._z_scale)]
+        )
 
         super(VisualisableDisplacementMap, self).__init__(point_data)
 
@@ -1,60 +1,177 @@
 import glob
+from typing import Optional, Tuple
 
 import numpy as np
-from PIL import Image
 from vispy.color import get_colormap
 
-from easy_visualiser.key_mapping import MappingOnlyDisplayText
+from easy_visualiser.frames import FramePrefetcher
+from easy_visualiser.key_mapping import Key, Mapping, MappingOnlyDisplayText
+from easy_visualiser.modal_control import ModalControl
 from easy_visualiser.plugin_capability import IntervalUpdatableMixin
 from easy_visualiser.plugins.visualisable_displacementmap import (
     VisualisableDisplacementMap,
 )
-from easy_visualiser.utils import map_array_to_0_1
+from easy_visualiser.utils import ScalableFloat, ToggleableBool, map_array_to_0_1
+from easy_visualiser.utils.heightmap import Heightmap
+
+# (heights, positions, colours) of a frame
+Frame = Tuple[np.ndarray, np.ndarray, np.ndarray]
 
 
 class VisualisableDisplacementMapLoopWithGlob(
     IntervalUpdatableMixin, VisualisableDisplacementMap
 ):
-    """A version that loop through all matched files"""
+    """
+    A version that loop through all matched files. The next frames are decoded
+    (and colour-mapped) ahead on worker threads, hence showing a frame only
+    uploads its positions and colours.
+    """
 
-    def __init__(self, image_glob_path: str):
+    def __init__(
+        self,
+        image_glob_path: str,
+        fps: float = 10,
+        lookahead: int = 6,
+        cache_size: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        :param fps: the playback rate, which can be changed with the controls.
+        :param lookahead: the number of frames to decode ahead of the shown one.
+        :param cache_size: the number of decoded frames to keep around (by default
+            twice the lookahead). Each takes 28 bytes per point.
+        :param kwargs: passed to `VisualisableDisplacementMap`, e.g. max_points.
+        """
         self.globbed_images = sorted(glob.glob(image_glob_path))
-        self.current_image_path = None
         if len(self.globbed_images) < 1:
             raise ValueError(
                 f"No images found with the glob string '{image_glob_path}'"
             )
-
-        def iterator():
-            while True:
-                yield from self.globbed_images
-
-        self.iterator = iterator()
+        self.fps = ScalableFloat(fps, upper_bound=120, lower_bound=0.5)
+        self.playing = ToggleableBool(True)
+        self.lookahead = lookahead
+        self.cache_size = cache_size
+        self.frames: Optional[FramePrefetcher] = None
+        # the shown frame, and the one to show once it is decoded
+        self.frame_index = 0
+        self._target_index = 0
+        # the direction of the playback, or of the latest step
+        self._direction = 1
+        self._frames_z_scale = None
         # initialise with the first image
-        super().__init__(image_path=self.__get_next_image())
+        super().__init__(image_path=self.globbed_images[0], **kwargs)
 
-        # line to display current image
-        self.add_mapping(
+        __fps_factor = 1.25
+        self.add_mappings(
+            # line to display current image
             MappingOnlyDisplayText(
-                lambda: f"Displaying: {self.current_image_path.split('/')[-1]}\n"
+                lambda: f"Displaying: {self.current_image_path.split('/')[-1]} "
+                f"[{self.frame_index + 1}/{len(self.globbed_images)}]\n"
+            ),
+            ModalControl(
+                "l",
+                [
+                    MappingOnlyDisplayText(
+                        lambda: f"{'playing' if self.playing else 'paused'} at "
+                        f"{float(self.fps):.1f} fps"
+                    ),
+                    Mapping(Key(["Space"]), "Play / pause", self.toggle_playing),
+                    Mapping(".", "Step to the next frame", lambda: self.step(1)),
+                    Mapping(",", "Step to the previous frame", lambda: self.step(-1)),
+                    Mapping(
+                        Key.Plus,
+                        "Increase fps",
+                        lambda: self.fps.scale(__fps_factor),
+                    ),
+                    Mapping(
+                        Key.Minus,
+                        "Decrease fps",
+                        lambda: self.fps.scale(1 / __fps_factor),
+                    ),
+                ],
+                "playback",
             ),
             front=True,
         )
 
-    def __get_next_image(self):
-        self.current_image_path = next(self.iterator)
-        return self.current_image_path
+    @property
+    def update_rate(self) -> float:
+        return float(self.fps)
+
+    @property
+    def current_image_path(self) -> str:
+        return self.globbed_images[self.frame_index]
+
+    def construct_plugin(self, **kwargs) -> bool:
+        if not super().construct_plugin(**kwargs):
+            return False
+        self.frames = FramePrefetcher(
+            self.visualiser.workers,
+            self.__load_frame,
+            len(self.globbed_images),
+            lookahead=self.lookahead,
+            cache_size=self.cache_size,
+            on_ready=self.__on_frame_ready,
+        )
+        self._frames_z_scale = float(self._z_scale)
+        return True
+
+    def __load_frame(self, index: int) -> Frame:
+        # (runs on a worker)
+        z_data = Heightmap.open(self.globbed_images[index]).strided(self.every).ravel()
+        if z_data.shape[0] != self.point_data.shape[0]:
+            raise ValueError(
+                f"{self.globbed_images[index]} has {z_data.shape[0]} samples, rather "
+                f"than the {self.point_data.shape[0]} of the first image"
+            )
+        pos = np.array(self.point_data, dtype=np.float32)
+        pos[:, 2] = z_data * self._frames_z_scale
+        colours = get_colormap("jet").map(map_array_to_0_1(z_data)).astype(np.float32)
+        return z_data, pos, colours
+
+    def __on_frame_ready(self, index: int):
+        if index == self._target_index:
+            self.visualiser.request_update()
+
+    def toggle_playing(self) -> bool:
+        if self.playing:
+            # stay on the shown frame, rather than the upcoming one
+            self._target_index = self.frame_index
+        self.playing.toggle()
+        return True
+
+    def step(self, direction: int) -> bool:
+        """Pauses, and shows the next (or previous) frame once it is decoded."""
+        if self.playing:
+            self.toggle_playing()
+        self._direction = direction
+        self._target_index = (self._target_index + direction) % len(self.globbed_images)
+        self.frames.prefetch(self._target_index, direction)
+        return True
 
     def on_update(self) -> None:
         super().on_update()
-        image_path = self.__get_next_image()
-        with Image.open(image_path) as im:
-            self.z_data = np.array(im.convert("L")).ravel()
-        cmap = get_colormap("jet")
-        colours = cmap.map(map_array_to_0_1(self.z_data))
-        self.points_visual.set_data(face_color="white")
-        self._reload_pos_data(self._compute_new_point_data())
-        self.points_visual.update_data(colors=colours)
+        if self._frames_z_scale != float(self._z_scale):
+            # the decoded positions are scaled
+            self._frames_z_scale = float(self._z_scale)
+            self.frames.invalidate()
+        if self.playing and self._target_index == self.frame_index:
+            self._direction = 1
+            self._target_index = (self.frame_index + 1) % len(self.globbed_images)
+        if self.frames.has_failed(self._target_index):
+            # skip the frames that can not be loaded (the error had been logged)
+            self._target_index = (self._target_index + self._direction) % len(
+                self.globbed_images
+            )
+        self.frames.prefetch(self._target_index, self._direction)
+
+        frame = self.frames.get(self._target_index)
+        if frame is None or self._target_index == self.frame_index:
+            # hold the shown frame until the next one is decoded
+            return
+        self.frame_index = self._target_index
+        self.z_data, pos, colours = frame
+        self.points_visual.update_data(pos=pos, colors=colours)
 
         # update status
         self.other_plugins.VisualisableAutoStatusBar.update_status()
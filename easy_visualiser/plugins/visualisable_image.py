@@ -5,6 +5,7 @@ from easy_visualiser.key_mapping import Mapping
 from easy_visualiser.modded_components import LockedPanZoomCamera, PanZoomCamera
 from easy_visualiser.plugin_capability import TriggerableMixin, WidgetsMixin
 from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.profiler import profiled
 from easy_visualiser.utils import boolean_to_onoff
 
 
@@ -46,6 +47,7 @@ class VisualisableImage(WidgetsMixin, VisualisablePlugin):
         self.on_mouse_callback = on_mouse_callback
         self.normalise_on_mouse_callback = normalise_on_mouse_callback
 
+    @profiled("set_data")
     def set_image(self, image_data):
         self.image_array = image_data
         self.image_visual.set_data(image_data)
@@ -0,0 +1,199 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from vispy.color import ColorArray
+
+from easy_visualiser.modded_components import MarkerWithModifiablePos
+from easy_visualiser.plugin_capability import (
+    BackgroundPreparableMixin,
+    IntervalUpdatableMixin,
+)
+from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.utils import camera_lod_state
+from easy_visualiser.utils.point_lod import PointLOD, RowAllocator
+
+TRANSPARENT = np.zeros(4, dtype=np.float32)
+
+
+class VisualisableLODPoints(
+    IntervalUpdatableMixin, BackgroundPreparableMixin, VisualisablePlugin
+):
+    """
+    Visualise very large point clouds (e.g. tens of millions of sonar soundings).
+    A level-of-detail octree of the points is built on a worker thread. Then, only
+    the nodes that matter from the current camera get drawn (within a point
+    budget), and they are streamed in and out of a fixed size vertex buffer as the
+    camera moves.
+    """
+
+    points_visual: Optional[MarkerWithModifiablePos]
+    update_rate = 30
+
+    def __init__(
+        self,
+        point_budget: int = 1_000_000,
+        min_point_spacing: float = 1.0,
+        points_per_update: int = 250_000,
+        **kwargs,
+    ):
+        """
+        :param point_budget: the maximum number of points to draw at once.
+        :param min_point_spacing: nodes whose points would be closer than this (in
+            pixels) on screen are not drawn, as their parents look the same.
+        :param points_per_update: the number of points to stream in per update,
+            such that moving the camera stays responsive.
+        """
+        super().__init__(**kwargs)
+        self.point_budget = point_budget
+        self.min_point_spacing = min_point_spacing
+        self.points_per_update = points_per_update
+        self.points_visual = None
+        self.lod: Optional[PointLOD] = None
+
+        self._points: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None
+        self._colour = np.ones(4, dtype=np.float32)
+        self._size = 1.0
+        self._marker_kwargs = dict()
+        # node -> its first row in the vertex buffer
+        self._resident: Dict[int, int] = dict()
+        self._allocator = RowAllocator(point_budget)
+        # the nodes to draw, from the most important
+        self._wanted = np.empty(0, dtype=np.intp)
+        self._camera_state = None
+
+    def construct_plugin(self) -> bool:
+        super().construct_plugin()
+        self.points_visual = MarkerWithModifiablePos(
+            parent=self.visualiser.visual_parent
+        )
+        # (not name-mangled, as vispy looks callbacks up by their name)
+        self.visualiser.view.scene.transform.changed.connect(self._on_view_changed)
+        if self._points is not None:
+            self.request_prepare()
+        return True
+
+    def set_points(
+        self,
+        pos: np.ndarray,
+        face_color="w",
+        size: float = 1.0,
+        **kwargs,
+    ):
+        """
+        :param face_color: a single colour, or one colour per point.
+        :param kwargs: the marker style, e.g. symbol or edge_width.
+        """
+        assert len(pos.shape) == 2
+        colours = None
+        if isinstance(face_color, np.ndarray) and face_color.ndim == 2:
+            colours = ColorArray(face_color).rgba
+        else:
+            self._colour = ColorArray(face_color).rgba[0]
+        self._points = pos, colours
+        self._size = size
+        self._marker_kwargs = kwargs
+        if self.points_visual is not None:
+            self.request_prepare()
+
+    def prepare(self) -> PointLOD:
+        pos, colours = self._points
+        return PointLOD(pos, colours)
+
+    def apply(self, lod: PointLOD):
+        self.lod = lod
+        # start over with an empty (all hidden) buffer
+        marker_kwargs = dict(edge_width=0, symbol="o")
+        marker_kwargs.update(self._marker_kwargs)
+        # the root is always drawn, even if it is over the budget on its own
+        capacity = max(self.point_budget, int(lod.node_counts()[0]))
+        self.points_visual.set_data(
+            pos=np.zeros((capacity, 3), dtype=np.float32),
+            size=0,
+            face_color=TRANSPARENT,
+            **marker_kwargs,
+        )
+        self._resident.clear()
+        self._allocator = RowAllocator(capacity)
+        self._camera_state = None
+        if not self.had_set_range:
+            self.set_range(
+                **{
+                    dim: (lod.origin[i], lod.origin[i] + lod.extent)
+                    for i, dim in enumerate("xyz")
+                }
+            )
+        self.visualiser.request_update()
+
+    def _on_view_changed(self, event=None):
+        # re-select on the next update, which might be far away in event-driven mode
+        if self.lod is not None:
+            self.visualiser.request_update()
+
+    def on_update(self) -> None:
+        if self.lod is None:
+            return
+        camera_state = camera_lod_state(self.visualiser.view)
+        if camera_state != self._camera_state:
+            self._camera_state = camera_state
+            eye, focal = camera_state
+            self._wanted = self.lod.select(
+                self.point_budget,
+                eye=None if eye is None else np.array(eye),
+                focal=focal,
+                min_spacing=self.min_point_spacing,
+            )
+        if not self.__stream():
+            # carry on streaming in the next update
+            self.visualiser.request_update()
+
+    def __stream(self) -> bool:
+        """Streams nodes in and out. Returns whether all wanted nodes are in."""
+        wanted = set(self._wanted.tolist())
+        for node in [node for node in self._resident if node not in wanted]:
+            self.__stream_out(node)
+
+        counts = self.lod.node_counts()
+        quota = self.points_per_update
+        for node in self._wanted:
+            if node in self._resident:
+                continue
+            if quota <= 0:
+                return False
+            count = int(counts[node])
+            start = self._allocator.allocate(count)
+            if start is None:
+                # enough room in total (as within the budget), but fragmented
+                self.__defragment()
+                start = self._allocator.allocate(count)
+            self.__stream_in(node, start)
+            quota -= count
+        return True
+
+    def __node_rows(self, node: int, start: int) -> slice:
+        return slice(start, start + int(self.lod.node_counts()[node]))
+
+    def __stream_in(self, node: int, start: int):
+        lod = self.lod
+        points = slice(lod.node_start[node], lod.node_stop[node])
+        self.points_visual.update_rows(
+            self.__node_rows(node, start),
+            pos=lod.positions[points],
+            colors=self._colour if lod.colors is None else lod.colors[points],
+            size=self._size,
+        )
+        self._resident[node] = start
+
+    def __stream_out(self, node: int):
+        start = self._resident.pop(node)
+        rows = self.__node_rows(node, start)
+        self.points_visual.update_rows(rows, colors=TRANSPARENT, size=0)
+        self._allocator.free(start, rows.stop - rows.start)
+
+    def __defragment(self):
+        # packs the resident nodes at the front, which re-uploads all of them
+        resident = list(self._resident)
+        for node in resident:
+            self.__stream_out(node)
+        for node in resident:
+            count = int(self.lod.node_counts()[node])
+            self.__stream_in(node, self._allocator.allocate(count))
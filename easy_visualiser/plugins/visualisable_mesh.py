@@ -1,19 +1,43 @@
+from typing import Optional, Union
+
 import numpy as np
-from PIL import Image
 from vispy.color import get_colormap
+from vispy.scene import Node
 
 from easy_visualiser.key_mapping import Key, Mapping, MappingOnlyDisplayText
 from easy_visualiser.modal_control import ModalControl
-from easy_visualiser.plugin_capability import ToggleableMixin, TriggerableMixin
+from easy_visualiser.plugin_capability import (
+    PickableMixin,
+    ToggleableMixin,
+    TriggerableMixin,
+)
 from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.terrain import TiledTerrain
 from easy_visualiser.utils import IncrementableInt, ScalableFloat, map_array_to_0_1
 from easy_visualiser.utils.dummy import DUMMY_AXIS_VAL
+from easy_visualiser.utils.heightmap import Heightmap
 from easy_visualiser.visuals.gridmesh import FixedGridMesh
 
 
-class VisualisableMesh(ToggleableMixin, TriggerableMixin, VisualisablePlugin):
-    def __init__(self, image_path: str):
+class VisualisableMesh(
+    PickableMixin, ToggleableMixin, TriggerableMixin, VisualisablePlugin
+):
+    mesh_visual: FixedGridMesh = None
+    terrain: Optional[TiledTerrain] = None
+    # on screen size of the tiles' cells (when tiled), per grid indexing step
+    tile_cell_pixels = 4.0
+
+    def __init__(self, image_path: str, tiled: bool = False, tile_size: int = 64):
+        """
+        :param image_path: a heightmap, as an image, or a (memory-mapped) npy,
+            raw or tiff file.
+        :param tiled: draw the heightmap as tiles whose detail follows the
+            camera, rather than as one mesh of a global stride. The grid
+            indexing then scales the detail of the tiles instead.
+        """
         super().__init__()
+        self.tiled = tiled
+        self.tile_size = tile_size
         self._marker_scale = ScalableFloat(1, upper_bound=50)
         self._antialias = ScalableFloat(0.25, upper_bound=10)
 
@@ -21,18 +45,10 @@ class VisualisableMesh(ToggleableMixin, TriggerableMixin, VisualisablePlugin):
             Mapping("z", "reset zoom", lambda: self.set_range()),
         )
         self._z_scale = ScalableFloat(0.3, upper_bound=10)
-        with Image.open(image_path) as im:
-            self.z_data = np.array(im.convert("L"))
-            self.z_data_ = self.z_data
-        self.grid = np.indices(self.z_data.shape)
-        self.z_data = self.z_data.ravel()
-        point_data = np.vstack(
-            [
-                self.grid[0].ravel(),
-                self.grid[1].ravel(),
-                self.z_data * float(self._z_scale),
-            ],
-        ).T
+        # (memory-mapped, if the format allows it)
+        self.heightmap = Heightmap.open(image_path)
+        # the z of the displayed samples, as (stride, z)
+        self._displayed_z = None
 
         __scale_factor = 1.25
         self.grid_every = IncrementableInt(1, lower_bound=1)
@@ -76,28 +92,52 @@ class VisualisableMesh(ToggleableMixin, TriggerableMixin, VisualisablePlugin):
 
     def _reload_pos_data(self, update_grid=False):
         every = int(self.grid_every)
-        data = dict(zs=self.z_data_[::every, ::every] * float(self._z_scale))
+        if self.terrain is not None:
+            self.terrain.max_cell_pixels = self.tile_cell_pixels * every
+            if self.terrain.z_scale != float(self._z_scale):
+                self.terrain.z_scale = float(self._z_scale)
+            else:
+                self.terrain.update()
+            return
+        if self._displayed_z is None or self._displayed_z[0] != every:
+            # only reads the displayed samples
+            self._displayed_z = every, self.heightmap.strided(every)
+        data = dict(zs=self._displayed_z[1] * float(self._z_scale))
         cmap = get_colormap("jet")
 
         if update_grid:
+            xs, ys = self.heightmap.coordinates(every)
             data.update(
                 dict(
-                    xs=self.grid[0][::every, ::every],
-                    ys=self.grid[1][::every, ::every],
+                    xs=xs,
+                    ys=ys,
                     colors=cmap.map(map_array_to_0_1(data["zs"])).reshape(
                         *data["zs"].shape, 4
                     ),
                 )
             )
         self.mesh_visual.set_data(**data)
+        self.invalidate_pick_index()
 
     def construct_plugin(
         self,
         **kwargs,
     ) -> bool:
-        nums = self.grid[0].shape[0] * self.grid[0].shape[0]
-        if nums > 1_000_000:
-            self.grid_every.set(int(nums // 1_000_000))
+        if self.tiled:
+            self.terrain = TiledTerrain(
+                self.visualiser,
+                self.visualiser.visual_parent,
+                tile_size=self.tile_size,
+                max_cell_pixels=self.tile_cell_pixels,
+                colormap="jet",
+                shading="smooth",
+                on_change=self.__on_tiles_changed,
+            )
+            self.terrain.z_scale = float(self._z_scale)
+            self.terrain.set_grid(self.heightmap.z)
+            return True
+
+        self.grid_every.set(self.heightmap.stride_for(1_000_000))
 
         self.mesh_visual = FixedGridMesh(
             DUMMY_AXIS_VAL,
@@ -112,15 +152,33 @@ class VisualisableMesh(ToggleableMixin, TriggerableMixin, VisualisablePlugin):
             self.set_range()
         return True
 
+    def __on_tiles_changed(self):
+        self.invalidate_pick_index()
+        if not self.had_set_range:
+            self.set_range()
+
+    @property
+    def __visual(self) -> Union[FixedGridMesh, Node]:
+        return self.mesh_visual if self.terrain is None else self.terrain.node
+
     def turn_on_plugin(self):
         if not super().turn_on_plugin():
             return False
-        self.mesh_visual.visible = True
+        self.__visual.visible = True
         self._reload_pos_data()
         return True
 
     def turn_off_plugin(self):
         if not super().turn_off_plugin():
             return False
-        self.mesh_visual.visible = False
+        self.__visual.visible = False
         return True
+
+    @property
+    def pickable_visual(self) -> Union[FixedGridMesh, Node]:
+        return self.__visual
+
+    def pickable_points(self) -> np.ndarray:
+        if self.terrain is not None:
+            return self.terrain.points()
+        return self.mesh_visual.mesh_data.get_vertices()
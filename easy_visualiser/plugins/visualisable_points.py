@@ -2,19 +2,23 @@ import numpy as np
 
 from easy_visualiser.key_mapping import Key, Mapping, MappingOnlyDisplayText
 from easy_visualiser.modal_control import ModalControl
-from easy_visualiser.modded_components import MarkerWithModifiablePos
-from easy_visualiser.plugin_capability import TriggerableMixin
+from easy_visualiser.modded_components import (
+    MarkerWithModifiablePos,
+    grown_capacity,
+)
+from easy_visualiser.plugin_capability import PickableMixin, TriggerableMixin
 from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.profiler import profiled
 from easy_visualiser.utils import ScalableFloat
 from easy_visualiser.utils.dummy import DUMMY_POINTS
 
 
-class VisualisablePoints(TriggerableMixin, VisualisablePlugin):
+class VisualisablePoints(PickableMixin, TriggerableMixin, VisualisablePlugin):
     """
     Visualise 3D points
     """
 
-    points_visual: MarkerWithModifiablePos
+    points_visual: MarkerWithModifiablePos = None
 
     def __init__(self, points: np.ndarray = np.zeros([0, 3]), **kwargs):
         super().__init__(**kwargs)
@@ -103,22 +107,64 @@ class VisualisablePoints(TriggerableMixin, VisualisablePlugin):
     def _reload_pos_data(self, point_data: np.ndarray):
         self.points_visual.update_data(pos=point_data)
 
+    @profiled("set_data")
     def set_points(self, pos: np.ndarray, *args, **kwargs):
         assert len(pos.shape) == 2
         if pos.shape[0] <= 0:
             return
 
         kwargs["pos"] = pos
+        self.invalidate_pick_index()
 
         # self._cached_plotting_kwargs != kwargs
-        if self.points_visual.num_points() == pos.shape[0]:
-            # self._reload_pos_data(pos)
-            # reload with new location
-            self.points_visual.update_data(*args, **kwargs)
+        if (
+            self.__fits_in_capacity(pos.shape[0])
+            and not args
+            and kwargs.keys()
+            <= {
+                "pos",
+                "colors",
+                "size",
+            }
+        ):
+            # reload with new location (and number of points), which only uploads
+            # the rows that had changed
+            self.points_visual.update_data(**kwargs)
             self._cached_plotting_kwargs = dict(kwargs)
         else:
-            # set new data, as the shape is different
-            self.points_visual.set_data(*args, **kwargs)
+            # set new data, with some head room for the points to grow into
+            self.points_visual.set_data(
+                *args,
+                capacity=grown_capacity(pos.shape[0]),
+                **kwargs,
+            )
 
         if not self.had_set_range:
             self.set_range()
+
+    def append_points(self, pos: np.ndarray):
+        """
+        Appends to the displayed points. Within the reserved capacity, only the new
+        points get uploaded.
+        """
+        assert len(pos.shape) == 2
+        self.invalidate_pick_index()
+        num_points = self.points_visual.num_points()
+        if num_points > 0 and self.__fits_in_capacity(num_points + pos.shape[0]):
+            self.points_visual.append_data(pos)
+        else:
+            self.set_points(np.vstack([self.points_visual.positions(), pos]))
+
+    def __fits_in_capacity(self, num_points: int) -> bool:
+        if not self.points_visual.had_set_data:
+            return False
+        capacity = self.points_visual.capacity()
+        # reallocate when shrinking a lot, to not hold on to a huge buffer
+        return capacity // 4 <= num_points <= capacity
+
+    @property
+    def pickable_visual(self) -> MarkerWithModifiablePos:
+        return self.points_visual
+
+    def pickable_points(self) -> np.ndarray:
+        return self.points_visual.positions()
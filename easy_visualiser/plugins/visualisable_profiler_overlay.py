@@ -0,0 +1,90 @@
+from typing import Optional
+
+from easy_visualiser.modal_control import ModalControl
+from easy_visualiser.plugin_capability import (
+    IntervalUpdatableMixin,
+    TriggerableMixin,
+    WidgetOption,
+)
+from easy_visualiser.plugins.visualisable_message_board import (
+    VisualisableMessageBoard,
+)
+from easy_visualiser.profiler import HotPathProfiler
+
+PLUGIN_CATEGORIES = (
+    "on_update",
+    "on_update_guard",
+    "construct_plugin",
+    "set_data",
+    "hook",
+    "keypress",
+    "datasource",
+)
+
+
+class VisualisableProfilerOverlay(
+    IntervalUpdatableMixin, TriggerableMixin, VisualisableMessageBoard
+):
+    """
+    Displays the fps, frame time percentiles and the slowest plugins' hot paths.
+    If a trace path is given, the recorded spans are dumped as a Chrome trace
+    when the visualiser closes.
+    """
+
+    update_rate = 2
+
+    def __init__(
+        self,
+        top_n: int = 5,
+        trace_path: Optional[str] = None,
+        widget_option: Optional[WidgetOption] = None,
+    ):
+        if widget_option is None:
+            widget_option = WidgetOption(col=0, row=1, row_span=1)
+        super().__init__(widget_option=widget_option)
+        self.top_n = top_n
+        self.trace_path = trace_path
+        self.profiler = HotPathProfiler.get_instance()
+
+        self.add_mapping(
+            ModalControl(
+                "f",
+                [
+                    ("d", "dump chrome trace", self.dump_trace),
+                    ("r", "reset profiler", self.profiler.reset),
+                ],
+                modal_name="profiler",
+            )
+        )
+
+    def on_initialisation(self, visualiser):
+        super().on_initialisation(visualiser)
+        self.profiler.enable(tracing=True)
+        self.visualiser.hooks.on_visualiser_close.add_hook(
+            self.__on_close, identifier=self
+        )
+
+    def __on_close(self):
+        if self.trace_path is not None:
+            self.dump_trace()
+
+    def dump_trace(self):
+        path = self.trace_path or "easy_visualiser_trace.json"
+        self.profiler.dump_chrome_trace(path)
+        print(f"Chrome trace dumped to {path}")
+
+    def on_update(self) -> None:
+        percentiles = self.profiler.frame_time_percentiles()
+        lines = [
+            f"FPS: {self.profiler.fps:.1f}",
+            "frame time: "
+            + " ".join(f"p{p}={t * 1000:.1f}ms" for p, t in percentiles.items()),
+            "slowest:",
+        ]
+        for (category, name), mean, p95 in self.profiler.slowest(
+            self.top_n, categories=PLUGIN_CATEGORIES
+        ):
+            lines.append(
+                f"  {name} [{category}] mean={mean * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+            )
+        self.set_message("\n".join(lines))
@@ -0,0 +1,222 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SpanKey = Tuple[str, str]
+
+
+class _NullSpan:
+    """Do nothing context manager, used when the profiler is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "key", "start")
+
+    def __init__(self, profiler: "HotPathProfiler", key: SpanKey):
+        self.profiler = profiler
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.record(self.key, self.start, time.perf_counter())
+        return False
+
+
+class HotPathProfiler:
+    """
+    Keeps rolling timing histograms of the visualiser's hot paths (plugins'
+    update, hooks, keypress and data source callbacks), keyed by a category
+    and a name (e.g. ``("on_update", "bathymetry")``).
+
+    Optionally keeps the recent spans as trace events, which can be dumped in the
+    Chrome trace-event format (viewable in chrome://tracing or Perfetto).
+    """
+
+    __instance: "HotPathProfiler" = None
+
+    def __init__(self, window: int = 512, max_trace_events: int = 200_000):
+        self.enabled = False
+        self.tracing = False
+        self.window = window
+        self.timings: Dict[SpanKey, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        self.frame_timestamps: Deque[float] = deque(maxlen=window)
+        self.trace_events: Deque[Tuple[SpanKey, float, float, int]] = deque(
+            maxlen=max_trace_events
+        )
+        self._frame_start: Optional[float] = None
+        self._origin = time.perf_counter()
+
+    @classmethod
+    def get_instance(cls) -> "HotPathProfiler":
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    def enable(self, tracing: bool = False):
+        self.enabled = True
+        self.tracing = tracing
+
+    def disable(self):
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self):
+        self.timings.clear()
+        self.frame_timestamps.clear()
+        self.trace_events.clear()
+
+    def span(self, category: str, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, (category, name))
+
+    def record(self, key: SpanKey, start: float, end: float):
+        self.timings[key].append(end - start)
+        if self.tracing:
+            self.trace_events.append((key, start, end, threading.get_ident()))
+
+    ###########################################################
+    # frames
+    def frame_start(self):
+        if not self.enabled:
+            return
+        self._frame_start = time.perf_counter()
+        self.frame_timestamps.append(self._frame_start)
+
+    def frame_end(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        self.record(("frame", "draw"), self._frame_start, time.perf_counter())
+        self._frame_start = None
+
+    @property
+    def fps(self) -> float:
+        if len(self.frame_timestamps) < 2:
+            return 0
+        elapsed = self.frame_timestamps[-1] - self.frame_timestamps[0]
+        if elapsed <= 0:
+            return 0
+        return (len(self.frame_timestamps) - 1) / elapsed
+
+    def frame_time_percentiles(
+        self, percentiles: Tuple[float, ...] = (50, 95, 99)
+    ) -> Dict[float, float]:
+        """Percentiles (in seconds) of the time between consecutive frames."""
+        if len(self.frame_timestamps) < 2:
+            return {p: 0 for p in percentiles}
+        frame_times = np.diff(np.array(self.frame_timestamps))
+        return dict(zip(percentiles, np.percentile(frame_times, percentiles)))
+
+    ###########################################################
+    # statistics
+    def histogram(
+        self, category: str, name: str, bins: int = 20
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Log-spaced histogram of the rolling timings of the given span."""
+        samples = np.array(self.timings.get((category, name), ()))
+        if len(samples) == 0:
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+        low = max(samples.min(), 1e-7)
+        high = max(samples.max(), low * 10)
+        return np.histogram(samples, bins=np.geomspace(low, high, bins + 1))
+
+    def slowest(
+        self, top_n: int = 5, categories: Optional[Iterable[str]] = None
+    ) -> List[Tuple[SpanKey, float, float]]:
+        """
+        Returns the top-n spans, as tuples of (key, mean, p95) in seconds,
+        sorted by their mean time.
+        """
+        if categories is not None:
+            categories = set(categories)
+        stats = []
+        for key, samples in list(self.timings.items()):
+            if categories is not None and key[0] not in categories:
+                continue
+            if len(samples) == 0:
+                continue
+            samples = np.array(samples)
+            stats.append((key, samples.mean(), np.percentile(samples, 95)))
+        stats.sort(key=lambda item: -item[1])
+        return stats[:top_n]
+
+    ###########################################################
+    # export
+    def to_chrome_trace(self) -> Dict:
+        pid = os.getpid()
+        events = [
+            dict(
+                name=name,
+                cat=category,
+                ph="X",
+                ts=(start - self._origin) * 1e6,
+                dur=(end - start) * 1e6,
+                pid=pid,
+                tid=tid,
+            )
+            for (category, name), start, end, tid in list(self.trace_events)
+        ]
+        return dict(traceEvents=events, displayTimeUnit="ms")
+
+    def dump_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+def profile(category: str, name: str):
+    """
+    Time the enclosed block under the given category and name. e.g.
+
+        with profile("on_update", self.name):
+            self.on_update()
+    """
+    return HotPathProfiler.get_instance().span(category, name)
+
+
+def profiled(category: str):
+    """Decorator to profile a plugin's method, named after the plugin."""
+
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with profile(category, self.name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profile_callable(category: str, name: str, func: Callable) -> Callable:
+    """Wraps the given callable, such that each call to it gets profiled."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile(category, name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def callable_name(func: Callable) -> str:
+    return getattr(func, "__qualname__", None) or repr(func)
@@ -0,0 +1,290 @@
+import asyncio
+import dataclasses
+import enum
+import math
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from .file_watcher import FileWatcher, WatchedFile
+
+if TYPE_CHECKING:
+    from easy_visualiser.plugins import VisualisablePlugin
+
+
+class WakeupReason(enum.Flag):
+    NONE = 0
+    TIMER = enum.auto()
+    FILE = enum.auto()
+    DATA = enum.auto()
+
+
+class EventDrivenScheduler:
+    """
+    Decides when the visualiser actually needs to run, so that the main loop can
+    block in the asyncio selector instead of busy spinning.
+
+    Things that need to run declare themselves as one of
+        - a timer (e.g. the visualiser's regular update interval),
+        - a watched file that gets modified,
+        - incoming data, by calling `request_update` (thread-safe).
+
+    GUI events cannot be waited on through the asyncio selector, so the main loop
+    still wakes up every `gui_poll_interval` to let the window process its events,
+    but it will not run any plugin update unless one of the above had fired.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        gui_poll_interval: float = 1 / 60,
+        file_watcher: Optional[FileWatcher] = None,
+    ):
+        self.loop = loop
+        self.gui_poll_interval = gui_poll_interval
+        if file_watcher is None:
+            file_watcher = FileWatcher.get_instance()
+        self.file_watcher = file_watcher
+
+        self._wake_event: Optional[asyncio.Event] = None
+        self._pending = WakeupReason.NONE
+        # each repeating timer keeps the handle of its next scheduled call
+        self._timers: Dict[int, asyncio.TimerHandle] = dict()
+        self._watched_files: Dict[str, WatchedFile] = dict()
+        self._oneshot: Optional[asyncio.TimerHandle] = None
+        self._started = False
+
+    @property
+    def wake_event(self) -> asyncio.Event:
+        # lazily created, as the event must be created with its loop set
+        if self._wake_event is None:
+            self._wake_event = asyncio.Event()
+        return self._wake_event
+
+    def start(self):
+        """Must be called within the loop."""
+        self._started = True
+
+    def stop(self):
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        if self._oneshot is not None:
+            self._oneshot.cancel()
+            self._oneshot = None
+        self._started = False
+
+    def _wake(self, reason: WakeupReason):
+        self._pending |= reason
+        self.wake_event.set()
+
+    def request_update(self, reason: WakeupReason = WakeupReason.DATA):
+        """Wake the loop up. Safe to be called from any thread."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._wake, reason)
+
+    def add_timer(self, interval: float, callback: Optional[Callable] = None):
+        """
+        Wake the loop up every `interval` seconds, optionally running the given
+        callback (within the loop) before the update.
+        """
+        if interval <= 0:
+            raise ValueError(f"Timer interval must be positive, but was {interval}")
+
+        timer_id = len(self._timers)
+
+        def fire():
+            if callback is not None:
+                callback()
+            self._wake(WakeupReason.TIMER)
+            self._timers[timer_id] = self.loop.call_later(interval, fire)
+
+        self._timers[timer_id] = self.loop.call_later(interval, fire)
+
+    def wake_after(self, delay: float):
+        """
+        Wake the loop up once after `delay` seconds. If there is already an
+        earlier pending wake up, this is a no-op.
+        """
+        deadline = self.loop.time() + delay
+        if self._oneshot is not None:
+            if self._oneshot.when() <= deadline:
+                return
+            self._oneshot.cancel()
+
+        def fire():
+            self._oneshot = None
+            self._wake(WakeupReason.TIMER)
+
+        self._oneshot = self.loop.call_at(deadline, fire)
+
+    def watch_file(self, path: str) -> WatchedFile:
+        """
+        Wake the loop up whenever the given file is modified. Returns the watched
+        file, which keeps track of the file's state without any syscall.
+        """
+        if path not in self._watched_files:
+            self._watched_files[path] = self.file_watcher.watch(
+                path, lambda _: self.request_update(WakeupReason.FILE)
+            )
+        return self._watched_files[path]
+
+    async def wait(self) -> WakeupReason:
+        """
+        Block until something requested an update, or until the GUI needs to
+        process its events. Returns the reasons of the wake up (which is
+        `WakeupReason.NONE` if it was only due to the GUI poll).
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(
+                    self.wake_event.wait(), timeout=self.gui_poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+        self.wake_event.clear()
+        reasons, self._pending = self._pending, WakeupReason.NONE
+        return reasons
+
+
+@dataclasses.dataclass
+class PluginUpdateStats:
+    runs: int = 0
+    # number of times the plugin was due, but got deferred to the next frame
+    deferred: int = 0
+    # number of times the plugin pushed the frame over its time budget
+    overruns: int = 0
+    total_time: float = 0
+    max_time: float = 0
+    next_due: float = 0
+    pending: bool = False
+    _last_reported: float = -math.inf
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.runs if self.runs else 0
+
+
+class FrameBudgetScheduler:
+    """
+    Runs the `update` of interval updatable plugins at their declared
+    `update_rate`, while keeping each frame within a time budget.
+
+    Plugins that are due but do not fit within the budget are deferred to the next
+    frame (the most overdue plugins run first, so that deferred ones catch up),
+    and at least one plugin runs every frame so that nothing starves. Plugins
+    that push the frame over the budget are recorded as overruns.
+    """
+
+    report_every: float = 5
+
+    def __init__(self, frame_budget: float = 0.016):
+        self.frame_budget = frame_budget
+        self.stats: Dict["VisualisablePlugin", PluginUpdateStats] = dict()
+        self._candidates: List["VisualisablePlugin"] = []
+
+    def get_stats(self, plugin: "VisualisablePlugin") -> PluginUpdateStats:
+        try:
+            return self.stats[plugin]
+        except KeyError:
+            self.stats[plugin] = PluginUpdateStats()
+            return self.stats[plugin]
+
+    @staticmethod
+    def _period(plugin: "VisualisablePlugin") -> Optional[float]:
+        rate = getattr(plugin, "update_rate", None)
+        if rate is None:
+            return None
+        return 1 / rate
+
+    def run_frame(self, plugins: Iterable["VisualisablePlugin"]):
+        frame_start = time.perf_counter()
+        self._candidates = list(plugins)
+
+        # gather all due plugins, the most overdue ones first
+        due = []
+        for plugin in self._candidates:
+            stats = self.get_stats(plugin)
+            if stats.pending or frame_start >= stats.next_due:
+                due.append((stats.next_due, plugin, stats))
+        due.sort(key=lambda item: item[0])
+
+        for i, (_, plugin, stats) in enumerate(due):
+            if i > 0 and time.perf_counter() - frame_start >= self.frame_budget:
+                # out of budget. defer the rest to the next frame.
+                for _, _, deferred_stats in due[i:]:
+                    deferred_stats.pending = True
+                    deferred_stats.deferred += 1
+                break
+
+            start = time.perf_counter()
+            plugin.update()
+            end = time.perf_counter()
+
+            elapsed = end - start
+            stats.runs += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.pending = False
+            period = self._period(plugin)
+            if period is None:
+                stats.next_due = end
+            else:
+                # do not try to catch up on missed updates in bursts
+                stats.next_due = max(stats.next_due + period, end)
+
+            if end - frame_start > self.frame_budget:
+                stats.overruns += 1
+                self.__report_overrun(plugin, stats, elapsed, end)
+
+    def __report_overrun(
+        self,
+        plugin: "VisualisablePlugin",
+        stats: PluginUpdateStats,
+        elapsed: float,
+        now: float,
+    ):
+        if now - stats._last_reported < self.report_every:
+            return
+        stats._last_reported = now
+        logger.warning(
+            "{} overran the frame budget of {:.1f}ms (took {:.1f}ms, {} overruns so far)",
+            plugin,
+            self.frame_budget * 1000,
+            elapsed * 1000,
+            stats.overruns,
+        )
+
+    def next_due_in(self) -> Optional[float]:
+        """
+        Returns the number of seconds until the next plugin needs to be updated,
+        or None if no plugin is waiting on a timer.
+        """
+        now = time.perf_counter()
+        next_due = None
+        for plugin in self._candidates:
+            stats = self.get_stats(plugin)
+            if stats.pending:
+                return 0
+            if self._period(plugin) is None:
+                continue
+            due_in = max(stats.next_due - now, 0)
+            if next_due is None or due_in < next_due:
+                next_due = due_in
+        return next_due
+
+    def report(self) -> str:
+        """A summary of the time each plugin had spent on updating."""
+        lines = []
+        for plugin, stats in sorted(
+            self.stats.items(), key=lambda item: -item[1].total_time
+        ):
+            lines.append(
+                f"{plugin}: {stats.runs} runs, "
+                f"mean {stats.mean_time * 1000:.2f}ms, "
+                f"max {stats.max_time * 1000:.2f}ms, "
+                f"{stats.deferred} deferred, {stats.overruns} overruns"
+            )
+        return "\n".join(lines)
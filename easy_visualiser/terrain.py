@@ -0,0 +1,240 @@
+import collections
+import functools
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from vispy import app, scene
+from vispy.color import get_colormap
+
+from .utils import camera_lod_state
+from .utils.dummy import DUMMY_AXIS_VAL
+from .utils.terrain import Fields, GridPyramid, NodeKey, TerrainQuadtree
+from .visuals.gridmesh import FixedGridMesh
+
+if TYPE_CHECKING:
+    from .visualiser import Visualiser
+
+# (version of the content, node, levels of its coarser neighbours)
+TileKey = Tuple[int, NodeKey, Tuple[Optional[int], ...]]
+
+
+class TiledTerrain:
+    """
+    Draws a (possibly huge) height grid as a quadtree of `FixedGridMesh` tiles,
+    such that each part of the terrain gets the detail that its distance from the
+    camera calls for, rather than one stride for the whole grid.
+
+    Tiles are built on the visualiser's worker pool. The drawn tiles only get
+    swapped once all of the newly selected ones are ready, so there is never a
+    hole nor an overlap in between.
+    """
+
+    def __init__(
+        self,
+        visualiser: "Visualiser",
+        parent,
+        tile_size: int = 64,
+        max_cell_pixels: float = 4.0,
+        max_tiles: int = 256,
+        colormap: Optional[str] = None,
+        update_rate: float = 10,
+        cache_size: Optional[int] = None,
+        on_change: Optional[Callable[[], None]] = None,
+        **mesh_kwargs,
+    ):
+        """
+        :param max_cell_pixels: tiles whose cells are larger than this (in pixels)
+            on screen get split into finer ones.
+        :param max_tiles: the maximum number of tiles to draw at once, each of
+            (at most) `(tile_size + 1) ** 2` vertices.
+        :param colormap: colours the tiles by height, unless the grid has colours.
+        :param update_rate: max number of tile selections per second, while the
+            camera moves.
+        :param cache_size: the number of built tiles to keep around, such that
+            moving back and forth does not rebuild them.
+        :param on_change: called whenever the drawn tiles had changed.
+        :param mesh_kwargs: passed to the tiles, e.g. shading.
+        """
+        self.visualiser = visualiser
+        self.node = scene.Node(parent=parent)
+        self.tile_size = tile_size
+        self.max_cell_pixels = max_cell_pixels
+        self.max_tiles = max_tiles
+        self.colormap = None if colormap is None else get_colormap(colormap)
+        self.update_rate = update_rate
+        self.cache_size = 2 * max_tiles if cache_size is None else cache_size
+        self.on_change = on_change
+        self.mesh_kwargs = mesh_kwargs
+
+        self.quadtree: Optional[TerrainQuadtree] = None
+        self._z_scale = 1.0
+        # bumped whenever the content of the tiles changes
+        self._version = 0
+        # built tiles, in least recently used order
+        self._built: "collections.OrderedDict[TileKey, Fields]" = (
+            collections.OrderedDict()
+        )
+        self._building: Dict[TileKey, None] = dict()
+        self._wanted: List[TileKey] = []
+        self._shown: Dict[TileKey, FixedGridMesh] = dict()
+        self._spare: List[FixedGridMesh] = []
+        self._timer: Optional[app.Timer] = None
+        # (not name-mangled, as vispy looks callbacks up by their name)
+        visualiser.view.scene.transform.changed.connect(self._on_view_changed)
+
+    def set_grid(
+        self,
+        zs: np.ndarray,
+        xs: Optional[np.ndarray] = None,
+        ys: Optional[np.ndarray] = None,
+        colors: Optional[np.ndarray] = None,
+    ):
+        """Builds the pyramid of the grid on a worker, then shows it."""
+        self.visualiser.workers.submit(
+            (self, "pyramid"),
+            lambda: GridPyramid(zs, xs=xs, ys=ys, colors=colors),
+            self.set_pyramid,
+        )
+
+    def set_pyramid(self, pyramid: GridPyramid):
+        self.quadtree = TerrainQuadtree(pyramid, self.tile_size)
+        self.__invalidate()
+
+    @property
+    def z_scale(self) -> float:
+        return self._z_scale
+
+    @z_scale.setter
+    def z_scale(self, value: float):
+        self._z_scale = float(value)
+        self.__invalidate()
+
+    def __invalidate(self):
+        self._version += 1
+        self._built.clear()
+        for key in self._building:
+            self.visualiser.workers.cancel((self, key))
+        self._building.clear()
+        self.update()
+
+    def _on_view_changed(self, event=None):
+        if self.quadtree is None:
+            return
+        # re-select at most `update_rate` times per second
+        if self._timer is None:
+            self._timer = app.Timer(connect=self._on_timer, iterations=1)
+        if not self._timer.running:
+            self._timer.start(interval=1 / self.update_rate, iterations=1)
+
+    def _on_timer(self, event=None):
+        self.update()
+
+    def update(self):
+        """Selects the tiles for the current camera, and builds the missing ones."""
+        if self.quadtree is None:
+            return
+        eye, focal = camera_lod_state(self.visualiser.view)
+        nodes = self.quadtree.select(
+            eye=None if eye is None else np.array(eye),
+            focal=focal,
+            max_cell_pixels=self.max_cell_pixels,
+            max_tiles=self.max_tiles,
+            z_scale=self._z_scale,
+        )
+        selected = set(nodes)
+        self._wanted = [
+            (self._version, node, self.quadtree.coarser_sides(node, selected))
+            for node in nodes
+        ]
+        wanted = set(self._wanted)
+        for key in [key for key in self._building if key not in wanted]:
+            self.visualiser.workers.cancel((self, key))
+            del self._building[key]
+        for key in self._wanted:
+            if key in self._built or key in self._shown or key in self._building:
+                continue
+            self._building[key] = None
+            self.visualiser.workers.submit(
+                (self, key),
+                functools.partial(self.__build_tile, self.quadtree, self._z_scale, key),
+                functools.partial(self.__on_tile_built, key),
+            )
+        self.__swap_if_ready()
+
+    def __build_tile(
+        self, quadtree: TerrainQuadtree, z_scale: float, key: TileKey
+    ) -> Fields:
+        _, node, coarser_sides = key
+        z_range = quadtree.pyramid.z_range
+        colormap = self.colormap
+
+        def finish(fields: Fields) -> Fields:
+            fields = dict(fields)
+            zs = np.asarray(fields["zs"], dtype=float)
+            if "colors" not in fields and colormap is not None:
+                normalised = (zs - z_range[0]) / ((z_range[1] - z_range[0]) or 1)
+                fields["colors"] = colormap.map(
+                    np.nan_to_num(normalised).ravel()
+                ).reshape(*zs.shape, 4)
+            fields["zs"] = zs * z_scale
+            return fields
+
+        return quadtree.tile(node, coarser_sides, finish)
+
+    def __on_tile_built(self, key: TileKey, fields: Fields):
+        self._building.pop(key, None)
+        if key[0] != self._version:
+            return
+        self._built[key] = fields
+        wanted = set(self._wanted)
+        for old_key in list(self._built):
+            if len(self._built) <= self.cache_size:
+                break
+            if old_key not in wanted:
+                del self._built[old_key]
+        self.__swap_if_ready()
+
+    def __swap_if_ready(self):
+        if not all(key in self._built or key in self._shown for key in self._wanted):
+            return
+        wanted = set(self._wanted)
+        changed = False
+        for key in [key for key in self._shown if key not in wanted]:
+            visual = self._shown.pop(key)
+            visual.visible = False
+            self._spare.append(visual)
+            changed = True
+        for key in self._wanted:
+            if key in self._shown:
+                continue
+            if self._spare:
+                visual = self._spare.pop()
+            else:
+                visual = FixedGridMesh(
+                    DUMMY_AXIS_VAL,
+                    DUMMY_AXIS_VAL,
+                    DUMMY_AXIS_VAL,
+                    parent=self.node,
+                    **self.mesh_kwargs,
+                )
+            self._built.move_to_end(key)
+            visual.set_data(**self._built[key])
+            visual.visible = True
+            self._shown[key] = visual
+            changed = True
+        if changed:
+            if self.on_change is not None:
+                self.on_change()
+            self.visualiser.request_update()
+
+    @property
+    def num_shown(self) -> int:
+        return len(self._shown)
+
+    def points(self) -> Optional[np.ndarray]:
+        """The vertices of the drawn tiles."""
+        if not self._shown:
+            return None
+        return np.concatenate(
+            [visual.mesh_data.get_vertices() for visual in self._shown.values()]
+        )
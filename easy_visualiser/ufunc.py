@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
 
 from vispy import scene
 
@@ -31,9 +31,10 @@ import numpy as np
 
 from easy_visualiser.key_mapping import Key, Mapping, MappingOnlyDisplayText
 from easy_visualiser.modal_control import ModalControl
-from easy_visualiser.modded_components import MarkerWithModifiablePos
-from easy_visualiser.plugin_capability import TriggerableMixin
+from easy_visualiser.modded_components import MarkerWithModifiablePos, StreamingLine
+from easy_visualiser.plugin_capability import PickableMixin, TriggerableMixin
 from easy_visualiser.plugins import VisualisablePlugin
+from easy_visualiser.profiler import profiled
 from easy_visualiser.utils import ScalableFloat
 from easy_visualiser.utils.dummy import DUMMY_POINTS
 
@@ -53,15 +54,25 @@ def visualiser_non_closing_guard(func):
     return call_func
 
 
-class VisualisableLine(TriggerableMixin, VisualisablePlugin):
+class VisualisableLine(PickableMixin, TriggerableMixin, VisualisablePlugin):
     """
     Visualise 3D lines
     """
 
-    lines_visual: scene.Line
+    lines_visual: Union[scene.Line, StreamingLine] = None
 
-    def __init__(self, points: np.ndarray = np.zeros([0, 3]), **kwargs):
+    def __init__(
+        self,
+        points: np.ndarray = np.zeros([0, 3]),
+        max_history: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        :param max_history: switches to the streaming mode, where `append` keeps
+            (at most) the latest `max_history` points, and only uploads the new ones.
+        """
         super().__init__(**kwargs)
+        self.max_history = max_history
         self._marker_scale = ScalableFloat(1, upper_bound=50)
         self._antialias = ScalableFloat(0.25, upper_bound=10)
         self._cached_plotting_kwargs = dict()
@@ -122,10 +133,16 @@ class VisualisableLine(TriggerableMixin, VisualisablePlugin):
         **kwargs,
     ) -> bool:
         super().construct_plugin()
-        self.lines_visual = scene.Line(
-            parent=self.visualiser.visual_parent,
-            # antialias=float(self._antialias),
-        )
+        if self.streaming:
+            self.lines_visual = StreamingLine(
+                capacity=self.max_history,
+                parent=self.visualiser.visual_parent,
+            )
+        else:
+            self.lines_visual = scene.Line(
+                parent=self.visualiser.visual_parent,
+                # antialias=float(self._antialias),
+            )
         # self._antialias.set(self.lines_visual.antialias)
         # self.visualiser.grid.add_widget(col=4, row=4)
 
@@ -140,10 +157,18 @@ class VisualisableLine(TriggerableMixin, VisualisablePlugin):
         self.set_line(self.point_data)
         return True
 
+    @profiled("set_data")
     def set_line(self, pos: np.ndarray, *args, **kwargs):
         assert len(pos.shape) == 2
         if pos.shape[0] <= 0:
             return
+        self.invalidate_pick_index()
+
+        if self.streaming:
+            # replaces the whole history
+            self.lines_visual.clear()
+            self.append(pos, *args, **kwargs)
+            return
 
         kwargs["pos"] = pos
         self.lines_visual.set_data(*args, **kwargs)
@@ -152,6 +177,43 @@ class VisualisableLine(TriggerableMixin, VisualisablePlugin):
         if not self.had_set_range:
             self.set_range()
 
+    @property
+    def streaming(self) -> bool:
+        return self.max_history is not None
+
+    @profiled("append")
+    def append(self, pos: np.ndarray, *args, **kwargs):
+        """
+        Appends points to the end of the line. In the streaming mode, this costs
+        the same regardless of the length of the history.
+        """
+        assert len(pos.shape) == 2
+        if not self.streaming:
+            # has to re-send the whole line
+            if self.lines_visual.pos is not None:
+                pos = np.vstack([self.lines_visual.pos, pos])
+            self.set_line(pos, *args, **kwargs)
+            return
+
+        self.invalidate_pick_index()
+        # connectivity is managed by the ring buffer
+        kwargs.pop("connect", None)
+        if args or kwargs:
+            self.lines_visual.set_data(*args, **kwargs)
+        self.lines_visual.append(pos)
+
+        if not self.had_set_range and self.lines_visual.num_vertices() > 1:
+            self.set_range()
+
+    @property
+    def pickable_visual(self) -> Union[scene.Line, StreamingLine]:
+        return self.lines_visual
+
+    def pickable_points(self) -> Optional[np.ndarray]:
+        if self.streaming:
+            return self.lines_visual.positions()
+        return self.lines_visual.pos
+
 
 class _SpinUntlKeyPress_Helper(ToggleableMixin, VisualisablePlugin):
     def __init__(self, **kwargs):
@@ -202,12 +264,27 @@ class PlottingUFuncMixin(ABC):
             while not plug.pressed:
                 self.spin_once()
 
-    def scatter(self: "Visualiser", pos, *args, name: str = None, **kwargs):
+    def scatter(
+        self: "Visualiser", pos, *args, name: str = None, lod: bool = False, **kwargs
+    ):
         """
         Scatter plots.
+
+        :param lod: draw through a level-of-detail octree instead, which only draws
+            (and uploads) the points that matter from the current camera. For very
+            large point clouds, e.g. tens of millions of points.
         """
         pos = ensure_nparray(pos)
 
+        if lod:
+            from easy_visualiser.plugins import VisualisableLODPoints
+
+            self.get_existing_or_construct(
+                plugin_type=VisualisableLODPoints,
+                name=name,
+            ).set_points(pos, *args, **kwargs)
+            return
+
         self.get_existing_or_construct(
             plugin_type=VisualisablePoints,
             name=name,
@@ -238,6 +315,33 @@ class PlottingUFuncMixin(ABC):
             name=name,
         ).set_line(pos=pos, *args, **kwargs)
 
+    def plot_stream(
+        self: "Visualiser",
+        pos,
+        *args,
+        name: str = None,
+        max_history: int = 10_000,
+        width: int = 5,
+        color: str = "red",
+        **kwargs,
+    ):
+        """
+        Appends to a (streaming) line, which keeps the latest `max_history` points.
+        Useful for live tracks, where re-sending the whole history on every tick
+        would get slower and slower.
+        """
+        pos = ensure_nparray(pos)
+        if len(pos.shape) == 1:
+            pos = pos[None, :]
+
+        kwargs.update(dict(width=width, color=color))
+
+        self.get_existing_or_construct(
+            plugin_type=VisualisableLine,
+            name=name or "_default__VisualisableLine_stream",
+            max_history=max_history,
+        ).append(pos, *args, **kwargs)
+
     def imshow(
         self: "Visualiser",
         image,
@@ -1,7 +1,10 @@
+import functools
+import threading
+import time
 from abc import ABC, abstractstaticmethod
-from collections import OrderedDict
-from dataclasses import dataclass
-from typing import Any
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
 
 import numpy as np
 
@@ -11,6 +14,10 @@ class AggregatorItem:
     _value: Any
     dirty: bool = True
     row_slice: slice = None
+    # notifies the owning aggregator whenever this item gets dirty
+    _on_dirty: Optional[Callable[[], None]] = field(
+        default=None, repr=False, compare=False
+    )
 
     def set_row_slice(self, *args):
         """
@@ -19,6 +26,7 @@ class AggregatorItem:
         and only displays them later.
         """
         self.row_slice = slice(*args)
+        self.mark_dirty()
 
     def retrieve_for_build(self):
         self.dirty = False
@@ -31,8 +39,13 @@ class AggregatorItem:
         return self._value
 
     def update_value(self, val: Any):
-        self.dirty = True
         self._value = val
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self.dirty = True
+        if self._on_dirty is not None:
+            self._on_dirty()
 
 
 def infer_num_rows(item):
@@ -67,6 +80,22 @@ class AbstractAggregatorBackend(ABC):
             kwargs["dtype"] = aggregator.dtype
         return np.array(cls.concat_items(aggregator), **kwargs)
 
+    @classmethod
+    def build(cls, aggregator: "Aggregator") -> np.ndarray:
+        """Returns the assembled array, rebuilding only what is needed."""
+        if cls.needs_full_rebuild(aggregator):
+            return cls.full_build(aggregator)
+        cls.partial_build(aggregator)
+        return aggregator._cached_container
+
+    @staticmethod
+    def on_dirty(aggregator: "Aggregator", key: Any):
+        """Called whenever the item of the key is added or updated."""
+
+    @staticmethod
+    def on_remove(aggregator: "Aggregator", key: Any):
+        """Called whenever the item of the key is removed."""
+
 
 class AggregatorBackendUnity(AbstractAggregatorBackend):
     """
@@ -80,7 +109,7 @@ class AggregatorBackendUnity(AbstractAggregatorBackend):
 
     @staticmethod
     def needs_full_rebuild(aggregator: "Aggregator"):
-        if aggregator._cached_container is None:
+        if aggregator._cached_container is None or aggregator.dtype is None:
             return True
         return aggregator._cached_container.shape[0] != len(aggregator.values())
 
@@ -110,7 +139,7 @@ class AggregatorBackendComposite(AbstractAggregatorBackend):
 
     @staticmethod
     def needs_full_rebuild(aggregator: "Aggregator"):
-        if aggregator._cached_container is None:
+        if aggregator._cached_container is None or aggregator.dtype is None:
             return True
         full_length = sum(infer_num_rows(v) for v in aggregator.values())
         return aggregator._cached_container.shape[0] != full_length
@@ -127,6 +156,206 @@ class AggregatorBackendComposite(AbstractAggregatorBackend):
             i += nrow
 
 
+def as_rows(value: Any) -> np.ndarray:
+    """The value as a 2D array, where each row is one row of the aggregation."""
+    if infer_num_rows(value) == 1:
+        return np.reshape(value, (1, -1))
+    return np.asarray(value)
+
+
+def grow_to_fit(array: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns an array (with the same leading content) that can hold at least `size`
+    entries along the first axis. Grows geometrically, such that appending is
+    amortised O(1).
+    """
+    if size <= array.shape[0]:
+        return array
+    grown = np.empty((max(size, 2 * array.shape[0]),) + array.shape[1:], array.dtype)
+    grown[: array.shape[0]] = array
+    return grown
+
+
+@dataclass
+class RowIndex:
+    """
+    Where the rows of each item live within a preallocated buffer. Each key owns
+    a slot, and the rows of the slots are laid out back to back, in slot order.
+    """
+
+    buffer: np.ndarray
+    slots: Dict[Any, int]
+    starts: np.ndarray
+    nrows: np.ndarray
+    alive: np.ndarray
+    num_slots: int
+    # number of rows in use, including the ones left behind by removed items
+    num_rows: int
+    num_holes: int = 0
+    # keys (in insertion order) that were added or updated since the last build
+    dirty: Dict[Any, None] = field(default_factory=dict)
+    # e.g. an item had changed its number of rows, hence everything after it moves
+    needs_relayout: bool = False
+
+    def compact(self):
+        """Squeezes out the rows of removed items."""
+        used = slice(0, self.num_slots)
+        keep_rows = np.repeat(self.alive[used], self.nrows[used])
+        num_rows = self.num_rows - self.num_holes
+        self.buffer[:num_rows] = self.buffer[: self.num_rows][keep_rows]
+        self.nrows[used][~self.alive[used]] = 0
+        self.starts[used] = np.cumsum(self.nrows[used]) - self.nrows[used]
+        self.num_rows = num_rows
+        self.num_holes = 0
+        if len(self.slots) < self.num_slots // 2:
+            # most slots are dead, renumber the living ones
+            new_slot = np.cumsum(self.alive[used]) - 1
+            for key, slot in self.slots.items():
+                self.slots[key] = int(new_slot[slot])
+            num_slots = len(self.slots)
+            for array in (self.starts, self.nrows, self.alive):
+                array[:num_slots] = array[used][self.alive[used]]
+            self.alive[num_slots : self.num_slots] = False
+            self.num_slots = num_slots
+
+    def append(self, key: Any, nrow: int) -> int:
+        slot = self.num_slots
+        self.starts = grow_to_fit(self.starts, slot + 1)
+        self.nrows = grow_to_fit(self.nrows, slot + 1)
+        self.alive = grow_to_fit(self.alive, slot + 1)
+        self.starts[slot] = self.num_rows
+        self.nrows[slot] = nrow
+        self.alive[slot] = True
+        self.slots[key] = slot
+        self.num_slots += 1
+        self.num_rows += nrow
+        self.buffer = grow_to_fit(self.buffer, self.num_rows)
+        return slot
+
+
+class AggregatorBackendArray(AbstractAggregatorBackend):
+    """
+    Specialisation for aggregating many items, where only a few of them change
+    in between each assemble. All rows live in a preallocated (growable) array,
+    with an index of key -> rows. Only the items that were added or updated since
+    the last assemble get written, and removed items leave holes that are
+    compacted away (with numpy) on the next assemble. Hence, assembling costs
+    O(dirty) python operations rather than O(items).
+
+    Works for items of any number of rows. Changing the number of rows (or
+    columns) of an existing item falls back to a full rebuild.
+    """
+
+    @staticmethod
+    def concat_items(aggregator: "Aggregator"):
+        return [as_rows(v.retrieve_for_build()) for v in aggregator.values()]
+
+    @staticmethod
+    def needs_full_rebuild(aggregator: "Aggregator"):
+        index = aggregator._row_index
+        return index is None or index.needs_relayout
+
+    @classmethod
+    def full_build(cls, aggregator: "Aggregator"):
+        rows = cls.concat_items(aggregator)
+        if len(rows) > 0:
+            data = np.concatenate(rows)
+        else:
+            data = np.empty((0, 0))
+        if aggregator.dtype is not None:
+            data = data.astype(aggregator.dtype, copy=False)
+        nrows = np.array([len(r) for r in rows], dtype=np.intp)
+
+        num_slots = len(rows)
+        index = RowIndex(
+            buffer=grow_to_fit(data[:0], len(data) + len(data) // 2),
+            slots={key: slot for slot, key in enumerate(aggregator.keys())},
+            starts=np.cumsum(nrows) - nrows,
+            nrows=nrows,
+            alive=np.ones(num_slots, dtype=bool),
+            num_slots=num_slots,
+            num_rows=len(data),
+        )
+        index.buffer[: len(data)] = data
+        aggregator._row_index = index
+        return index.buffer[: index.num_rows]
+
+    @staticmethod
+    def partial_build(aggregator: "Aggregator"):
+        index = aggregator._row_index
+        if index.num_holes > 0:
+            index.compact()
+        for key in index.dirty:
+            rows = as_rows(aggregator.get_stored_item(key).retrieve_for_build())
+            if aggregator.dtype is None and not np.can_cast(
+                rows.dtype, index.buffer.dtype, "safe"
+            ):
+                # e.g. floats into a buffer of ints, which needs a promotion
+                index.needs_relayout = True
+                return
+            if rows.shape[1:] != index.buffer.shape[1:]:
+                # different number of columns (which would otherwise be broadcast)
+                index.needs_relayout = True
+                return
+            slot = index.slots.get(key)
+            if slot is None:
+                slot = index.append(key, len(rows))
+            elif len(rows) != index.nrows[slot]:
+                index.needs_relayout = True
+                return
+            start = index.starts[slot]
+            index.buffer[start : start + len(rows)] = rows
+        index.dirty.clear()
+        if len(index.slots) != len(aggregator):
+            # got out of sync, e.g. the underlying dict was mutated directly
+            index.needs_relayout = True
+
+    @classmethod
+    def build(cls, aggregator: "Aggregator") -> np.ndarray:
+        if not cls.needs_full_rebuild(aggregator):
+            cls.partial_build(aggregator)
+        if cls.needs_full_rebuild(aggregator):
+            return cls.full_build(aggregator)
+        index = aggregator._row_index
+        return index.buffer[: index.num_rows]
+
+    @staticmethod
+    def on_dirty(aggregator: "Aggregator", key: Any):
+        if aggregator._row_index is not None:
+            aggregator._row_index.dirty[key] = None
+
+    @staticmethod
+    def on_remove(aggregator: "Aggregator", key: Any):
+        index = aggregator._row_index
+        if index is None:
+            return
+        index.dirty.pop(key, None)
+        slot = index.slots.pop(key, None)
+        if slot is not None:
+            index.alive[slot] = False
+            index.num_holes += int(index.nrows[slot])
+
+
+# marks a staged removal
+_REMOVED = object()
+
+
+class StagingBuffer:
+    """The updates staged by one producer thread, waiting to be applied."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+        self.updates: Dict[Any, Any] = dict()
+
+
+@dataclass
+class StagedHistory:
+    samples: Deque[Tuple[np.ndarray, float]]
+    # the key got removed before these samples were staged
+    reset: bool = False
+
+
 class Aggregator(OrderedDict):
     """
     Helps you to aggregates data by hash tag.
@@ -138,29 +367,57 @@ class Aggregator(OrderedDict):
 
     It also auto detect if any stored items are composite (> 1 rows).
     If so, it auto switch backend.
+
+    With many items, pass `backend=AggregatorBackendArray`, such that assembling
+    only touches the items that had changed.
+
+    The aggregator itself is not thread-safe. Data sources that deliver on their
+    own threads (e.g. moos mail or ros subscriber callbacks) should use `stage`
+    and `stage_remove` instead, which only get applied on the next `assemble`.
     """
 
-    processor: AbstractAggregatorBackend = AggregatorBackendUnity
+    processor: Type[AbstractAggregatorBackend] = AggregatorBackendUnity
 
-    def __init__(self, *args, dtype=None, **kwargs):
-        super().__init__(*args, **kwargs)
+    def __init__(
+        self,
+        *args,
+        dtype=None,
+        backend: Optional[Type[AbstractAggregatorBackend]] = None,
+        **kwargs,
+    ):
         self.dtype = dtype
         self._cached_container = None
+        self._row_index: Optional[RowIndex] = None
+        self._staging_local = threading.local()
+        self._staging_buffers: List[StagingBuffer] = []
+        if backend is not None:
+            self.processor = backend
+        super().__init__(*args, **kwargs)
 
     def __setitem__(self, __key: Any, __value: Any) -> None:
         # quick check to auto switck backend
-        if self.processor != AggregatorBackendComposite and infer_num_rows(__value) > 1:
+        if self.processor is AggregatorBackendUnity and infer_num_rows(__value) > 1:
             # needs to use composite processor (slower code path)
             self.processor = AggregatorBackendComposite
 
         # store item
         item = self.get(__key, None)
         if item is None:
-            item = AggregatorItem(__value)
+            item = AggregatorItem(
+                __value, _on_dirty=functools.partial(self._mark_dirty, __key)
+            )
             super().__setitem__(__key, item)
+            self._mark_dirty(__key)
         else:
             item.update_value(__value)
 
+    def __delitem__(self, __key: Any) -> None:
+        super().__delitem__(__key)
+        self.processor.on_remove(self, __key)
+
+    def _mark_dirty(self, key: Any):
+        self.processor.on_dirty(self, key)
+
     def __getitem__(self, __key: Any) -> Any:
         # return the wrapped value
         return super().__getitem__(__key).peek()
@@ -172,16 +429,262 @@ class Aggregator(OrderedDict):
         """
         Main entry point. This auto decide if it needs partial or full rebuild.
         """
-        if self.processor.needs_full_rebuild(self) or self.dtype is None:
-            self._cached_container = self.processor.full_build(self)
-        else:
-            # This is: self._cached_container.shape[0] == len(self.values())
-            self.processor.partial_build(self)
+        self.apply_staged()
+        self._cached_container = self.processor.build(self)
         return self._cached_container
 
+    ###########################################################
+    # staged (thread-safe) ingestion
+    def __staging_buffer(self) -> StagingBuffer:
+        buffer = getattr(self._staging_local, "buffer", None)
+        if buffer is None:
+            # each producer thread gets its own buffer, hence producers never
+            # contend with each other
+            buffer = self._staging_local.buffer = StagingBuffer()
+            self._staging_buffers.append(buffer)
+        return buffer
+
+    def stage(self, key: Any, value: Any):
+        """
+        Sets the key from any (producer) thread. The update waits in the thread's
+        own staging buffer, and gets applied on the next `assemble` (on the render
+        thread), so producers never block drawing nor corrupt the assembled
+        array. Updates of the same key in between two assembles are coalesced.
+        """
+        buffer = self.__staging_buffer()
+        with buffer.lock:
+            self._stage_update(buffer.updates, key, value)
+
+    def stage_remove(self, key: Any):
+        """Removes the key from any (producer) thread, see `stage`."""
+        buffer = self.__staging_buffer()
+        with buffer.lock:
+            buffer.updates[key] = _REMOVED
+
+    def _stage_update(self, updates: Dict[Any, Any], key: Any, value: Any):
+        updates[key] = value
+
+    def _apply_staged_update(self, key: Any, value: Any):
+        self[key] = value
+
+    def apply_staged(self) -> int:
+        """
+        Applies the updates staged by the producers. Must be called from the
+        thread that owns the aggregator. Returns the number of applied updates.
+        """
+        applied = 0
+        for buffer in list(self._staging_buffers):
+            if not buffer.updates:
+                if not buffer.thread.is_alive():
+                    self._staging_buffers.remove(buffer)
+                continue
+            # swap the buffer out, such that the lock is only held for an instant
+            with buffer.lock:
+                updates, buffer.updates = buffer.updates, dict()
+            for key, value in updates.items():
+                if value is _REMOVED:
+                    self.remove(key)
+                else:
+                    self._apply_staged_update(key, value)
+            applied += len(updates)
+        return applied
+
     def remove(self, key: Any):
         return self.pop(key, None)
 
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key not in self:
+            return super().pop(key, *default)
+        item = super().pop(key)
+        self.processor.on_remove(self, key)
+        return item
+
+    def popitem(self, last: bool = True):
+        key, item = super().popitem(last)
+        self.processor.on_remove(self, key)
+        return key, item
+
+    def clear(self) -> None:
+        super().clear()
+        self._row_index = None
+
+
+class RingBuffer:
+    """
+    A fixed capacity history of rows (with their timestamps), where appending
+    overwrites the oldest row once full.
+
+    Every row is written twice (at `i` and `i + capacity`), such that the latest
+    `n` rows are always contiguous in memory. Hence, any window of the history is
+    a zero-copy view, and appending never copies the history.
+    """
+
+    def __init__(self, capacity: int, num_cols: int, dtype=np.float64):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be positive, but got {capacity}")
+        self.capacity = capacity
+        self._data = np.empty((2 * capacity, num_cols), dtype=dtype)
+        self._times = np.empty(2 * capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def latest_time(self) -> Optional[float]:
+        if self._count == 0:
+            return None
+        return self._times[self._head + self.capacity - 1]
+
+    def append(self, row: np.ndarray, t: float):
+        head = self._head
+        self._data[head] = self._data[head + self.capacity] = row
+        self._times[head] = self._times[head + self.capacity] = t
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def __window(self, array: np.ndarray, last: Optional[int]) -> np.ndarray:
+        count = self._count if last is None else min(last, self._count)
+        end = self._head + self.capacity
+        return array[end - count : end]
+
+    def view(self, last: Optional[int] = None) -> np.ndarray:
+        """The (latest `last`) rows, from the oldest to the newest."""
+        return self.__window(self._data, last)
+
+    def times(self, last: Optional[int] = None) -> np.ndarray:
+        return self.__window(self._times, last)
+
+    def since(self, t: float) -> np.ndarray:
+        """The rows that were appended at, or after, time `t`."""
+        times = self.times()
+        return self.view(len(times) - np.searchsorted(times, t, side="left"))
+
+
+class HistoryItem(AggregatorItem):
+    """An item whose value is the history of all the samples set to its key."""
+
+    def peek(self) -> RingBuffer:
+        return self._value
+
+    def retrieve_for_build(self, since: Optional[float] = None) -> np.ndarray:
+        self.dirty = False
+        history = self.peek()
+        rows = history.view() if since is None else history.since(since)
+        if self.row_slice is not None:
+            rows = rows[self.row_slice, :]
+        return rows
+
+
+class HistoryAggregator(Aggregator):
+    """
+    Aggregates the history (e.g. the trails of many vehicles) of each key.
+
+    Rather than replacing the stored value, setting a key appends a sample to its
+    ring buffer, which keeps the latest `capacity` samples, so memory is bounded
+    by `capacity` rows per key. With a `time_window`, only samples within the
+    window (up to the latest appended time, or `now`) are assembled.
+
+    `assemble` concatenates all histories into a single contiguous array, and
+    `connect` tells which consecutive rows belong to the same key, such that the
+    trails can be drawn as a single line visual.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        time_window: Optional[float] = None,
+        dtype=np.float64,
+    ):
+        super().__init__(dtype=dtype)
+        self.capacity = capacity
+        self.time_window = time_window
+        self.latest_time: Optional[float] = None
+        self._lengths = np.empty(0, dtype=np.intp)
+        self._output = np.empty((0, 0), dtype=dtype)
+
+    def __setitem__(self, __key: Any, __value: Any) -> None:
+        self.append(__key, __value)
+
+    def __getitem__(self, __key: Any) -> np.ndarray:
+        return self.get_stored_item(__key).peek().view()
+
+    def append(self, key: Any, sample: Any, t: Optional[float] = None):
+        """Appends a sample (a row) to the history of the key, at time `t`."""
+        sample = np.asarray(sample)
+        if t is None:
+            t = time.time()
+        item = self.get(key, None)
+        if item is None:
+            history = RingBuffer(self.capacity, sample.shape[-1], dtype=self.dtype)
+            item = HistoryItem(history)
+            OrderedDict.__setitem__(self, key, item)
+        item.peek().append(sample, t)
+        item.mark_dirty()
+        if self.latest_time is None or t > self.latest_time:
+            self.latest_time = t
+
+    def stage(self, key: Any, sample: Any, t: Optional[float] = None):
+        """
+        Appends a sample from any (producer) thread, see `Aggregator.stage`.
+        Samples are not coalesced, but at most `capacity` of them are kept per key.
+        """
+        if t is None:
+            t = time.time()
+        # copy, as producers might reuse their array
+        super().stage(key, (np.array(sample, dtype=self.dtype), t))
+
+    def _stage_update(self, updates: Dict[Any, Any], key: Any, value: Any):
+        staged = updates.get(key)
+        if staged is None or staged is _REMOVED:
+            staged = updates[key] = StagedHistory(
+                samples=deque(maxlen=self.capacity), reset=staged is _REMOVED
+            )
+        staged.samples.append(value)
+
+    def _apply_staged_update(self, key: Any, value: StagedHistory):
+        if value.reset:
+            self.remove(key)
+        for sample, t in value.samples:
+            self.append(key, sample, t)
+
+    def assemble(self, now: Optional[float] = None) -> np.ndarray:
+        self.apply_staged()
+        since = None
+        if self.time_window is not None:
+            if now is None:
+                now = self.latest_time
+            if now is not None:
+                since = now - self.time_window
+
+        windows = [item.retrieve_for_build(since) for item in self.values()]
+        self._lengths = np.array([len(w) for w in windows], dtype=np.intp)
+        total = int(self._lengths.sum())
+        if len(windows) == 0:
+            self._cached_container = self._output[:0]
+            return self._cached_container
+        if self._output.shape[1:] != windows[0].shape[1:]:
+            self._output = np.empty((0,) + windows[0].shape[1:], dtype=self.dtype)
+        # reuse the output buffer across frames
+        self._output = grow_to_fit(self._output, total)
+        self._cached_container = np.concatenate(windows, out=self._output[:total])
+        return self._cached_container
+
+    def offsets(self) -> np.ndarray:
+        """The starting row of each key, within the last assembled array."""
+        return np.cumsum(self._lengths) - self._lengths
+
+    def connect(self) -> np.ndarray:
+        """
+        For the last assembled array, whether each row connects to the next one
+        (i.e. both are of the same key). Can be given to a line visual as is.
+        """
+        connect = np.ones(int(self._lengths.sum()), dtype=bool)
+        ends = np.cumsum(self._lengths)[self._lengths > 0] - 1
+        connect[ends] = False
+        return connect
+
 
 if __name__ == "__main__":
     a = Aggregator()
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+def default_cache_dir() -> str:
+    root = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(root, "easy_visualiser", "artifacts")
+
+
+class ArtifactCache:
+    """
+    An on-disk cache of derived arrays (e.g. the gridded bathymetry mesh), keyed
+    by a content hash of the inputs plus the parameters used to derive them.
+
+    Each entry is a directory of `.npy` files, which are memory-mapped when
+    loaded, so a hit costs (almost) nothing until the data is touched. Entries are
+    evicted in least-recently-used order once the cache exceeds `max_bytes`.
+    """
+
+    __instance: "ArtifactCache" = None
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 2 * 1024**3):
+        if directory is None:
+            directory = default_cache_dir()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "ArtifactCache":
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def key(*arrays: np.ndarray, **params) -> str:
+        """A content hash of the given arrays, and (the repr of) the parameters."""
+        hasher = hashlib.blake2b(digest_size=20)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            hasher.update(f"{array.dtype.str}{array.shape}".encode())
+            hasher.update(memoryview(array).cast("B"))
+        for name in sorted(params):
+            hasher.update(f"{name}={params[name]!r};".encode())
+        return hasher.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the (memory-mapped, read-only) arrays of the entry, if cached."""
+        entry_dir = self._entry_dir(key)
+        try:
+            names = [f for f in os.listdir(entry_dir) if f.endswith(".npy")]
+            arrays = {
+                name[: -len(".npy")]: np.load(
+                    os.path.join(entry_dir, name), mmap_mode="r"
+                )
+                for name in names
+            }
+        except (OSError, ValueError):
+            return None
+        # mark it as recently used
+        try:
+            os.utime(entry_dir)
+        except OSError:
+            pass
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]):
+        """Stores the arrays as an entry, then evicts old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        # write into a temporary directory first, such that readers never see a
+        # partially written entry
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array))
+            try:
+                os.rename(tmp_dir, self._entry_dir(key))
+            except OSError:
+                # someone else had stored the same entry in the meantime
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def entries(self) -> List[Tuple[str, float, int]]:
+        """All entries, as (key, last used time, size in bytes)."""
+        entries = []
+        try:
+            keys = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for key in keys:
+            entry_dir = self._entry_dir(key)
+            if key.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            try:
+                last_used = os.stat(entry_dir).st_mtime
+                size = sum(
+                    os.stat(os.path.join(entry_dir, f)).st_size
+                    for f in os.listdir(entry_dir)
+                )
+            except OSError:
+                continue
+            entries.append((key, last_used, size))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self, keep: Optional[str] = None):
+        """Removes the least recently used entries, until within `max_bytes`."""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            for key, _, size in entries:
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                logger.debug("evicting cached artifact {} ({} bytes)", key, size)
+                # memory-mapped arrays that are still in use stay valid on posix
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,7 +1,7 @@
 import functools
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import Dict, Iterator, List, Set, Tuple, TypeVar, Union
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TypeVar, Union
 
 import numpy as np
 
@@ -24,28 +24,51 @@ def force_async(fn):
 
 
 def infer_bounds(stuff: Union[np.ndarray, Tuple, List]) -> Dict:
+    """
+    The [min, max] of each dimension of the data, which is either an (N, D) array
+    (or a 1D array of values, against their index), or a sequence of per-dimension
+    arrays. Arrays are reduced as-is, without being copied.
+    """
     if isinstance(stuff, np.ndarray):
-        _batch_axis_idx = 1
-        _dim_axis_idx = 0
+        if stuff.ndim == 1:
+            if len(stuff) == 0:
+                raise ValueError("Unable to infer bounds of empty data")
+            return dict(x=[0, len(stuff) - 1], y=[stuff.min(), stuff.max()])
+        if stuff.ndim != 2:
+            raise ValueError(
+                f"Unable to infer bounds for object with shape {stuff.shape}"
+            )
+        mins, maxs = np.min(stuff, axis=0), np.max(stuff, axis=0)
+        columns = [(mins[i], maxs[i]) for i in range(stuff.shape[1])]
     elif isinstance(stuff, (tuple, List)):
-        _batch_axis_idx = 0
-        _dim_axis_idx = 1
+        columns = []
+        for column in stuff:
+            column = np.asarray(column)
+            if column.ndim != 1:
+                raise ValueError(
+                    f"Unable to infer bounds for object with shape {column.shape}"
+                )
+            columns.append((column.min(), column.max()))
     else:
         raise ValueError(f"Unable to infer bounds for object with type {type(stuff)}")
 
-    _data = np.array(stuff)
-    if len(_data.shape) != 2:
-        raise ValueError(f"Unable to infer bounds for object with shape {_data.shape}")
-
     bounds = dict()
-    min = np.min(_data, axis=_dim_axis_idx)
-    max = np.max(_data, axis=_dim_axis_idx)
-
-    for dim, i in zip(("x", "y", "z"), range(_data.shape[_batch_axis_idx])):
-        bounds[dim] = [min[i], max[i]]
+    for dim, (low, high) in zip(("x", "y", "z"), columns):
+        bounds[dim] = [low, high]
     return bounds
 
 
+def union_bounds(*bounds: Dict) -> Dict:
+    """The bounds (as given by `infer_bounds`) that enclose all of the given ones."""
+    union = dict()
+    for _bounds in bounds:
+        for dim, (low, high) in _bounds.items():
+            if dim in union:
+                low, high = min(union[dim][0], low), max(union[dim][1], high)
+            union[dim] = [low, high]
+    return union
+
+
 class AxisScaler:
     def __init__(self, scale_factor: float) -> None:
         self.min: float = 0
@@ -153,6 +176,22 @@ def map_array_to_0_1(array: np.ndarray) -> np.ndarray:
     return (array - array.min()) / (array.max() - array.min())
 
 
+def camera_lod_state(view) -> Tuple[Optional[Tuple[float, ...]], float]:
+    """
+    The eye of the view's camera (None if orthographic), and the number of pixels
+    that one unit at a distance of one unit (or, if orthographic, at any
+    distance) spans on screen. Used to pick levels of detail.
+    """
+    camera = view.camera
+    height = view.size[1]
+    fov = getattr(camera, "fov", 0)
+    if fov > 0:
+        eye = tuple(camera.transform.map([0, 0, 0, 1])[:3])
+        return eye, height / (2 * np.tan(np.radians(fov) / 2))
+    scale = getattr(camera, "scale_factor", None) or camera.rect.height
+    return None, height / scale
+
+
 U = TypeVar("U")
 
 
@@ -0,0 +1,200 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .aggregator import grow_to_fit
+
+
+def series_to_xy(data) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    The (x, y) of the data given to a line plot, or None if it is not a series
+    that can be decimated (e.g. 3D, or x is not sorted).
+    """
+    if isinstance(data, (tuple, list)) and len(data) == 2:
+        x, y = np.asarray(data[0]), np.asarray(data[1])
+    else:
+        data = np.asarray(data)
+        if data.ndim == 1:
+            x, y = np.arange(len(data)), data
+        elif data.ndim == 2 and data.shape[1] == 2:
+            x, y = data[:, 0], data[:, 1]
+        else:
+            return None
+    if x.ndim != 1 or x.shape != y.shape or np.any(np.diff(x) < 0):
+        return None
+    return x, y
+
+
+def minmax_per_bucket(
+    x: np.ndarray, y: np.ndarray, x_range: Tuple[float, float], num_buckets: int
+) -> np.ndarray:
+    """
+    Splits the x range into equally wide buckets (e.g. one per pixel column),
+    and returns the (sorted) indices of the min and max sample of each bucket.
+    """
+    if len(x) == 0:
+        return np.empty(0, dtype=np.intp)
+    width = (x_range[1] - x_range[0]) or 1
+    bucket = ((x - x_range[0]) / width * num_buckets).astype(np.intp)
+    np.clip(bucket, 0, num_buckets - 1, out=bucket)
+    # within each bucket (x is sorted, so are the buckets), sort by y
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    lasts = np.r_[firsts[1:] - 1, len(order) - 1]
+    return np.unique(np.concatenate([order[firsts], order[lasts]]))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, num_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the (sorted) indices of
+    the `num_points` samples that best keep the visual shape of the series.
+    """
+    n = len(x)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+    # the first and last samples are always kept, the rest is split in buckets
+    edges = np.linspace(1, n - 1, num_points - 1).astype(np.intp)
+    selected = np.empty(num_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(num_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        # the next bucket's average is the third vertex of the triangles
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+class DecimationPyramid:
+    """
+    A multi-level min/max summary of a series (with sorted x). Level `k` holds,
+    for every bucket of `factor ** (k + 1)` consecutive samples, the indices of its
+    min and max sample. It is built once (in O(n)), and any view of the series is
+    then decimated from the coarsest level that still has enough buckets within
+    the view, so neither zooming in nor out rescans the raw data.
+
+    Appending to the series (see `extend`) only re-reduces the buckets that the new
+    samples fall in.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, factor: int = 4):
+        self.x = x
+        self.y = y
+        self.factor = factor
+        # (bucket size, min indices, max indices), from the finest to the coarsest
+        self.levels: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        # the (growable) buffers that the min and max indices of the levels live in
+        self._buffers: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.__reduce_from(0)
+
+    def extend(self, x: np.ndarray, y: np.ndarray):
+        """
+        Replaces the series with a longer one that starts with the current one
+        (e.g. the same buffer, after appending to it), in amortised O(new samples).
+        """
+        num_previous = len(self.x)
+        self.x = x
+        self.y = y
+        self.__reduce_from(num_previous)
+
+    def __reduce_from(self, first_changed: int):
+        """Re-reduces the buckets of all levels from the given sample onward."""
+        num_lower = len(self.y)
+        lower = None
+        bucket_size = 1
+        level = 0
+        while num_lower > self.factor:
+            first_bucket = first_changed // (bucket_size * self.factor)
+            start = first_bucket * self.factor
+            if lower is None:
+                lower_min = lower_max = np.arange(start, len(self.y))
+            else:
+                lower_min, lower_max = lower[0][start:], lower[1][start:]
+            num = -(-num_lower // self.factor)
+
+            if level == len(self._buffers):
+                self._buffers.append((np.empty(0, np.intp), np.empty(0, np.intp)))
+            min_buffer, max_buffer = (grow_to_fit(b, num) for b in self._buffers[level])
+            min_buffer[first_bucket:num] = self.__reduce(lower_min, np.argmin)
+            max_buffer[first_bucket:num] = self.__reduce(lower_max, np.argmax)
+            self._buffers[level] = min_buffer, max_buffer
+
+            bucket_size *= self.factor
+            reduced = bucket_size, min_buffer[:num], max_buffer[:num]
+            if level == len(self.levels):
+                self.levels.append(reduced)
+            else:
+                self.levels[level] = reduced
+            lower = reduced[1:]
+            num_lower = num
+            level += 1
+
+    def __reduce(self, idx: np.ndarray, arg_func) -> np.ndarray:
+        # pad (with the last sample) to a multiple of the factor
+        remainder = -len(idx) % self.factor
+        if remainder:
+            idx = np.r_[idx, np.repeat(idx[-1], remainder)]
+        idx = idx.reshape(-1, self.factor)
+        picked = arg_func(self.y[idx], axis=1)
+        return idx[np.arange(len(idx)), picked]
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def candidates(self, start: int, stop: int, num_buckets: int) -> np.ndarray:
+        """
+        The (sorted) indices of the samples within [start, stop) that could be
+        extremes of `num_buckets` buckets, i.e. about 2 to 2 * factor per bucket.
+        """
+        count = stop - start
+        level = None
+        for bucket_size, min_idx, max_idx in self.levels:
+            if count // bucket_size < num_buckets:
+                break
+            level = bucket_size, min_idx, max_idx
+        if level is None:
+            return np.arange(start, stop)
+        bucket_size, min_idx, max_idx = level
+        first, last = start // bucket_size, -(-stop // bucket_size)
+        idx = np.concatenate(
+            [[start], min_idx[first:last], max_idx[first:last], [stop - 1]]
+        )
+        return np.unique(np.clip(idx, start, stop - 1))
+
+    def decimate(
+        self,
+        x_range: Optional[Tuple[float, float]],
+        num_buckets: int,
+        method: str = "minmax",
+    ) -> np.ndarray:
+        """
+        The (sorted) indices of the samples to draw for the given x range, with
+        one sample just outside of each side, such that the line reaches the edges
+        of the view.
+        """
+        if x_range is None:
+            start, stop = 0, len(self.x)
+            x_range = self.x[0], self.x[-1]
+        else:
+            start = max(int(np.searchsorted(self.x, x_range[0], "left")) - 1, 0)
+            stop = min(int(np.searchsorted(self.x, x_range[1], "right")) + 1, len(self))
+        if stop - start <= 2 * num_buckets:
+            return np.arange(start, stop)
+
+        idx = self.candidates(start, stop, num_buckets)
+        if method == "minmax":
+            picked = minmax_per_bucket(self.x[idx], self.y[idx], x_range, num_buckets)
+        elif method == "lttb":
+            picked = lttb(self.x[idx], self.y[idx], 2 * num_buckets)
+        else:
+            raise ValueError(f"Unknown decimation method '{method}'")
+        # always keep the samples at the edges
+        return np.unique(np.r_[idx[0], idx[picked], idx[-1]])
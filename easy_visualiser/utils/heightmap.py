@@ -0,0 +1,108 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+# the default sample type of raw heightmaps, by their extension
+RAW_DTYPES = {".raw": "<u2", ".r16": "<u2", ".r32": "<f4", ".bin": "<f4"}
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+
+class Heightmap:
+    """
+    A 2d grid of heights, possibly memory-mapped from a file. Only the samples
+    that get displayed are ever read, and their x / y (i.e. the row / column
+    indices) are generated from the stride, rather than materialised for the
+    whole grid.
+    """
+
+    def __init__(self, z: np.ndarray):
+        if z.ndim != 2:
+            raise ValueError(f"A heightmap must be 2d, but got shape {z.shape}")
+        self.z = z
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        shape: Optional[Tuple[int, int]] = None,
+        dtype: Optional[np.dtype] = None,
+    ) -> "Heightmap":
+        """
+        Memory-maps `.npy`, raw (`.raw`, `.r16`, `.r32`, `.bin`) and (if tifffile
+        is installed, and they are uncompressed) tiff heightmaps. Other images
+        are decoded as greyscale.
+
+        :param shape: the shape of a raw heightmap. Assumed to be square if None.
+        :param dtype: the sample type of a raw heightmap, if not its default.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        z = None
+        if ext == ".npy":
+            z = np.load(path, mmap_mode="r")
+        elif ext in RAW_DTYPES:
+            z = cls.__memmap_raw(path, shape, np.dtype(dtype or RAW_DTYPES[ext]))
+        elif ext in TIFF_EXTENSIONS:
+            z = cls.__memmap_tiff(path)
+        if z is not None and z.ndim == 2:
+            return cls(z)
+        if z is not None:
+            logger.debug("{} is not single channel, decoding it as greyscale", path)
+        with Image.open(path) as im:
+            return cls(np.array(im.convert("L")))
+
+    @staticmethod
+    def __memmap_raw(
+        path: str, shape: Optional[Tuple[int, int]], dtype: np.dtype
+    ) -> np.ndarray:
+        if shape is None:
+            num = os.path.getsize(path) // dtype.itemsize
+            side = int(round(np.sqrt(num)))
+            if side * side != num:
+                raise ValueError(
+                    f"Unable to infer the shape of {path} ({num} samples), "
+                    f"as it is not square"
+                )
+            shape = side, side
+        return np.memmap(path, dtype=dtype, mode="r", shape=tuple(shape))
+
+    @staticmethod
+    def __memmap_tiff(path: str) -> Optional[np.ndarray]:
+        try:
+            import tifffile
+        except ModuleNotFoundError:
+            logger.warning("tifffile is not installed, {} gets decoded in full", path)
+            return None
+        try:
+            return tifffile.memmap(path, mode="r")
+        except ValueError:
+            # e.g. compressed, or not contiguous
+            logger.debug("{} can not be memory-mapped, decoding it in full", path)
+            return None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.z.shape
+
+    @property
+    def size(self) -> int:
+        return self.z.size
+
+    def stride_for(self, max_samples: int) -> int:
+        """The smallest stride that displays at most (about) `max_samples`."""
+        return max(1, int(np.ceil(np.sqrt(self.size / max_samples))))
+
+    def strided(self, every: int) -> np.ndarray:
+        """Reads (only) every `every`-th row and column."""
+        return np.array(self.z[::every, ::every])
+
+    def coordinates(self, every: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The x (row) and y (column) of the strided samples, as 2d views."""
+        rows, cols = (np.arange(0, n, every) for n in self.shape)
+        shape = len(rows), len(cols)
+        return (
+            np.broadcast_to(rows[:, None], shape),
+            np.broadcast_to(cols[None, :], shape),
+        )
@@ -0,0 +1,70 @@
+import glob
+import importlib
+import re
+from os.path import basename, isfile, join
+from typing import Any, Dict, List, Mapping
+
+
+class LazyRegistry:
+    """
+    Resolves names of a package to the submodule that defines them, and only
+    imports that submodule on the first access. Meant to be used within the
+    package's module level `__getattr__` and `__dir__`, e.g.
+
+        _registry = LazyRegistry(__name__, globals(), {"VisualisablePoints": "visualisable_points"})
+        __getattr__ = _registry.getattr
+        __dir__ = _registry.dir
+    """
+
+    def __init__(
+        self, package: str, namespace: Dict[str, Any], names: Mapping[str, str]
+    ):
+        self.package = package
+        self.namespace = namespace
+        self.names: Dict[str, str] = dict(names)
+
+    def getattr(self, name: str) -> Any:
+        try:
+            module_name = self.names[name]
+        except KeyError:
+            raise AttributeError(
+                f"module '{self.package}' has no attribute '{name}'"
+            ) from None
+        module = importlib.import_module(f"{self.package}.{module_name}")
+        obj = module if module_name == name else getattr(module, name)
+        # cache it, such that __getattr__ won't be called again for this name
+        self.namespace[name] = obj
+        return obj
+
+    def dir(self) -> List[str]:
+        return sorted(set(self.namespace) | set(self.names))
+
+
+def gather_modules(folder: str) -> List[str]:
+    """Names of all (non-init) python modules within the given folder."""
+    return sorted(
+        basename(f)[:-3]
+        for f in glob.glob(join(folder, "*.py"))
+        if isfile(f) and not f.endswith("__init__.py")
+    )
+
+
+def scan_module_classes(folder: str, prefix: str) -> Dict[str, str]:
+    """
+    Without importing anything, find all top-level classes that are defined in
+    the python modules of the given folder, with a name starting with the given
+    prefix. Returns a mapping of class name to the module that defines it.
+    """
+    pattern = re.compile(rf"^class\s+({re.escape(prefix)}\w*)\b", re.MULTILINE)
+    found: Dict[str, str] = dict()
+    for module_name in gather_modules(folder):
+        with open(join(folder, f"{module_name}.py"), "r", encoding="utf-8") as f:
+            source = f.read()
+        for class_name in pattern.findall(source):
+            if class_name in found:
+                raise RuntimeError(
+                    f"A class with the name {class_name} already exists in "
+                    f"{found[class_name]}!"
+                )
+            found[class_name] = module_name
+    return found
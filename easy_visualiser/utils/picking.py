@@ -0,0 +1,218 @@
+import itertools
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def as_points3d(points: np.ndarray) -> np.ndarray:
+    points = np.asarray(points)
+    if points.ndim != 2 or points.shape[1] not in (2, 3):
+        raise ValueError(f"Unable to index points with shape {points.shape}")
+    if points.shape[1] == 2:
+        points = np.column_stack([points, np.zeros(len(points), points.dtype)])
+    return points
+
+
+class PointIndex:
+    """
+    A uniform grid over points, for picking them with a ray (e.g. the one under
+    the mouse). The points are sorted by cell, such that the points of a cell are
+    contiguous, and the (non-empty) cells are looked up with a binary search.
+
+    The grid resolution is chosen such that non-empty cells hold about
+    `target_occupancy` points, whether the points fill a volume or a surface.
+    """
+
+    # cell ids must fit in an int64
+    max_resolution = 2**20
+    # resolution of the dense occupancy grid, used to skip the empty parts of a ray
+    coarse_resolution = 128
+
+    def __init__(self, points: np.ndarray, target_occupancy: int = 64):
+        self.points = as_points3d(points)
+        n = len(self.points)
+        if n == 0:
+            raise ValueError("Unable to index zero points")
+        self.lower = self.points.min(axis=0).astype(np.float64)
+        self.upper = self.points.max(axis=0).astype(np.float64)
+        extent = float((self.upper - self.lower).max()) or 1.0
+
+        self.resolution = self.__choose_resolution(extent, target_occupancy)
+        self.cell_size = extent / self.resolution
+        ids = self.__cell_ids(self.__cells_of(self.points))
+        self.order = np.argsort(ids, kind="stable")
+        self.cell_ids, self.cell_starts = np.unique(ids[self.order], return_index=True)
+        self.cell_stops = np.r_[self.cell_starts[1:], n]
+
+        # which coarse cells have points in or next to them
+        self.coarse_factor = -(-self.resolution // self.coarse_resolution)
+        coarse_res = -(-self.resolution // self.coarse_factor)
+        occupied = np.zeros((coarse_res + 2,) * 3, dtype=bool)
+        coarse = self.__decode(self.cell_ids) // self.coarse_factor + 1
+        for offset in np.ndindex(3, 3, 3):
+            shifted = coarse + np.array(offset) - 1
+            occupied[shifted[:, 0], shifted[:, 1], shifted[:, 2]] = True
+        self.coarse_occupied = occupied[1:-1, 1:-1, 1:-1]
+
+    def __choose_resolution(self, extent: float, target_occupancy: int) -> int:
+        # estimated on a subsample, as the points might be many
+        sample = self.points[:: max(len(self.points) // 100_000, 1)]
+        scale = len(self.points) / len(sample)
+        resolution = max(int(np.cbrt(len(self.points) / target_occupancy)), 1)
+        while resolution < self.max_resolution:
+            self.resolution, self.cell_size = resolution, extent / resolution
+            num_cells = len(np.unique(self.__cell_ids(self.__cells_of(sample))))
+            if (
+                len(sample) * scale / num_cells <= target_occupancy
+                # too few samples per cell to tell any more
+                or num_cells * 2 > len(sample)
+            ):
+                break
+            resolution = min(resolution * 2, self.max_resolution)
+        return resolution
+
+    def __cells_of(self, points: np.ndarray) -> np.ndarray:
+        cells = np.floor((points - self.lower) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.resolution - 1)
+
+    def __cell_ids(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[:, 0] * self.resolution + cells[:, 1]) * self.resolution + cells[
+            :, 2
+        ]
+
+    def __decode(self, ids: np.ndarray) -> np.ndarray:
+        res = self.resolution
+        return np.column_stack([ids // (res * res), ids // res % res, ids % res])
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __clip_ray(
+        self, origin: np.ndarray, direction: np.ndarray, margin: float
+    ) -> Optional[Tuple[float, float]]:
+        """The (t_min, t_max) of the ray within the (enlarged) bounds."""
+        lower, upper = self.lower - margin, self.upper + margin
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t1 = (lower - origin) / direction
+            t2 = (upper - origin) / direction
+        parallel = direction == 0
+        if np.any(parallel & ((origin < lower) | (origin > upper))):
+            return None
+        t_near = np.where(parallel, -np.inf, np.minimum(t1, t2)).max()
+        t_far = np.where(parallel, np.inf, np.maximum(t1, t2)).min()
+        t_near = max(t_near, 0.0)
+        if t_near > t_far:
+            return None
+        return t_near, t_far
+
+    def candidates(self, cells: np.ndarray) -> np.ndarray:
+        """The indices of the points within the given (N, 3) cells."""
+        in_grid = np.all((cells >= 0) & (cells < self.resolution), axis=1)
+        ids = self.__cell_ids(cells[in_grid])
+        found = np.searchsorted(self.cell_ids, ids)
+        valid = found < len(self.cell_ids)
+        found, ids = found[valid], ids[valid]
+        found = np.unique(found[self.cell_ids[found] == ids])
+        if len(found) == 0:
+            return np.empty(0, dtype=np.intp)
+        starts, stops = self.cell_starts[found], self.cell_stops[found]
+        lengths = stops - starts
+        # concatenated aranges of all the (start, stop)
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        return self.order[np.repeat(starts, lengths) + offsets]
+
+    def nearest_to_ray(
+        self,
+        origin: np.ndarray,
+        direction: np.ndarray,
+        radius: float,
+        radius_slope: float = 0.0,
+    ) -> Optional[Tuple[int, float]]:
+        """
+        The front-most point that is within `radius + radius_slope * t` of the
+        ray `origin + t * direction` (i.e. within a cone, such as the pixels around
+        the mouse in a perspective view). Returns its index and `t`, or None.
+        """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        direction = direction / np.linalg.norm(direction)
+
+        # the widest the cone gets at any point (which is no further away than the
+        # farthest corner of the bounds)
+        corners = np.array(list(itertools.product(*zip(self.lower, self.upper))))
+        farthest = np.linalg.norm(corners - origin, axis=1).max()
+        max_radius = radius + max(radius_slope, 0) * farthest
+        span = self.__clip_ray(origin, direction, margin=max_radius)
+        if span is None:
+            return None
+        t_near, t_far = span
+
+        # sample the ray every cell; every cell that the ray (or the cone around
+        # it) passes through neighbours one of the samples' cells
+        num_samples = int((t_far - t_near) / self.cell_size) + 2
+        ts = np.linspace(t_near, t_far, num_samples)
+        sample_cells = self.__cells_of(origin + ts[:, None] * direction)
+        reach = 1 + int(np.ceil(max_radius / self.cell_size))
+        if reach <= self.coarse_factor:
+            # skip the samples that are nowhere near any point
+            coarse = sample_cells // self.coarse_factor
+            near = self.coarse_occupied[coarse[:, 0], coarse[:, 1], coarse[:, 2]]
+            ts, sample_cells = ts[near], sample_cells[near]
+            if len(ts) == 0:
+                return None
+
+        if len(ts) * (2 * reach + 1) ** 3 > len(self.cell_ids):
+            # the cone covers (about) the whole grid, e.g. when zoomed far out
+            return self.__nearest_of(
+                np.arange(len(self.points)), origin, direction, radius, radius_slope
+            )
+
+        steps = np.arange(-reach, reach + 1)
+        neighbours = np.stack(np.meshgrid(steps, steps, steps), -1).reshape(-1, 3)
+        # only the cells that can be within reach of the sample's part of the ray
+        gaps = np.maximum(np.abs(neighbours) - 1, 0) * self.cell_size
+        neighbours = neighbours[
+            np.linalg.norm(gaps, axis=1) <= max_radius + self.cell_size / 2
+        ]
+        # how much closer than its sample a point in a neighbouring cell can be
+        slack = (reach + 1) * self.cell_size * np.sqrt(3)
+        best = None
+        # from the front, in growing chunks, until nothing closer can be found
+        start, chunk = 0, 4
+        while start < len(ts):
+            if best is not None and ts[start] - slack > best[1]:
+                break
+            stop = start + chunk
+            cells = sample_cells[start:stop, None, :] + neighbours[None, :, :]
+            found = self.__nearest_of(
+                self.candidates(cells.reshape(-1, 3)),
+                origin,
+                direction,
+                radius,
+                radius_slope,
+            )
+            if found is not None and (best is None or found[1] < best[1]):
+                best = found
+            start, chunk = stop, chunk * 2
+        return best
+
+    def __nearest_of(
+        self,
+        idx: np.ndarray,
+        origin: np.ndarray,
+        direction: np.ndarray,
+        radius: float,
+        radius_slope: float,
+    ) -> Optional[Tuple[int, float]]:
+        if len(idx) == 0:
+            return None
+        offsets = self.points[idx] - origin
+        t = offsets @ direction
+        squared_distance = np.einsum("ij,ij->i", offsets, offsets) - t * t
+        within = (t >= 0) & (squared_distance <= (radius + radius_slope * t) ** 2)
+        if not np.any(within):
+            return None
+        best = np.flatnonzero(within)[np.argmin(t[within])]
+        return int(idx[best]), float(t[best])
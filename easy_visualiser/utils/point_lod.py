@@ -0,0 +1,223 @@
+import bisect
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# morton codes interleave 3 x 21 bits into an uint64
+MAX_CODE_BITS = 21
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Inserts two zero bits after each of the lower 21 bits."""
+    v = v.astype(np.uint64) & 0x1FFFFF
+    v = (v | v << 32) & 0x1F00000000FFFF
+    v = (v | v << 16) & 0x1F0000FF0000FF
+    v = (v | v << 8) & 0x100F00F00F00F00F
+    v = (v | v << 4) & 0x10C30C30C30C30C3
+    v = (v | v << 2) & 0x1249249249249249
+    return v
+
+
+def _compact_bits(v: np.ndarray) -> np.ndarray:
+    """The inverse of `_spread_bits`."""
+    v = v & 0x1249249249249249
+    v = (v | v >> 2) & 0x10C30C30C30C30C3
+    v = (v | v >> 4) & 0x100F00F00F00F00F
+    v = (v | v >> 8) & 0x1F0000FF0000FF
+    v = (v | v >> 16) & 0x1F00000000FFFF
+    v = (v | v >> 32) & 0x1FFFFF
+    return v
+
+
+def morton_codes(cells: np.ndarray) -> np.ndarray:
+    """Morton (z-order) codes of (N, 3) integer cells, of at most 21 bits each."""
+    return (
+        _spread_bits(cells[:, 0])
+        | _spread_bits(cells[:, 1]) << 1
+        | _spread_bits(cells[:, 2]) << 2
+    )
+
+
+def morton_cells(codes: np.ndarray) -> np.ndarray:
+    """The inverse of `morton_codes`."""
+    codes = codes.astype(np.uint64)
+    return np.column_stack([_compact_bits(codes >> i) for i in range(3)])
+
+
+class PointLOD:
+    """
+    A level-of-detail hierarchy (an octree) over a point cloud. A node of level
+    `L` covers 1/8**L of the bounding cube, and holds (about) one random point for
+    each cell of a `2**sample_bits` grid over it, out of the points that were not
+    already taken by its ancestors. Hence, drawing a node together with all of its
+    ancestors shows its region at the node's density, and every point belongs to
+    exactly one node.
+
+    The points are reordered such that each node's points are contiguous.
+    """
+
+    def __init__(
+        self,
+        pos: np.ndarray,
+        colors: Optional[np.ndarray] = None,
+        sample_bits: int = 5,
+        max_depth: int = 12,
+        seed: int = 0,
+    ):
+        pos = np.asarray(pos)
+        if pos.ndim != 2 or pos.shape[1] not in (2, 3) or len(pos) == 0:
+            raise ValueError(f"Unable to build a LOD of points with shape {pos.shape}")
+        max_depth = min(max_depth, MAX_CODE_BITS - sample_bits)
+        self.sample_bits = sample_bits
+        bits = max_depth + sample_bits
+
+        self.origin = pos.min(axis=0).astype(np.float64)
+        self.extent = float((pos.max(axis=0) - self.origin).max()) or 1.0
+        cells = np.empty((len(pos), 3), dtype=np.uint64)
+        cells[:, 2] = 0
+        scale = (2**bits) / self.extent
+        for i in range(pos.shape[1]):
+            cell = (pos[:, i] - self.origin[i]) * scale
+            cells[:, i] = np.clip(cell, 0, 2**bits - 1)
+        codes = morton_codes(cells)
+        del cells
+
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        rng = np.random.default_rng(seed)
+
+        # indices (into the sorted codes) of the points that are not taken yet
+        remaining = np.arange(len(codes))
+        taken: List[np.ndarray] = []
+        levels, keys, counts = [], [], []
+        for level in range(max_depth + 1):
+            if level == max_depth:
+                # the deepest level takes whatever is left
+                picked = remaining
+                remaining = remaining[:0]
+            else:
+                sample_cells = codes[remaining] >> np.uint64(
+                    3 * (bits - level - sample_bits)
+                )
+                starts = self.__run_starts(sample_cells)
+                lengths = np.diff(np.r_[starts, len(remaining)])
+                # a random point of each sample cell
+                pick = starts + (rng.random(len(starts)) * lengths).astype(np.intp)
+                picked = remaining[pick]
+                keep = np.ones(len(remaining), dtype=bool)
+                keep[pick] = False
+                remaining = remaining[keep]
+
+            # picked is sorted by code, hence grouped by node
+            node_keys = codes[picked] >> np.uint64(3 * (bits - level))
+            starts = self.__run_starts(node_keys)
+            taken.append(order[picked])
+            levels.append(np.full(len(starts), level, dtype=np.int8))
+            keys.append(node_keys[starts])
+            counts.append(np.diff(np.r_[starts, len(picked)]))
+            if len(remaining) == 0:
+                break
+        del codes, order, remaining
+
+        taken = np.concatenate(taken)
+        self.positions = np.zeros((len(taken), 3), dtype=np.float32)
+        self.positions[:, : pos.shape[1]] = pos[taken]
+        self.colors = None
+        if colors is not None and np.ndim(colors) == 2 and len(colors) == len(pos):
+            self.colors = np.asarray(colors, dtype=np.float32)[taken]
+
+        self.node_level = np.concatenate(levels)
+        counts = np.concatenate(counts)
+        self.node_stop = np.cumsum(counts)
+        self.node_start = self.node_stop - counts
+        self.node_size = self.extent / 2.0 ** self.node_level.astype(np.float64)
+        node_cells = morton_cells(np.concatenate(keys)).astype(np.float64)
+        self.node_center = self.origin + (node_cells + 0.5) * self.node_size[:, None]
+        if pos.shape[1] == 2:
+            self.node_center[:, 2] = 0
+
+    @staticmethod
+    def __run_starts(values: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_level)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def node_counts(self) -> np.ndarray:
+        return self.node_stop - self.node_start
+
+    def select(
+        self,
+        budget: int,
+        eye: Optional[np.ndarray] = None,
+        focal: float = 1.0,
+        min_spacing: float = 1.0,
+    ) -> np.ndarray:
+        """
+        The nodes to draw, i.e. those whose points are (on screen) at least
+        `min_spacing` pixels apart, from the most detailed on screen down, within
+        the point budget.
+
+        :param eye: the camera's position, or None for an orthographic camera.
+        :param focal: the number of pixels that one unit at a distance of one unit
+            (or, for an orthographic camera, at any distance) spans on screen.
+        """
+        spacing = self.node_size / 2**self.sample_bits * focal
+        if eye is not None:
+            # distance to the node's bounding sphere, which contains the spheres of
+            # its children. So a node never comes after any of its descendants.
+            radius = self.node_size * (np.sqrt(3) / 2)
+            distance = np.linalg.norm(self.node_center - eye, axis=1) - radius
+            spacing /= np.maximum(distance, 1e-6 * self.extent)
+        order = np.argsort(-spacing, kind="stable")
+        order = order[spacing[order] >= min_spacing]
+        selected = order[np.cumsum(self.node_counts()[order]) <= budget]
+        if len(selected) == 0:
+            # the root is always drawn, even if it is over the budget on its own
+            return np.zeros(1, dtype=np.intp)
+        return selected
+
+
+class RowAllocator:
+    """
+    A first-fit allocator of contiguous row ranges within a buffer of `capacity`
+    rows (e.g. a vertex buffer that nodes get streamed in and out of).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # sorted, non-adjacent free ranges as (start, stop)
+        self._free: List[Tuple[int, int]] = [(0, capacity)] if capacity > 0 else []
+
+    @property
+    def num_free(self) -> int:
+        return sum(stop - start for start, stop in self._free)
+
+    def allocate(self, num: int) -> Optional[int]:
+        """The start of `num` (now used) rows, or None if no free range fits."""
+        for i, (start, stop) in enumerate(self._free):
+            if stop - start >= num:
+                if stop - start == num:
+                    del self._free[i]
+                else:
+                    self._free[i] = (start + num, stop)
+                return start
+        return None
+
+    def free(self, start: int, num: int):
+        stop = start + num
+        i = bisect.bisect(self._free, (start, stop))
+        # merge with the neighbouring free ranges
+        if i < len(self._free) and self._free[i][0] == stop:
+            stop = self._free.pop(i)[1]
+        if i > 0 and self._free[i - 1][1] == start:
+            i -= 1
+            start = self._free.pop(i)[0]
+        self._free.insert(i, (start, stop))
+
+    def clear(self):
+        self._free = [(0, self.capacity)] if self.capacity > 0 else []
@@ -0,0 +1,307 @@
+import heapq
+import itertools
+from typing import Callable, Container, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# (depth, row, column) of a quadtree node
+NodeKey = Tuple[int, int, int]
+# the fields of a tile (xs, ys, zs and optionally colors), as 2d (or 3d) arrays
+Fields = Dict[str, np.ndarray]
+
+# the sides of a tile, as the axis that they are across, and which end they are at
+SIDES = ((0, 0), (0, -1), (1, 0), (1, -1))
+
+
+def level_positions(size: int, level: int) -> np.ndarray:
+    """The indices that a level samples: every `2**level`-th, plus the last."""
+    return np.unique(np.r_[np.arange(0, size, 2**level), size - 1])
+
+
+class GridPyramid:
+    """
+    Decimated levels of a height grid, where level `k` samples every `2**k`-th
+    row and column (plus the last ones). The samples of a level are a subset of
+    those of any finer level, so tiles of different levels line up.
+
+    Each level is gathered from the previous one, hence the full resolution grid
+    only gets read once, and a coarse tile is a small block of its level rather
+    than a strided read over the whole grid.
+
+    x and y are the row and column indices, unless given.
+    """
+
+    def __init__(
+        self,
+        zs: np.ndarray,
+        xs: Optional[np.ndarray] = None,
+        ys: Optional[np.ndarray] = None,
+        colors: Optional[np.ndarray] = None,
+        num_levels: Optional[int] = None,
+    ):
+        self.shape = zs.shape[:2]
+        if min(self.shape) < 2:
+            raise ValueError(f"Unable to tile a grid of shape {zs.shape}")
+        fields = dict(zs=zs, xs=xs, ys=ys, colors=colors)
+        fields = {name: array for name, array in fields.items() if array is not None}
+        for name, array in fields.items():
+            if array.shape[:2] != self.shape:
+                raise ValueError(
+                    f"The shape of {name} {array.shape} does not match {zs.shape}"
+                )
+        if num_levels is None:
+            num_levels = int(np.ceil(np.log2(max(self.shape) - 1))) + 1
+        self.z_range = float(np.nanmin(zs)), float(np.nanmax(zs))
+
+        self.positions: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.levels: List[Fields] = []
+        for level in range(num_levels):
+            rows, cols = (level_positions(size, level) for size in self.shape)
+            if level > 0:
+                previous_rows, previous_cols = self.positions[-1]
+                index = np.ix_(
+                    np.searchsorted(previous_rows, rows),
+                    np.searchsorted(previous_cols, cols),
+                )
+                fields = {name: array[index] for name, array in fields.items()}
+            self.positions.append((rows, cols))
+            self.levels.append(fields)
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.levels)
+
+    def __span(self, positions: np.ndarray, start: int, stop: int) -> slice:
+        """The samples from the last one at or before `start`, to the first one at
+        or after `stop`."""
+        first = int(np.searchsorted(positions, start, "right")) - 1
+        last = int(np.searchsorted(positions, stop, "left"))
+        return slice(max(first, 0), min(last, len(positions) - 1) + 1)
+
+    def block(
+        self, level: int, rows: Tuple[int, int], cols: Tuple[int, int]
+    ) -> Tuple[np.ndarray, np.ndarray, Fields]:
+        """
+        The samples of the level within the given (inclusive) ranges of rows and
+        columns, as their positions and their fields (with xs and ys).
+        """
+        row_positions, col_positions = self.positions[level]
+        row_span = self.__span(row_positions, *rows)
+        col_span = self.__span(col_positions, *cols)
+        row_positions = row_positions[row_span]
+        col_positions = col_positions[col_span]
+        fields = {
+            name: array[row_span, col_span]
+            for name, array in self.levels[level].items()
+        }
+        self.__add_coordinates(fields, row_positions, col_positions)
+        return row_positions, col_positions, fields
+
+    def line(
+        self, level: int, axis: int, position: int, span: Tuple[int, int]
+    ) -> Tuple[np.ndarray, Fields]:
+        """
+        The samples of the level along a row (axis 0) or a column (axis 1) at the
+        given position, within the given (inclusive) span of the other axis.
+        """
+        if axis == 0:
+            _, positions, fields = self.block(level, (position, position), span)
+        else:
+            positions, _, fields = self.block(level, span, (position, position))
+        return positions, fields
+
+    @staticmethod
+    def __add_coordinates(
+        fields: Fields, row_positions: np.ndarray, col_positions: np.ndarray
+    ):
+        shape = len(row_positions), len(col_positions)
+        if "xs" not in fields:
+            fields["xs"] = np.broadcast_to(row_positions[:, None], shape)
+        if "ys" not in fields:
+            fields["ys"] = np.broadcast_to(col_positions[None, :], shape)
+
+
+class TerrainQuadtree:
+    """
+    A quadtree of tiles over a grid pyramid. A node of depth `d` spans
+    `tile_size * 2**(max_depth - d)` rows and columns, sampled at level
+    `max_depth - d`, i.e. each tile has (at most) `tile_size + 1` vertices per
+    side, and neighbouring tiles share their border samples.
+    """
+
+    def __init__(self, pyramid: GridPyramid, tile_size: int = 64):
+        self.pyramid = pyramid
+        self.tile_size = tile_size
+        num_cells = max(pyramid.shape) - 1
+        self.max_depth = max(int(np.ceil(np.log2(num_cells / tile_size))), 0)
+        if self.max_depth >= pyramid.num_levels:
+            raise ValueError(
+                f"The pyramid needs {self.max_depth + 1} levels for tiles of "
+                f"{tile_size}, but it has {pyramid.num_levels}"
+            )
+        # node -> its (lower, upper) bounds, or None if it has no valid sample
+        self._bounds: Dict[NodeKey, Optional[Tuple[np.ndarray, np.ndarray]]] = dict()
+
+    def level_of(self, node: NodeKey) -> int:
+        return self.max_depth - node[0]
+
+    def span_of(self, node: NodeKey) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """The (inclusive) rows and columns that the node covers."""
+        depth, i, j = node
+        span = self.tile_size * 2 ** (self.max_depth - depth)
+        last_row, last_col = (size - 1 for size in self.pyramid.shape)
+        return (
+            (i * span, min((i + 1) * span, last_row)),
+            (j * span, min((j + 1) * span, last_col)),
+        )
+
+    def children_of(self, node: NodeKey) -> List[NodeKey]:
+        depth, i, j = node
+        if depth >= self.max_depth:
+            return []
+        span = self.tile_size * 2 ** (self.max_depth - depth - 1)
+        last_row, last_col = (size - 1 for size in self.pyramid.shape)
+        return [
+            (depth + 1, 2 * i + di, 2 * j + dj)
+            for di, dj in itertools.product((0, 1), (0, 1))
+            if (2 * i + di) * span < last_row and (2 * j + dj) * span < last_col
+        ]
+
+    def bounds_of(self, node: NodeKey) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if node not in self._bounds:
+            _, _, fields = self.pyramid.block(self.level_of(node), *self.span_of(node))
+            coordinates = [fields[name] for name in ("xs", "ys", "zs")]
+            valid = ~np.any([np.isnan(array) for array in coordinates], axis=0)
+            if not np.any(valid):
+                self._bounds[node] = None
+            else:
+                coordinates = [array[valid] for array in coordinates]
+                self._bounds[node] = (
+                    np.array([array.min() for array in coordinates], dtype=float),
+                    np.array([array.max() for array in coordinates], dtype=float),
+                )
+        return self._bounds[node]
+
+    def select(
+        self,
+        eye: Optional[np.ndarray] = None,
+        focal: float = 1.0,
+        max_cell_pixels: float = 4.0,
+        max_tiles: int = 256,
+        z_scale: float = 1.0,
+    ) -> List[NodeKey]:
+        """
+        The tiles to draw, which cover the whole grid. Tiles whose cells are
+        more than `max_cell_pixels` on screen get split (the worst first), until
+        within `max_tiles`.
+
+        :param eye: the camera's position, or None for an orthographic camera.
+        :param focal: the number of pixels that one unit at a distance of one unit
+            (or, for an orthographic camera, at any distance) spans on screen.
+        """
+        counter = itertools.count()
+        heap = []
+        selected = []
+
+        def push(node: NodeKey):
+            bounds = self.bounds_of(node)
+            if bounds is None:
+                # nothing to draw in there
+                return
+            lower, upper = bounds
+            z_lower, z_upper = sorted((lower[2] * z_scale, upper[2] * z_scale))
+            lower = np.r_[lower[:2], z_lower]
+            upper = np.r_[upper[:2], z_upper]
+            rows, cols = self.span_of(node)
+            num_cells = max(rows[1] - rows[0], cols[1] - cols[0]) // 2 ** self.level_of(
+                node
+            )
+            cell_size = (upper[:2] - lower[:2]).max() / max(num_cells, 1)
+            pixels = cell_size * focal
+            if eye is not None:
+                distance = np.linalg.norm(
+                    np.maximum(np.maximum(lower - eye, 0), eye - upper)
+                )
+                pixels /= max(distance, 1e-6 * cell_size)
+            heapq.heappush(heap, (-pixels, next(counter), node))
+
+        push((0, 0, 0))
+        while heap:
+            negative_pixels, _, node = heapq.heappop(heap)
+            children = self.children_of(node)
+            if (
+                -negative_pixels <= max_cell_pixels
+                or not children
+                or len(selected) + len(heap) + len(children) > max_tiles
+            ):
+                selected.append(node)
+                continue
+            for child in children:
+                push(child)
+        return selected
+
+    def coarser_sides(
+        self, node: NodeKey, selected: Container[NodeKey]
+    ) -> Tuple[Optional[int], ...]:
+        """
+        For each side of the node, the level of the selected neighbour across it
+        if that one is coarser (and hence has fewer samples along the side).
+        """
+        depth, i, j = node
+        levels = []
+        for axis, end in SIDES:
+            step = -1 if end == 0 else 1
+            ni, nj = (i + step, j) if axis == 0 else (i, j + step)
+            level = None
+            if ni >= 0 and nj >= 0:
+                # the selected ancestor (if any) of where the neighbour would be
+                for ancestor_depth in range(depth - 1, -1, -1):
+                    shift = depth - ancestor_depth
+                    if (ancestor_depth, ni >> shift, nj >> shift) in selected:
+                        level = self.max_depth - ancestor_depth
+                        break
+            levels.append(level)
+        return tuple(levels)
+
+    def tile(
+        self,
+        node: NodeKey,
+        coarser_sides: Tuple[Optional[int], ...] = (None,) * 4,
+        finish: Optional[Callable[[Fields], Fields]] = None,
+    ) -> Fields:
+        """
+        The fields of the node's tile. The samples along each side with a coarser
+        neighbour are moved onto that neighbour's edge (i.e. interpolated between
+        its samples), such that there are no cracks in between.
+
+        :param finish: turns the raw fields into the drawn ones (e.g. scales the
+            heights or maps them to colours), applied before the stitching.
+        """
+        finish = finish or (lambda fields: fields)
+        rows, cols = self.span_of(node)
+        row_positions, col_positions, fields = self.pyramid.block(
+            self.level_of(node), rows, cols
+        )
+        fields = {
+            name: np.array(array, dtype=float) for name, array in finish(fields).items()
+        }
+        for (axis, end), level in zip(SIDES, coarser_sides):
+            if level is None:
+                continue
+            across, along = (rows, cols) if axis == 0 else (cols, rows)
+            positions = col_positions if axis == 0 else row_positions
+            coarse_positions, coarse = self.pyramid.line(
+                level, axis, across[end], along
+            )
+            coarse = finish(coarse)
+            for name, array in fields.items():
+                side = array[end] if axis == 0 else array[:, end]
+                coarse_side = np.reshape(coarse[name], (len(coarse_positions), -1))
+                stitched = np.column_stack(
+                    [
+                        np.interp(positions, coarse_positions, channel)
+                        for channel in coarse_side.T
+                    ]
+                )
+                side[...] = stitched.reshape(side.shape)
+        return fields
@@ -3,28 +3,45 @@ import os
 import threading
 import time
 from types import SimpleNamespace
-from typing import Callable, Coroutine, Hashable, Iterable, List, Optional, Set, Tuple
+from typing import (
+    Callable,
+    Coroutine,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
+import numpy as np
 from vispy import app, scene
 from vispy.scene import Grid, Widget
 
+from .file_watcher import WatchedFile
+from .headless import (
+    HeadlessMode,
+    NullApplication,
+    NullCanvas,
+    create_offscreen_application,
+)
 from .input import DataSource
 from .modal_control import ModalState
+from .picking import PickingService
 from .plugin_capability import (
+    IntervalUpdatableMixin,
     PluginState,
     ToggleableMixin,
     TriggerableMixin,
     WidgetsMixin,
 )
-from .plugins import (
-    VisualisableAutoStatusBar,
-    VisualisableGridLines,
-    VisualisablePlugin,
-    VisualisablePluginInitialisationError,
-    VisualisablePrincipleAxis,
-)
+from .plugins import VisualisablePlugin, VisualisablePluginInitialisationError
+from .profiler import HotPathProfiler, callable_name, profile
+from .scheduler import EventDrivenScheduler, FrameBudgetScheduler, WakeupReason
 from .utils import ToggleableBool, topological_sort
 from .visualiser_miscs import VisualiserEasyAccesserMixin, VisualiserMiscsMixin
+from .workers import PrepareWorkerPool
 
 os.putenv("NO_AT_BRIDGE", "1")
 
@@ -42,7 +59,8 @@ import warnings
 class HookList(dict):
     def on_event(self, ev=None):
         for hook in self.values():
-            hook()
+            with profile("hook", callable_name(hook)):
+                hook()
 
     def add_hook(self, callback: Callable, identifier: Hashable = None):
         identifier = identifier or callable
@@ -137,11 +155,30 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
         bgcolor: str = "grey",
         auto_add_default_plugins: bool = True,
         type: str = "3D",
+        frame_budget: float = 0.016,
+        headless: Optional[Union[str, HeadlessMode]] = None,
+        size: Tuple[int, int] = (800, 600),
     ):
-        self.app: app.Application = app.Application()
+        """
+        :param headless: run without a window. Either "offscreen", which renders
+            with an offscreen gl backend (see `render`), or "no_gl", which skips
+            gl completely (e.g. for benchmarking the data path of plugins).
+        """
+        self.headless = None if headless is None else HeadlessMode(headless)
 
         # Display the data
-        self.canvas = scene.SceneCanvas(title=title, keys="interactive", show=True)
+        if self.headless is HeadlessMode.NO_GL:
+            self.app = NullApplication()
+            self.app.use_as_default()
+            self.canvas = NullCanvas(self.app, title=title, size=size)
+        elif self.headless is HeadlessMode.OFFSCREEN:
+            self.app: app.Application = create_offscreen_application()
+            self.canvas = scene.SceneCanvas(
+                title=title, keys="interactive", show=False, size=size, app=self.app
+            )
+        else:
+            self.app: app.Application = app.Application()
+            self.canvas = scene.SceneCanvas(title=title, keys="interactive", show=True)
         self.view = self.canvas.central_widget.add_view()
         self.view.camera = "turntable" if type == "3D" else "panzoom"
         self.view.camera.aspect = 1
@@ -150,6 +187,14 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
 
         self.current_modal = ModalState(visualiser=self)
         self.hooks = VisualiserHooks()
+        # frame timings for the profiler
+        profiler = HotPathProfiler.get_instance()
+        self.canvas.events.draw.connect(
+            lambda ev: profiler.frame_start(), position="first"
+        )
+        self.canvas.events.draw.connect(
+            lambda ev: profiler.frame_end(), position="last"
+        )
         # build grid
         self.grid: Grid = self.canvas.central_widget.add_grid(margin=grid_margin)
         # # col num just to make it on the right size (0 is left)
@@ -173,6 +218,16 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
         # self.async_loop.set_debug(True)
         asyncio.set_event_loop(self.async_loop)
 
+        # only drives the main loop when running in event driven mode
+        self.scheduler = EventDrivenScheduler(self.async_loop)
+        self._event_driven = False
+        # runs plugins' update at their own rate, within the frame budget
+        self.frame_scheduler = FrameBudgetScheduler(frame_budget=frame_budget)
+        # heavy data preparation of plugins, applied back on this thread once ready
+        self.workers = PrepareWorkerPool(on_ready=self.request_update)
+        # mouse picking of the points of the pickable plugins
+        self.picking = PickingService(self)
+
     def _initialise_new_plugins(self):
         assert self.initialised
 
@@ -226,7 +281,8 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
 
                 ###########################################################
                 # construct actual plugin
-                plugin.construct_plugin()
+                with profile("construct_plugin", plugin.name):
+                    plugin.construct_plugin()
                 # plugin.state = PluginState.OFF
                 ###########################################################
 
@@ -293,13 +349,15 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
                             mappings.callback()
                             return True
 
-            result = process()
+            with profile("keypress", ev.key.name):
+                result = process()
             self.hooks.on_keypress_finish.on_event()
             return result
 
         @self.canvas.connect
         def on_close(ev):
             self.hooks.on_visualiser_close.on_event()
+            self.workers.shutdown()
             self.__closing.set(True)
             self.async_loop.stop()
 
@@ -334,13 +392,41 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
     def register_datasource(self, data_source: DataSource):
         self._registered_datasources.append(data_source)
 
+    def request_update(self):
+        """
+        Notify the visualiser that new data had arrived, such that the plugins
+        will be updated as soon as possible. Safe to be called from any thread.
+        """
+        self.scheduler.request_update(WakeupReason.DATA)
+
+    def watch_file(self, path: str) -> WatchedFile:
+        """
+        Update the plugins whenever the given file is modified. The returned
+        watched file keeps track of the file's latest modification time.
+        """
+        return self.scheduler.watch_file(path)
+
+    def add_timer(self, interval: float, callback: Optional[Callable] = None):
+        """Update the plugins every `interval` seconds."""
+        self.scheduler.add_timer(interval, callback)
+
     def interval_update(self):
-        for plugin in self.plugins:
-            if plugin.state is PluginState.ON:
-                plugin.update()
+        self.workers.apply_ready()
+        self.frame_scheduler.run_frame(
+            plugin
+            for plugin in self.plugins
+            if plugin.state is PluginState.ON
+            and isinstance(plugin, IntervalUpdatableMixin)
+        )
         # TODO: move the above into using hooks.
         self.hooks.on_interval_update.on_event()
 
+        if self._event_driven:
+            # wake up again when the next plugin is due (or got deferred)
+            next_due = self.frame_scheduler.next_due_in()
+            if next_due is not None:
+                self.scheduler.wake_after(next_due)
+
         # ##############################
         # self.async_loop.stop()
         # self.async_loop.run_forever()
@@ -415,6 +501,12 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
     def _add_default_plugins(self):
         if not self.auto_add_default_plugins:
             return
+        from .plugins import (
+            VisualisableAutoStatusBar,
+            VisualisableGridLines,
+            VisualisablePrincipleAxis,
+        )
+
         for default_plugin_cls in [
             VisualisablePrincipleAxis,
             VisualisableGridLines,
@@ -430,26 +522,59 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
                 self.register_plugin(default_plugin_cls())
 
     async def async_yield(self):
-        await asyncio.sleep(self.async_yield_sleep_time)
+        if self._event_driven:
+            # polling tasks should not spin faster than the gui
+            await asyncio.sleep(self.scheduler.gui_poll_interval)
+        else:
+            await asyncio.sleep(self.async_yield_sleep_time)
 
-    def run(self, regular_update_interval: Optional[float] = None):
+    def run(
+        self,
+        regular_update_interval: Optional[float] = None,
+        event_driven: bool = False,
+    ):
         """
         The main function to start the visualisation window after everything had been
         set up.
+
+        If `event_driven` is set, the loop blocks until a timer, a watched file or
+        incoming data (see `request_update`) requires the plugins to be updated,
+        instead of busy spinning. `regular_update_interval` (in seconds) bounds how
+        often the plugins are updated when nothing else wakes the loop.
         """
+        self._event_driven = event_driven
 
         async def core_processing():
+            last_update = time.monotonic()
             while self:
-                app.process_events()
-                self.interval_update()  # initial update
+                self.app.process_events()
+                if (
+                    regular_update_interval is None
+                    or time.monotonic() - last_update >= regular_update_interval
+                ):
+                    last_update = time.monotonic()
+                    self.interval_update()
                 await self.async_yield()
 
+        async def event_driven_processing():
+            self.scheduler.start()
+            while self:
+                self.app.process_events()
+                if await self.scheduler.wait():
+                    self.interval_update()
+            self.scheduler.stop()
+
         # loop = asyncio.get_event_loop() # Here
         # loop = asyncio.new_event_loop()
         # asyncio.set_event_loop(loop)
 
         self.interval_update()  # initial update
-        self.async_loop.create_task(core_processing())
+        if event_driven:
+            if regular_update_interval is not None:
+                self.add_timer(regular_update_interval)
+            self.async_loop.create_task(event_driven_processing())
+        else:
+            self.async_loop.create_task(core_processing())
         self.async_loop.run_forever()
 
         self.thread_exit_event.set()
@@ -457,4 +582,17 @@ class Visualiser(PlottingUFuncMixin, VisualiserMiscsMixin, VisualiserEasyAccesse
             t.join()
 
     def spin_once(self):
-        app.process_events()
+        self.app.process_events()
+
+    def render(self, path: Optional[str] = None) -> np.ndarray:
+        """
+        Render the current scene into an rgba image, and optionally save it to the
+        given path (e.g. a png). Works with a window or in the offscreen mode.
+        """
+        self.app.process_events()
+        image = self.canvas.render()
+        if path is not None:
+            from PIL import Image
+
+            Image.fromarray(image).save(path)
+        return image
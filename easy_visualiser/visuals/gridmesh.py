@@ -1,3 +1,5 @@
+from typing import Optional, Tuple
+
 import numpy as np
 from vispy.geometry import create_grid_mesh
 from vispy.scene.visuals import create_visual_node
@@ -6,7 +8,38 @@ from vispy.visuals.gridmesh import GridMeshVisual
 
 
 class FixedGridMeshVisual(GridMeshVisual):
-    def set_data(self, xs=None, ys=None, zs=None, colors=None, filter_nan=True):
+    # (class level defaults, as the visual is frozen once constructed)
+    _grid_vertices: Optional[np.ndarray] = None
+    # the grid shape, whether it is compacted, and the nan mask that the faces had
+    # been built for. As long as they stay the same, new heights only need to
+    # rewrite the z column.
+    _topology_key: Optional[Tuple[Tuple[int, ...], bool, Optional[np.ndarray]]] = None
+    # nan mask of the x/y part of the vertices
+    _xy_nan_mask: Optional[np.ndarray] = None
+    # the (grid) indices of the vertices that are kept, if compacted
+    _kept_vertices: Optional[np.ndarray] = None
+    _compact_vertices: bool = False
+    # whether the pending update only concerns the vertex positions
+    _only_heights_changed: bool = False
+
+    def __init__(self, xs, ys, zs, colors=None, compact_vertices=False, **kwargs):
+        """
+        :param compact_vertices: drop the vertices that are not part of any face
+            (e.g. the nan ones), such that fewer vertices get uploaded. Worth it
+            for grids with large masked out areas.
+        """
+        self._compact_vertices = compact_vertices
+        super().__init__(xs, ys, zs, colors=colors, **kwargs)
+
+    def set_data(
+        self,
+        xs=None,
+        ys=None,
+        zs=None,
+        colors=None,
+        filter_nan=True,
+        compact_vertices=None,
+    ):
         """Update the mesh data.
 
         Parameters
@@ -21,59 +54,131 @@ class FixedGridMeshVisual(GridMeshVisual):
             The color at each point of the mesh. Must have shape
             (width, height, 4) or (width, height, 3) for rgba or rgb
             color definitions respectively.
+        filter_nan : bool
+            Drop the faces with any nan vertex.
+        compact_vertices : bool | None
+            Drop the vertices that are not part of any face. Keeps the
+            previous setting if None.
+        """
+        if compact_vertices is not None:
+            self._compact_vertices = compact_vertices
+        heights_only = (
+            xs is None
+            and ys is None
+            and zs is not None
+            and self.__set_heights(zs, filter_nan)
+        )
+        if not heights_only:
+            self.__rebuild(
+                self._xs if xs is None else xs,
+                self._ys if ys is None else ys,
+                self._zs if zs is None else zs,
+                filter_nan,
+            )
+
+        if colors is not None:
+            colors = colors.reshape(colors.shape[0] * colors.shape[1], colors.shape[2])
+            if self._kept_vertices is not None:
+                colors = colors[self._kept_vertices]
+            self._GridMeshVisual__meshdata.set_vertex_colors(colors)
+
+        # a full update that is still pending must not get downgraded
+        pending = self._data_changed and not self._only_heights_changed
+        MeshVisual.set_data(self, meshdata=self._GridMeshVisual__meshdata)
+        self._only_heights_changed = heights_only and colors is None and not pending
+
+    def __set_heights(self, zs, filter_nan: bool) -> bool:
         """
-        if xs is None:
-            xs = self._xs
-            GridMeshVisual._GridMeshVisual__vertices = None
+        Rewrites the z column of the vertices in place. Returns False (and
+        changes nothing) if the topology would change, i.e. it needs a rebuild.
+        """
+        zs = np.asarray(zs)
+        if self._grid_vertices is None or self._topology_key is None:
+            return False
+        shape, compacted, nan_mask = self._topology_key
+        if (
+            zs.shape != shape
+            or compacted != self._compact_vertices
+            or filter_nan != (nan_mask is not None)
+        ):
+            return False
+        if filter_nan:
+            new_nan_mask = self._xy_nan_mask | np.isnan(zs).ravel()
+            if not np.array_equal(new_nan_mask, nan_mask):
+                return False
+        vertices = self._grid_vertices
+        if self._kept_vertices is not None:
+            # (the nan vertices are never kept)
+            vertices[:, 2] = zs.ravel()[self._kept_vertices]
+        else:
+            vertices[:, 2] = zs.ravel()
+            if filter_nan:
+                vertices[nan_mask, 2] = 0
+        self._zs = zs
+        # (same array, but this drops the normals and face-indexed vertices)
+        self._GridMeshVisual__meshdata.set_vertices(vertices)
+        return True
 
-        if ys is None:
-            ys = self._ys
-            self._GridMeshVisual__vertices = None
+    def __rebuild(self, xs, ys, zs, filter_nan: bool):
+        self._xs = xs
+        self._ys = ys
+        self._zs = zs
+        vertices, indices = create_grid_mesh(self._xs, self._ys, self._zs)
 
-        if zs is None:
-            zs = self._zs
-            self._GridMeshVisual__vertices = None
+        # Flip the normal every 2nd index
+        indices[1::2, :] = indices[1::2, ::-1]
 
-        if self._GridMeshVisual__vertices is None:
-            self._xs = xs
-            self._ys = ys
-            self._zs = zs
-            vertices, indices = create_grid_mesh(self._xs, self._ys, self._zs)
+        nan_vertices = None
+        if filter_nan:
+            # get all vertices that contains nan
+            xy_nan = np.any(np.isnan(vertices[:, :2]), axis=1)
+            nan_vertices = xy_nan | np.isnan(vertices[:, 2])
+            # filter out the faces with any nan vertex
+            indices = indices[~nan_vertices[indices].any(axis=1)]
+            self._xy_nan_mask = xy_nan
 
-            # Flip the normal every 2nd index
-            indices[1::2, :] = indices[1::2, ::-1]
+        self._kept_vertices = None
+        # (an empty mesh has no bounds, so keep the vertices if there is no face)
+        if self._compact_vertices and len(indices) > 0:
+            # only keep the vertices that faces reference, and re-index the faces
+            used = np.zeros(len(vertices), dtype=bool)
+            used[indices] = True
+            self._kept_vertices = np.flatnonzero(used)
+            new_index = np.cumsum(used, dtype=indices.dtype) - 1
+            indices = new_index[indices]
+            vertices = vertices[self._kept_vertices]
+        elif filter_nan:
+            # set them to default value
+            # NOTE: we do not remove them from the array, because the faces/indices array
+            #       reference those indices.
+            #       - if we remove them, the indices will be changed.
+            #       - on the other hand, if we remain those nan values, the open-gl will
+            #         exhibit some weird behaviour (not crashing, but behave strangely)
+            #       - if the face indices do not reference the vertices, their actual value
+            #         "shouldn't" matters.
+            vertices[nan_vertices] = 0
 
-            if filter_nan:
-                # get all vertices that contains nan
-                nan_vertices = np.any(np.isnan(vertices), axis=1)
-                # set them to default value
-                # NOTE: we do not remove them from the array, because the faces/indices array
-                #       reference those indices.
-                #       - if we remove them, the indices will be changed.
-                #       - on the other hand, if we remain those nan values, the open-gl will
-                #         exhibit some weird behaviour (not crashing, but behave strangely)
-                #       - if the face indices do not reference the vertices, their actual value
-                #         "shouldn't" matters.
-                vertices[np.any(np.isnan(vertices), axis=1)] = 0
-
-                # put the vertices into indices
-                invalid_vertex_indices = np.unique(np.where(nan_vertices))
-                # filter out face indices
-                indices = indices[
-                    np.all(
-                        np.isin(indices, invalid_vertex_indices, invert=True), axis=1
-                    )
-                ]
-
-            self._GridMeshVisual__meshdata.set_vertices(vertices)
-            self._GridMeshVisual__meshdata.set_faces(indices)
+        self._grid_vertices = vertices
+        self._topology_key = np.shape(zs), self._compact_vertices, nan_vertices
+        self._GridMeshVisual__meshdata.set_vertices(vertices)
+        self._GridMeshVisual__meshdata.set_faces(indices)
 
-        if colors is not None:
-            self._GridMeshVisual__meshdata.set_vertex_colors(
-                colors.reshape(colors.shape[0] * colors.shape[1], colors.shape[2])
-            )
+    def mesh_data_changed(self):
+        # anything might have changed (e.g. the colours), so do a full update
+        self._only_heights_changed = False
+        super().mesh_data_changed()
 
-        MeshVisual.set_data(self, meshdata=self._GridMeshVisual__meshdata)
+    def _update_data(self):
+        if not self._only_heights_changed:
+            return super()._update_data()
+        # the faces and colours are the same, so only re-upload the positions
+        vertices = self.mesh_data.get_vertices(indexed="faces")
+        if vertices is None:
+            return False
+        self._vertices.set_data(vertices, convert=True)
+        self._only_heights_changed = False
+        self._data_changed = False
+        self.events.data_updated()
 
 
 FixedGridMesh = create_visual_node(FixedGridMeshVisual)
@@ -191,7 +191,7 @@ class RulerScaleVisual(LineVisual):
                 )
             )
 
-            pos = np.empty((2 + len(self.ticks_info) * 2 + 1, dim), dtype=np.float)
+            pos = np.empty((2 + len(self.ticks_info) * 2 + 1, dim), dtype=float)
             # actual bar of start, end
             pos[0, :] = start_end_pos[0]
             pos[1, :] = start_end_pos[1]
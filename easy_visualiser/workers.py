@@ -0,0 +1,145 @@
+import dataclasses
+import functools
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclasses.dataclass(eq=False)
+class PrepareJob:
+    generation: int
+    # jobs with the same (non-None) version as the one in-flight are not resubmitted
+    version: Optional[Hashable]
+    future: Optional[Future] = None
+
+
+class PrepareWorkerPool:
+    """
+    Runs the heavy data preparation of plugins (loading files, interpolating,
+    building trees, ...) on worker threads, and hands the results back to the gl
+    (main) thread through `apply_ready`, which the visualiser calls every frame.
+
+    Only the latest job of each owner ever gets applied. Submitting a new job
+    cancels the owner's previous one if it had not started yet, or otherwise
+    discards its result once it finishes.
+
+    Threads are used (rather than processes), as numpy / scipy release the GIL
+    in their heavy parts, and results do not need to be pickled.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        on_ready: Optional[Callable[[], None]] = None,
+    ):
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        # called (from a worker thread) whenever a result is ready to be applied
+        self.on_ready = on_ready
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._latest: Dict[Hashable, PrepareJob] = dict()
+        self._ready: Deque[Tuple[Hashable, PrepareJob, Callable, Any]] = deque()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # lazily created, such that no thread is spawned unless needed
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="easy_visualiser-prepare"
+            )
+        return self._executor
+
+    def submit(
+        self,
+        owner: Hashable,
+        prepare: Callable[[], Any],
+        apply: Callable[[Any], None],
+        version: Optional[Hashable] = None,
+    ) -> Future:
+        """
+        Run `prepare` on a worker, then `apply` its result on the main thread,
+        unless another job is submitted by the same owner in the meantime.
+        """
+        with self._lock:
+            latest = self._latest.get(owner)
+            if (
+                latest is not None
+                and version is not None
+                and latest.version == version
+                and not latest.future.done()
+            ):
+                # the same thing is already being prepared
+                return latest.future
+            if latest is not None:
+                latest.future.cancel()
+            job = PrepareJob(
+                generation=0 if latest is None else latest.generation + 1,
+                version=version,
+            )
+            job.future = self.executor.submit(prepare)
+            self._latest[owner] = job
+        job.future.add_done_callback(
+            functools.partial(self.__on_done, owner, job, apply)
+        )
+        return job.future
+
+    def cancel(self, owner: Hashable):
+        """Cancel (or discard the result of) the owner's latest job."""
+        with self._lock:
+            latest = self._latest.pop(owner, None)
+        if latest is not None:
+            latest.future.cancel()
+
+    def is_preparing(self, owner: Hashable) -> bool:
+        latest = self._latest.get(owner)
+        return latest is not None and not latest.future.done()
+
+    def __is_latest(self, owner: Hashable, job: PrepareJob) -> bool:
+        return self._latest.get(owner) is job
+
+    def __on_done(self, owner: Hashable, job: PrepareJob, apply: Callable, future):
+        if future.cancelled() or not self.__is_latest(owner, job):
+            # superseded by a newer job
+            return
+        exception = future.exception()
+        if exception is not None:
+            logger.opt(exception=exception).error(
+                "Failed to prepare the data of {}", owner
+            )
+            return
+        self._ready.append((owner, job, apply, future.result()))
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def apply_ready(self) -> int:
+        """
+        Apply all results that are ready. Must be called on the main thread.
+        Returns the number of applied results.
+        """
+        applied = 0
+        while self._ready:
+            owner, job, apply, result = self._ready.popleft()
+            if not self.__is_latest(owner, job):
+                continue
+            with self._lock:
+                self._latest.pop(owner, None)
+            apply(result)
+            applied += 1
+        return applied
+
+    def shutdown(self):
+        # (rather than shutdown's cancel_futures, which needs python 3.9)
+        with self._lock:
+            latest, self._latest = self._latest, dict()
+        for job in latest.values():
+            job.future.cancel()
+        self._ready.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -100,13 +100,17 @@ def run():
         )
     )
     if not args.no_moos:
+        from easy_visualiser.input.moos import MoosComm
+
+        # such that new mails wake up the event driven loop
+        visualiser.register_datasource(MoosComm.get_instance())
         visualiser.register_plugin(
             VisualisableMoosSwarm(swarm_model_type=args.swarm_model_type)
         )
         visualiser.register_plugin(VisualisablePlannerGraphWithMossMsg())
     visualiser.initialise()
 
-    visualiser.run(regular_update_interval=1)
+    visualiser.run(regular_update_interval=1, event_driven=True)
 
 
 if __name__ == "__main__":